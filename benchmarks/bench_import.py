@@ -0,0 +1,33 @@
+"""
+import benchmarks - cold import time of ragu entry points in a fresh interpreter, for batch scripts and app startup
+"""
+### imports ###
+import subprocess, sys
+
+
+# entry point modules - the gui is left out as it requires a display
+modules = ["ragu", "ragu.ingest", "ragu.radar", "ragu.radar.mosaic", "ragu.tools.export", "ragu.synth"]
+
+
+class Import:
+    params = modules
+    param_names = ["module"]
+
+    def timeraw_import(self, module):
+        return "import {}".format(module)
+
+    # track_importtime reports the cumulative import time [ms] of the module reported by python -X importtime
+    def track_importtime(self, module):
+        out = subprocess.run([sys.executable, "-X", "importtime", "-c", "import {}".format(module)], capture_output=True, text=True, check=True).stderr
+        for line in out.splitlines():
+            fields = [f.strip() for f in line.split("|")]
+            if len(fields) == 3 and fields[2] == module:
+                return int(fields[1])/1e3
+        return float("nan")
+    track_importtime.unit = "ms"
+
+    # track_modules reports the number of modules loaded by importing the module
+    def track_modules(self, module):
+        code = "import sys; n = len(sys.modules); import {}; print(len(sys.modules) - n)".format(module)
+        return int(subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout.split()[-1])
+    track_modules.unit = "modules"
@@ -0,0 +1,27 @@
+"""
+ingest benchmarks - time and peak memory of reading synthetic data files of each supported format
+"""
+### imports ###
+import os
+from ragu.ingest import ingest
+from ragu.nav import navparse
+from benchmarks import generators
+
+
+class Ingest:
+    params = (list(generators.formats), list(generators.sizes))
+    param_names = ["format", "size"]
+    timeout = 600
+
+    def setup(self, fmt, size):
+        # sharad nav referencing requires the mars areoid raster, which is not shipped with the repository
+        if fmt == "sharad" and not os.path.isfile(os.path.join(os.path.dirname(navparse.__file__), "../dat/mars", "mega90n000eb.tif")):
+            raise NotImplementedError("mars areoid not found")
+        self.fpath = generators.get(fmt, size)
+        self.navcrs, self.body = generators.navs[fmt]
+
+    def time_read(self, fmt, size):
+        ingest(self.fpath).read(None, self.navcrs, self.body)
+
+    def peakmem_read(self, fmt, size):
+        ingest(self.fpath).read(None, self.navcrs, self.body)
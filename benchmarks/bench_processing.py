@@ -0,0 +1,75 @@
+"""
+processing benchmarks - time and peak memory of each garlic processing step, display pyramid generation and pick export
+"""
+### imports ###
+import os, tempfile
+from ragu.ingest import ingest
+from ragu.tools import export
+from benchmarks import generators
+
+# processing steps to benchmark, as functions of a garlic object
+steps = {"set_proc": lambda rdata: rdata.set_proc(rdata.proc.get_curr_amp()),
+         "genPyramids": lambda rdata: rdata.genPyramids(rdata.proc.get_curr_dB()),
+         "reverse": lambda rdata: rdata.reverse(),
+         "vertical_roll": lambda rdata: rdata.vertical_roll(samples=10),
+         "flatten": lambda rdata: rdata.flatten(),
+         "tpowGain": lambda rdata: rdata.tpowGain(power=1.2),
+         "filter": lambda rdata: rdata.filter(btype="bandpass", lowcut=1e6, highcut=10e6, order=5, direction=0),
+         "hilbertxform": lambda rdata: rdata.hilbertxform(),
+         "removeSlidingMeanFFT": lambda rdata: rdata.removeSlidingMeanFFT(window=100),
+         "restack": lambda rdata: rdata.restack(intrvl=5, thold=0),
+         "srf_autopick": lambda rdata: rdata.srf_autopick(method="max", horizon="srf_auto"),
+         "undo": lambda rdata: rdata.undo(),
+         "reset": lambda rdata: rdata.reset()}
+
+
+# load is a function to read a synthetic OIB-AK profile, which carries nav, surface picks and a clutter simulation
+def load(size, bed=True):
+    navcrs, body = generators.navs["oibak"]
+    rdata = ingest(generators.get("oibak", size)).read(None, navcrs, body)
+    if bed:
+        rdata.pick.set_horizon("bed", rdata.pick.horizons["srf"] + 300)
+    return rdata
+
+
+class Processing:
+    params = (list(steps), list(generators.sizes))
+    param_names = ["step", "size"]
+    # processing steps modify the profile, so load a fresh profile for each sample
+    number = 1
+    repeat = 5
+    timeout = 600
+
+    def setup(self, step, size):
+        self.rdata = load(size)
+        if step == "undo":
+            self.rdata.tpowGain(power=1.2)
+
+    def time_step(self, step, size):
+        steps[step](self.rdata)
+
+    def peakmem_step(self, step, size):
+        steps[step](self.rdata)
+
+
+class Export:
+    params = list(generators.sizes)
+    param_names = ["size"]
+    timeout = 600
+
+    # merged export of surface and bed horizons, with a fixed layer permittivity
+    def setup(self, size):
+        self.rdata = load(size)
+        self.root = tempfile.mkdtemp()
+
+    def time_pick_math(self, size):
+        export.pick_math(self.rdata, 3.15, True, srf="srf")
+
+    def peakmem_pick_math(self, size):
+        export.pick_math(self.rdata, 3.15, True, srf="srf")
+
+    def time_pick_math_horizon(self, size):
+        export.pick_math(self.rdata, 3.15, True, horizon="srf", srf="srf")
+
+    def time_csv(self, size):
+        export.csv(os.path.join(self.root, "picks.csv"), export.pick_math(self.rdata, 3.15, True, srf="srf"))
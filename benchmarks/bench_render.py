@@ -0,0 +1,165 @@
+"""
+rendering benchmarks - time of profile draws through lut.profile, the rendering path of impick, on an Agg canvas.
+impick is a tk frame which selects the TkAgg backend on import, so its profile is drawn here on a headless canvas
+"""
+### imports ###
+import numpy as np
+import matplotlib as mpl
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from ragu.ingest import ingest
+from ragu.tools import lut
+from benchmarks import generators
+
+
+class view:
+    """
+    view holds a profile on an Agg canvas rather than the tk canvas of impick
+    """
+    def __init__(self, rdata, w=12, h=6, dpi=100):
+        self.rdata = rdata
+        self.fig = Figure(figsize=(w, h), dpi=dpi)
+        self.dataCanvas = FigureCanvasAgg(self.fig)
+        self.ax = self.fig.add_subplot(111)
+        self.prof = lut.profile(self.ax, rdata)
+        self.prof.im_dat.set_cmap(mpl.colormaps["Greys_r"])
+        self.prof.im_sim.set_cmap(mpl.colormaps["Greys_r"])
+
+
+    # drawData draws as impick.drawData - choose the pyramid level for the canvas height, render the viewport and draw if the level changed
+    def drawData(self, force=False):
+        flag = self.prof.set_level(self.fig.get_size_inches()[1]*self.fig.dpi) or force
+        self.prof.render()
+        if flag:
+            self.dataCanvas.draw()
+
+
+class Render:
+    params = (["oibak", "pulseekko", "marsis"], list(generators.sizes))
+    param_names = ["format", "size"]
+    number = 1
+    repeat = 5
+    timeout = 600
+
+    def setup(self, fmt, size):
+        navcrs, body = generators.navs[fmt]
+        rdata = ingest(generators.get(fmt, size)).read(None, navcrs, body)
+        self.view = view(rdata)
+
+    def time_drawData(self, fmt, size):
+        self.view.drawData(force=True)
+
+    def peakmem_drawData(self, fmt, size):
+        self.view.drawData(force=True)
+
+
+class Channels:
+    params = list(generators.sizes)
+    param_names = ["size"]
+    number = 1
+    repeat = 5
+    timeout = 600
+
+    # channel switching of multi-channel MARSIS data, once each channel has been displayed
+    def setup(self, size):
+        navcrs, body = generators.navs["marsis"]
+        rdata = ingest(generators.get("marsis", size)).read(None, navcrs, body)
+        self.view = view(rdata)
+        self.view.drawData(force=True)
+        self.time_switchChan(size)
+
+    def time_switchChan(self, size):
+        for chan in [1, 0]:
+            self.view.rdata.set_chan(chan)
+            self.view.drawData(force=True)
+
+    def time_switchChan_mean(self, size):
+        self.view.rdata.set_chan("mean")
+        self.view.drawData(force=True)
+
+
+class Contrast:
+    params = (["oibak", "pulseekko"], list(generators.sizes))
+    param_names = ["format", "size"]
+    number = 1
+    repeat = 5
+    timeout = 600
+
+    # colour limits of the whole profile, and of a zoomed viewport
+    def setup(self, fmt, size):
+        navcrs, body = generators.navs[fmt]
+        rdata = ingest(generators.get(fmt, size)).read(None, navcrs, body)
+        self.view = view(rdata)
+        self.view.drawData(force=True)
+        self.view.ax.set_xlim(0, rdata.tnum // 4)
+        self.view.ax.set_ylim(rdata.snum // 2, 0)
+
+    def time_set_crange(self, fmt, size):
+        self.view.prof.set_crange()
+
+    def time_stretch_view(self, fmt, size):
+        self.view.prof.stretch_view()
+
+    # a slider step sets the colour limits and redraws, as impick.cmap_update
+    def time_cmap_update(self, fmt, size):
+        for clim in [(-20, 10), (-25, 5)]:
+            self.view.prof.im_dat.set_clim(clim)
+            self.view.dataCanvas.draw()
+
+
+class Toggle:
+    params = list(generators.sizes)
+    param_names = ["size"]
+    number = 1
+    repeat = 5
+    timeout = 600
+
+    # toggling between data and sim images, once both have been rendered for the view
+    def setup(self, size):
+        navcrs, body = generators.navs["oibak"]
+        rdata = ingest(generators.get("oibak", size)).read(None, navcrs, body)
+        self.view = view(rdata)
+        self.view.drawData(force=True)
+        self.time_set_im(size)
+
+    # swap image visibility, render the visible image and draw, as impick.show_data and impick.show_sim
+    def time_set_im(self, size):
+        for sim in [True, False]:
+            self.view.prof.show(sim)
+            self.view.dataCanvas.draw()
+
+
+class Depth:
+    params = list(generators.sizes)
+    param_names = ["size"]
+    number = 1
+    repeat = 5
+    timeout = 600
+
+    # depth conversion of the full resolution display array through two units - index build, cached lookup and one gather
+    def setup(self, size):
+        navcrs, body = generators.navs["oibak"]
+        self.rdata = ingest(generators.get("oibak", size)).read(None, navcrs, body)
+        tnum, snum = self.rdata.tnum, self.rdata.snum
+        self.rdata.pick.set_horizon("srf", np.full(tnum, snum // 10, dtype=float))
+        self.rdata.pick.set_horizon("bed", np.full(tnum, snum // 2, dtype=float) + 10*np.sin(np.arange(tnum) / 50))
+        self.rdata.pick.set_srf("srf")
+        self.index = self.rdata.get_depth_index("depth", [3.15, 8.0], ["bed"])
+        self.view = view(self.rdata)
+        self.view.drawData(force=True)
+
+    def time_get_depth_index(self, size):
+        self.rdata.depth_index = {}
+        self.rdata.get_depth_index("depth", [3.15, 8.0], ["bed"])
+
+    def time_get_depth_index_cached(self, size):
+        self.rdata.get_depth_index("depth", [3.15, 8.0], ["bed"])
+
+    def time_apply(self, size):
+        self.index.apply(self.rdata.dPyramid[0])
+
+    # switching the display to depth and back, through the cached index
+    def time_set_domain(self, size):
+        for domain in ["depth", "twtt"]:
+            self.view.prof.set_domain(domain, [3.15, 8.0], ["bed"])
+            self.view.drawData(force=True)
@@ -0,0 +1,32 @@
+"""
+generators module writes synthetic radar data files in each supported format for benchmarking, using ragu.synth.
+each data file is written once per format and size to a shared cache directory
+"""
+### imports ###
+from ragu import synth
+import os, tempfile
+
+# benchmark sizes, number of traces for each size - fixed-sample formats use the format sample count
+sizes = {"small": 500,
+         "medium": 2000,
+         "large": 5000}
+
+# benchmarked formats
+formats = list(synth.writers)
+
+# nav crs and planetary body for each format
+navs = {fmt: (synth.navcrs[synth.defaults[fmt].get("body", "earth")], synth.defaults[fmt].get("body", "earth")) for fmt in formats}
+
+
+# get is a function to return the path of a synthetic data file of the given format and size, writing it once to a shared cache directory
+def get(fmt, size, root=None):
+    root = root or os.path.join(tempfile.gettempdir(), "ragu_bench")
+    root = os.path.join(root, fmt, size)
+    done = os.path.join(root, "done")
+    if os.path.isfile(done):
+        with open(done) as f:
+            return f.read()
+    fpath = synth.write(synth.get_scene(fmt, sizes[size]), fmt, root)
+    with open(done, "w") as f:
+        f.write(fpath)
+    return fpath
@@ -0,0 +1,12 @@
+# RAGU - Radar Analysis Graphical Utility
+#
+# copyright © 2020 btobers <tobers.brandon@gmail.com>
+#
+# distributed under terms of the GNU GPL3.0 license
+"""
+ragu subpackages and modules are imported on first attribute access
+"""
+### imports ###
+from ragu.tools import lazy
+
+__getattr__ = lazy.attrs(__name__, ["config", "synth", "ingest", "radar", "nav", "tools", "ui"])
@@ -9,6 +9,10 @@ def create_config(fpath):
     config.set('param', 'uid', '')
     config.set('param', '# str cmap: Matplotlib colormap to use (default = seismic)')
     config.set('param', 'cmap', '')
+    config.set('param', '# str precision: floating point precision of processed data arrays, single or double (default = single)')
+    config.set('param', 'precision', 'single')
+    config.set('param', '# bool perf: record timing and memory of ingest, processing and export steps to perf.jsonl alongside the config file (default = False)')
+    config.set('param', 'perf', 'False')
 
     config.add_section('path')
     config.set('path', '# str datPath: path to data files (optional)')
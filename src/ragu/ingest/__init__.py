@@ -7,13 +7,16 @@
 radar data ingest wrapper
 """
 ### imports ###
-from ragu.ingest import ingest_oibAK, ingest_groundhog, ingest_uaf_kentech, ingest_pulseekko, ingest_gssi, ingest_sharad, ingest_marsis, ingest_marsis_ipc, ingest_lrs, ingest_cresis_rds, ingest_cresis_snow, ingest_rimfax
-from ragu.tools import utils
+from ragu.tools import utils, perf, lazy
 import numpy as np
 import pandas as pd
-import tkinter as tk
 import fnmatch
 
+# ingester modules are imported when read dispatches to them, or on first attribute access
+ingesters = ["ingest_oibAK", "ingest_groundhog", "ingest_uaf_kentech", "ingest_pulseekko", "ingest_gssi", "ingest_sharad", "ingest_marsis",
+             "ingest_marsis_ipc", "ingest_lrs", "ingest_cresis_rds", "ingest_cresis_snow", "ingest_rimfax"]
+__getattr__ = lazy.attrs(__name__, ingesters)
+
 class ingest:
     # ingest is a class which builds a dictionary holding data and metadata from the file
     def __init__(self, fpath):
@@ -32,11 +35,13 @@ class ingest:
         self.ftype = ftype
 
 
+    @perf.timed()
     def read(self, simpath=None, navcrs='+proj=longlat +ellps=WGS84 +datum=WGS84 +no_defs', body='earth'):
         # wrapper method for reading in a file
         # better ways to do this than an if/else
         # but for a few file types this is easier
         if (self.ftype == "h5"):
+            from ragu.ingest import ingest_oibAK, ingest_groundhog, ingest_uaf_kentech
             try:
                 self.rdata = ingest_oibAK.read_h5(self.fpath, navcrs, body)
             except:
@@ -45,6 +50,7 @@ class ingest:
                 except:
                     self.rdata = ingest_uaf_kentech.read_h5(self.fpath, navcrs, body)
         elif (self.ftype == "mat"):
+            from ragu.ingest import ingest_cresis_snow, ingest_cresis_rds, ingest_oibAK
             try:
                 self.rdata = ingest_cresis_snow.read_mat(self.fpath, navcrs, body)
             except:
@@ -53,6 +59,7 @@ class ingest:
                 except:
                     self.rdata = ingest_oibAK.read_mat(self.fpath, navcrs, body)
         elif (self.ftype == "img"):
+            from ragu.ingest import ingest_sharad, ingest_lrs, ingest_marsis, ingest_marsis_ipc
             try:
                 self.rdata = ingest_sharad.read(self.fpath, simpath, navcrs, body)
             except:
@@ -64,15 +71,19 @@ class ingest:
                     except:
                         self.rdata = ingest_marsis_ipc.read(self.fpath, simpath, navcrs, body)
         elif (self.ftype == "dat"):
+            from ragu.ingest import ingest_marsis
             self.rdata = ingest_marsis.read(self.fpath, simpath, navcrs, body)
         elif (self.ftype == "csv"):
+            from ragu.ingest import ingest_rimfax
             self.rdata = ingest_rimfax.read(self.fpath, navcrs, body)
         elif (self.ftype == "dt1"):
+            from ragu.ingest import ingest_pulseekko
             self.rdata = ingest_pulseekko.read_dt1(self.fpath, navcrs, body)
         elif (self.ftype == "gpz"):
             raise ValueError("Error: \tPulseEKKO GPZ project file ingester currently in development.\n\tExport lineset from EKKO_Project to read DT1 files with RAGU")
             # self.rdata = ingest_pulseekko.partition_project_file(self.fpath, navcrs, body)
         elif (self.ftype == "dzt"):
+            from ragu.ingest import ingest_gssi
             self.rdata = ingest_gssi.read(self.fpath, navcrs, body)
 
         else:
@@ -90,7 +101,8 @@ class ingest:
 
 
     # import_pick is a method of the ingester class which loads in existing picks from a text file
-    def import_pick(self, fpath, uid, force=False):
+    # confirm is the import policy for each horizon - a bool, or a callable (title, message) returning a bool - force imports all horizons
+    def import_pick(self, fpath, uid, force=False, confirm=True):
         if fpath.endswith("csv"):
             dat = pd.read_csv(fpath, comment='#')
             if dat.shape[0] != self.rdata.tnum:
@@ -105,7 +117,7 @@ class ingest:
                     horizon = horizon.split("_")
                     if len(horizon) > 1:
                         horizon = horizon[0]
-                        sample = dat[horizon + "_sample"].to_numpy() 
+                        sample = dat[horizon + "_sample"].to_numpy(dtype=float, copy=True)
                     
                     else:
                         # get horizon name from pick file name
@@ -117,7 +129,7 @@ class ingest:
                         # account for any already applied tzero
                     sample -= self.rdata.flags.sampzero
 
-                    if (not force) and (not tk.messagebox.askyesno("Import Horizon","Import " + str(horizon) + " horizon?")):
+                    if (not force) and (not utils.decide(confirm, "Import Horizon", "Import " + str(horizon) + " horizon?")):
                         continue
 
                     if horizon in self.rdata.pick.horizons.keys():
@@ -127,7 +139,7 @@ class ingest:
                         # elif imported horizon different form existing, and existing is not all nan, append '_imported' on name
                         elif not np.isnan(self.rdata.pick.horizons[horizon]).all():
                             horizon = horizon + "_imported"
-                    self.rdata.pick.horizons[horizon] = sample
+                    self.rdata.pick.set_horizon(horizon, sample)
                     horizons.append(horizon)
 
         return  horizons
\ No newline at end of file
@@ -13,7 +13,6 @@ from ragu.tools import utils
 import h5py, fnmatch
 import numpy as np
 import sys
-import matplotlib.pyplot as plt
 # method to ingest CReSIS snow radar data
 def read_mat(fpath, navcrs, body):
     rdata = garlic(fpath)
@@ -51,7 +50,7 @@ def read_mat(fpath, navcrs, body):
     rdata.pick.srf = "srf"
     # get two-way travel times to lidar surface from CReSIS snow radar data
     twtt_surf = f["Surface"][:].flatten()
-    rdata.pick.horizons["srf"] = utils.twtt2sample(twtt_surf, rdata.dt)
+    rdata.pick.set_horizon("srf", utils.twtt2sample(twtt_surf, rdata.dt))
     # account for truncated samples above row zero in radargram
     rdata.pick.horizons["srf"] -= rdata.truncs
     rdata.set_srfElev() 
@@ -45,7 +45,7 @@ def read_h5(fpath, navcrs, body):
 
     rdata.nchan = 1
 
-    rdata.set_dat(f[grp]["rx0"][:].astype(float))
+    rdata.set_dat(rdata.as_dtype(f[grp]["rx0"][:]))
 
     # get system info
     try:
@@ -110,9 +110,9 @@ def read_h5(fpath, navcrs, body):
         rdata.tpowGain(1.5)
 
     # init surface and bed horizons
-    rdata.pick.horizons["srf"] = arr
+    rdata.pick.set_horizon("srf", arr)
     rdata.pick.set_srf("srf")
     arr = np.repeat(np.nan, rdata.tnum)
-    rdata.pick.horizons["bed"] = arr
+    rdata.pick.set_horizon("bed", arr)
 
     return rdata
\ No newline at end of file
@@ -11,10 +11,8 @@ data format is binary 32-bit floating point pulse compressed data
 from ragu.radar import garlic
 from ragu.nav import navparse
 from ragu.tools import utils
-from PIL import Image
 import numpy as np
 import os, sys, glob
-import matplotlib.pyplot as plt
 
 # method to read JPL multilook MARSIS data
 def read(fpath, simpath, navcrs, body):
@@ -26,35 +24,26 @@ def read(fpath, simpath, navcrs, body):
     rdata.fn = fn[:-4]
     rdata.dtype = "marsis"
 
-    # convert binary RGRAM to numpy array
-    # # reshape array
-    dtype = np.dtype("float32")     
-    with open(fpath, "rb") as f:
-        dat = np.fromfile(f, dtype)     
-    l = len(dat)
+    # map binary RGRAM - each trace holds 8 stacked rgrams
+    dtype = np.dtype("float32")
+    l = os.path.getsize(fpath) // dtype.itemsize
 
     rdata.snum = 2048
     # get number of traces, dividing file length by number of samples per trace, by 8 data arrays
     rdata.tnum = int(l/rdata.snum/8)
+    dat = np.memmap(fpath, dtype=dtype, mode="r", shape=(rdata.tnum, 8, rdata.snum))
     # dt per pixel from reprocessed oversampled data - data is oversampled by factor of 2
     rdata.fs = 2*(1.4e6)
     rdata.dt = 1/rdata.fs
     rdata.prf = 127
     rdata.nchan = 2
 
-    # reshape into 8 stacked rgrams
-    dat = dat.reshape((rdata.snum*8,rdata.tnum),order="F")
-
-    # reprocessed MARSIS data should be bottom two rgrams
-    dat = dat[-(rdata.snum*rdata.nchan):,:]
-
-    # reshape into stacked 3D array for two channels
-    tmp = np.zeros((rdata.snum,rdata.tnum,rdata.nchan))
-    tmp[:,:,0] = dat[:rdata.snum,:]
-    tmp[:,:,1] = dat[-rdata.snum:,:]
+    # reprocessed MARSIS data should be bottom two rgrams - read into a channel-major (nchan x snum x tnum) array, so each channel is contiguous
+    chans = np.ascontiguousarray(dat[:,-rdata.nchan:,:].transpose(1, 2, 0), dtype=rdata.fdtype)
+    del dat
     # apparently data arrays are already power values, so revert to amplitude (abs(amplitude))
-    rdata.set_dat(np.sqrt(tmp))
-    rdata.set_proc(rdata.get_dat())
+    np.sqrt(chans, out=chans)
+    rdata.set_chans(chans)
 
     # convert png clutter sim product to numpy array
     if simpath:
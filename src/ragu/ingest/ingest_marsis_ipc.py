@@ -11,10 +11,8 @@ data format is binary 32-bit floating point pulse compressed data
 from ragu.radar import garlic
 from ragu.nav import navparse
 from ragu.tools import utils
-from PIL import Image
 import numpy as np
 import os, sys, glob
-import matplotlib.pyplot as plt
 
 # method to read JPL multilook MARSIS data
 def read(fpath, simpath, navcrs, body):
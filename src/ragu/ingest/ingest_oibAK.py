@@ -80,7 +80,7 @@ def read_h5(fpath, navcrs, body):
     else:
         arr = np.repeat(np.nan, rdata.tnum)
         rdata.set_srfElev(dat = arr)
-    rdata.pick.horizons["srf"] = arr
+    rdata.pick.set_horizon("srf", arr)
     rdata.pick.set_srf("srf")
 
     # # read in bed picks
@@ -145,7 +145,7 @@ def read_mat(fpath, navcrs, body):
 
     if not np.isnan(twtt_srf).all():
         arr = utils.twtt2sample(twtt_srf, rdata.dt)
-        rdata.pick.horizons["srf"] = arr
+        rdata.pick.set_horizon("srf", arr)
         rdata.pick.srf = "srf"
 
         # get surface elevation
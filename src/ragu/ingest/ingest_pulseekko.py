@@ -147,7 +147,7 @@ def read_dt1(fpath, navcrs, body):
         tnum, = struct.unpack('f',datafile.read(4))
         rdata.tnum = int(tnum)
         # Initialize matrix
-        rdata.set_dat(np.zeros((rdata.snum,rdata.tnum)))
+        rdata.set_dat(np.zeros((rdata.snum,rdata.tnum), dtype=rdata.fdtype))
         head = np.zeros((headlen,rdata.tnum))
         # Set the reader to the beginning of the file
         datafile.seek(0,0)
@@ -174,7 +174,7 @@ def read_dt1(fpath, navcrs, body):
     rdata.info.pop("Total_time_window")
 
     # convert signed int amplitude to floating point for displaying
-    rdata.set_proc(rdata.get_dat().astype(float))
+    rdata.set_proc(rdata.get_dat())
 
     rdata.set_twtt()
 
@@ -14,7 +14,6 @@ import h5py, fnmatch
 import pandas as pd
 import numpy as np
 import sys
-import matplotlib.pyplot as plt
 # method to ingest RIMFAX radar data from the PDS
 
 ###
@@ -68,6 +68,7 @@ def read_dat(fpath, navcrs, body):
     rdata.dt = 1/rdata.fs               # sampling interval, sec
     rdata.set_dat(data)                 # assign amplitude data array as input radar data
     rdata.set_proc(rdata.get_dat())     # this stores a processed data array - data is dB'd for display purposes
+    # for multichannel data, instead pass a channel-major (nchan x snum x tnum) amplitude array to rdata.set_chans(data) - this sets nchan, dat and processed data of each channel
     if sim:
         rdata.set_sim(sim)              # clutter sim array
 
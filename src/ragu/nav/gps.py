@@ -3,11 +3,12 @@ gps library contains classes and functions to handle different types of GPS data
 modified from ImpDAR - DOI:10.5281/zenodo.3833057
 """
 ### imports ###
+from ragu.tools import lazy
 import numpy as np
-from scipy.interpolate import interp1d
-import matplotlib.pyplot as plt
 import sys
 
+interpolate = lazy.load("scipy.interpolate")
+
 class nmea_info:
     """Container for general information about lat, lon, etc.
 
@@ -141,18 +142,18 @@ class GPSdat(nmea_info):
         kgps_where = np.where(kgps_mask)[0]
         kgps_indx = np.hstack((np.array([0]), 1 + kgps_where))
         # linearly interpolate lat,lon,elev,time - linearly extrapolate to fill tails 
-        self.lat = interp1d(self.nmea_info.scans[kgps_indx],
+        self.lat = interpolate.interp1d(self.nmea_info.scans[kgps_indx],
                             self.nmea_info.lat[kgps_indx],
                             kind='linear',
                             fill_value='extrapolate')(np.arange(trace_num))
-        self.lon = interp1d(self.nmea_info.scans[kgps_indx],
+        self.lon = interpolate.interp1d(self.nmea_info.scans[kgps_indx],
                             self.nmea_info.lon[kgps_indx],
                             kind='linear',
                             fill_value='extrapolate')(np.arange(trace_num))
-        self.elev = interp1d(self.nmea_info.scans[kgps_indx],
+        self.elev = interpolate.interp1d(self.nmea_info.scans[kgps_indx],
                           self.nmea_info.elev[kgps_indx], kind='linear',
                           fill_value='extrapolate')(np.arange(trace_num))
-        self.times = interp1d(self.nmea_info.scans[kgps_indx],
+        self.times = interpolate.interp1d(self.nmea_info.scans[kgps_indx],
                               self.nmea_info.times[kgps_indx],
                               kind='linear',
                               fill_value='extrapolate')(np.arange(trace_num))
\ No newline at end of file
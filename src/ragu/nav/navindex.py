@@ -0,0 +1,165 @@
+# RAGU - Radar Analysis Graphical Utility
+#
+# copyright © 2020 btobers <tobers.brandon@gmail.com>
+#
+# distributed under terms of the GNU GPL3.0 license
+"""
+navindex module reads track navigation for the basemap in a process pool and caches it in a nav index file,
+so that large directories of tracks only need to be read once
+"""
+### imports ###
+from ragu.nav import navparse
+import os, struct, hashlib
+import h5py
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+# default nav index file path
+index_path = os.path.join(os.path.expanduser("~"), "RAGU", "navindex.h5")
+
+
+# get_track is a function to return the track name and radar data file path for a nav file,
+# or none if basemap can not read nav from the file type
+def get_track(f):
+    root, ext = os.path.splitext(f)
+    ext = ext.lower()
+    if ext in [".h5", ".mat"]:
+        return os.path.basename(root), f
+    elif ext == ".dzg":
+        # gssi nav is stored alongside dzt data file
+        dpath = [root + _i for _i in [".DZT", ".dzt"] if os.path.isfile(root + _i)]
+        return os.path.basename(root), (dpath[0] if dpath else root + ".DZT")
+    elif f.endswith("_geom.tab"):
+        # sharad nav is stored alongside rgram data file
+        root = f[:-len("_geom.tab")]
+        return os.path.basename(root), root + "_rgram.img"
+    return None
+
+
+# gssi_tnum is a function to get the number of traces in a gssi dzt file from its header
+def gssi_tnum(fpath):
+    with open(fpath, "rb") as f:
+        f.seek(2)
+        data_offset = struct.unpack("<h", f.read(2))[0]
+        snum = struct.unpack("<h", f.read(2))[0]
+        bits = struct.unpack("<h", f.read(2))[0]
+        f.seek(52)
+        nchan = struct.unpack("<h", f.read(2))[0]
+    didx = 1024 * data_offset if data_offset < 1024 else 1024 * nchan
+    return (os.path.getsize(fpath) - didx) // (snum * nchan * bits // 8)
+
+
+# read_nav is a function to read the nav of a single track - run in worker processes
+def read_nav(f, navcrs, body):
+    track = get_track(f)
+    if track is None:
+        return None
+    fn, dpath = track
+    try:
+        if f.endswith("h5"):
+            try:
+                navdf = navparse.getnav_oibAK_h5(f, navcrs, body)
+            except Exception:
+                navdf = navparse.getnav_groundhog(f, navcrs, body)
+        elif f.endswith("mat"):
+            try:
+                navdf = navparse.getnav_cresis_mat(f, navcrs, body)
+            except Exception:
+                navdf = navparse.getnav_oibAK_mat(f, navcrs, body)
+        elif f.lower().endswith("dzg"):
+            navdf = navparse.getnav_gssi(f, gssi_tnum(dpath), navcrs, body)
+        else:
+            navdf = navparse.getnav_sharad(f, navcrs, body)
+    except (Exception, SystemExit) as err:
+        print("navindex.read_nav error: " + f + " " + str(err))
+        return None
+
+    return {"fn": fn, "fpath": dpath,
+            "lon": navdf["lon"].to_numpy(dtype=float),
+            "lat": navdf["lat"].to_numpy(dtype=float)}
+
+
+class navindex:
+    # navindex is a class to read track nav in parallel, caching results in an hdf5 nav index file
+    def __init__(self, navcrs, body, fpath=index_path, workers=None):
+        self.navcrs = navcrs
+        self.body = body
+        self.fpath = fpath
+        self.workers = workers
+        self.pool = None
+        self.futures = []
+
+
+    # get_key is a method to get the nav index key for a nav file
+    def get_key(self, f):
+        return hashlib.sha1(os.path.abspath(f).encode("utf-8")).hexdigest()
+
+
+    # get_stamp is a method to get the stamp which must match for a cached track to be valid
+    def get_stamp(self, f):
+        st = os.stat(f)
+        return "{}|{}|{}|{}".format(st.st_mtime_ns, st.st_size, self.navcrs, self.body)
+
+
+    # get_cached is a method to return cached nav for a list of files, as well as files which must be read
+    def get_cached(self, flist):
+        cached = []
+        uncached = []
+        try:
+            h5 = h5py.File(self.fpath, "r")
+        except Exception:
+            return cached, [f for f in flist if get_track(f)]
+        with h5:
+            for f in flist:
+                if get_track(f) is None:
+                    continue
+                key = self.get_key(f)
+                if key in h5 and h5[key].attrs["stamp"] == self.get_stamp(f):
+                    grp = h5[key]
+                    cached.append({"fn": grp.attrs["fn"], "fpath": grp.attrs["fpath"],
+                                   "lon": grp["lon"][:], "lat": grp["lat"][:]})
+                else:
+                    uncached.append(f)
+        return cached, uncached
+
+
+    # put is a method to add a list of (file, nav) pairs to the nav index file
+    def put(self, navs):
+        try:
+            os.makedirs(os.path.dirname(self.fpath), exist_ok=True)
+            with h5py.File(self.fpath, "a") as h5:
+                for f, nav in navs:
+                    key = self.get_key(f)
+                    if key in h5:
+                        del h5[key]
+                    grp = h5.create_group(key)
+                    grp.attrs["stamp"] = self.get_stamp(f)
+                    grp.attrs["fn"] = nav["fn"]
+                    grp.attrs["fpath"] = nav["fpath"]
+                    grp.create_dataset("lon", data=nav["lon"])
+                    grp.create_dataset("lat", data=nav["lat"])
+        except Exception as err:
+            # nav index is only a cache
+            print("navindex.put error: " + str(err))
+
+
+    # submit is a method to start reading nav for a list of files in the process pool - returns {future: file}
+    def submit(self, flist):
+        if self.pool is None:
+            # spawn workers so that they do not inherit the tkinter state of the parent
+            self.pool = ProcessPoolExecutor(max_workers=self.workers,
+                                            mp_context=multiprocessing.get_context("spawn"))
+        futures = {self.pool.submit(read_nav, f, self.navcrs, self.body): f for f in flist}
+        self.futures = [f for f in self.futures if not f.done()] + list(futures)
+        return futures
+
+
+    # shutdown is a method to cancel pending reads and close the process pool
+    def shutdown(self):
+        if self.pool is not None:
+            # cancel pending reads by hand - shutdown(cancel_futures=True) requires python 3.9
+            for f in self.futures:
+                f.cancel()
+            self.futures = []
+            self.pool.shutdown(wait=False)
+            self.pool = None
@@ -10,15 +10,16 @@ nav library contains various fucntions for reading radar nav data and transformi
 from ragu.raguError import raguError
 from ragu.nav.gps import GPSdat
 from ragu.tools.constants import *
+from ragu.tools import lazy
 import sys,os
 import pandas as pd
-import rasterio as rio
-from rasterio.plot import show
 import numpy as np
-import scipy.io as scio
-import h5py, codecs
-from pyproj import Transformer
-import matplotlib.pyplot as plt
+import codecs
+
+rio = lazy.load("rasterio")
+scio = lazy.load("scipy.io")
+h5py = lazy.load("h5py")
+pyproj = lazy.load("pyproj")
 
 # various getnav functions must return a pandas dataframe consisting of the following cols -
 # ["lon", "lat", "elev", "x", "y", "z", "twtt_wind", "dist"], where xyz are planetocentric radar platform location,
@@ -33,7 +34,7 @@ xyzsys = {
 
 
 def get_xformer(crs_from, crs_to):
-    return Transformer.from_crs(crs_from=crs_from, crs_to=crs_to)
+    return pyproj.Transformer.from_crs(crs_from=crs_from, crs_to=crs_to)
 
 
 def interp_xords(df, keys=["lon","lat","elev"]):
@@ -43,13 +44,47 @@ def interp_xords(df, keys=["lon","lat","elev"]):
             continue
         nan_indices = np.isnan(df[key].values)
         non_nan_indices = ~nan_indices
-        non_nan_values = df[key].values[non_nan_indices]
-        indices = np.arange(len(df[key]))
+        vals = df[key].to_numpy(dtype=float, copy=True)
+        non_nan_values = vals[non_nan_indices]
+        indices = np.arange(len(vals))
         # Interpolate NaN values
-        df[key].values[nan_indices] = np.interp(indices[nan_indices], indices[non_nan_indices], non_nan_values)
+        vals[nan_indices] = np.interp(indices[nan_indices], indices[non_nan_indices], non_nan_values)
+        df[key] = vals
     return df
 
 
+def sample_raster(fpath, lon, lat, navcrs, band=1):
+    # sample raster values along a track, reading only the raster blocks the track passes through so memory is bounded by the block size
+    # returns np.ndarray of raster values, nan where track points fall outside the raster, on nodata or have no nav
+    out = np.repeat(np.nan, len(lon))
+    with rio.open(fpath, mode="r") as src:
+        xformer = get_xformer(navcrs, src.crs.to_proj4())
+        x, y = xformer.transform(np.asarray(lon, dtype=float), np.asarray(lat, dtype=float))
+        x = np.asarray(x)
+        y = np.asarray(y)
+        idx = np.where(np.isfinite(x) & np.isfinite(y))[0]
+        if not idx.size:
+            return out
+        rows, cols = rio.transform.rowcol(src.transform, x[idx], y[idx])
+        rows = np.asarray(rows)
+        cols = np.asarray(cols)
+        inside = (rows >= 0) & (rows < src.height) & (cols >= 0) & (cols < src.width)
+        idx, rows, cols = idx[inside], rows[inside], cols[inside]
+        # group track points by raster block
+        bh, bw = src.block_shapes[band - 1]
+        blocks, inv = np.unique(np.c_[rows // bh, cols // bw], axis=0, return_inverse=True)
+        inv = inv.ravel()
+        # sort points by block once so each block's points are a contiguous slice
+        order = np.argsort(inv, kind="stable")
+        bounds = np.searchsorted(inv[order], np.arange(len(blocks) + 1))
+        for _i, (br, bc) in enumerate(blocks):
+            m = order[bounds[_i]:bounds[_i + 1]]
+            r0, c0 = br*bh, bc*bw
+            win = src.read(band, window=rio.windows.Window(c0, r0, min(bw, src.width - c0), min(bh, src.height - r0)), masked=True)
+            out[idx[m]] = np.ma.filled(win[rows[m] - r0, cols[m] - c0].astype(float), np.nan)
+    return out
+
+
 def euclid_dist(xarray, yarray, zarray):
     dist = np.zeros_like(xarray)
     dist[1:] = np.cumsum(np.sqrt(np.diff(xarray) ** 2.0 + np.diff(yarray) ** 2.0 + np.diff(zarray) ** 2.0))
@@ -4,13 +4,12 @@
 #
 # distributed under terms of the GNU GPL3.0 license
 ### imports ###
-from ragu.tools import utils
+from ragu.tools import utils, perf
 from ragu.radar.flags import flags
 from ragu.radar.pick import pick
 from ragu.radar.processing import proc
 from ragu.raguError import raguError
 import numpy as np
-import scipy.signal as signal
 
 class garlic(object):
     """
@@ -31,8 +30,13 @@ class garlic(object):
                         "twtt",
                         "navdf",
                         "truncs"]
+    #: dtype policy - real valued processed data, dB data and pyramids are stored as fdtype, complex data as cdtype
+    fdtype = np.float32
+    cdtype = np.complex64
     # import processing tools
-    from ragu.radar.processing import reverse, set_tzero, tzero_shift, flatten, vertical_roll, tpowGain, filter, hilbertxform, removeSlidingMeanFFT, restack, undo, redo, reset
+    from ragu.radar.processing import reverse, set_tzero, tzero_shift, flatten, vertical_roll, tpowGain, filter, hilbertxform, removeSlidingMeanFFT, restack, dem_srf, srf_autopick, undo, redo, reset
+    # import depth conversion tools
+    from ragu.radar.depth import get_depth_index, to_domain
 
     def __init__(self, fpath):
         # basic data file attributes
@@ -63,13 +67,15 @@ class garlic(object):
         #: np.ndarray(snum x tnum), raw ingested radar data
         self.dat = None
         #: radar data processing class object
-        self.proc = proc()
+        self.proc = proc(self.dBscale)
         #: np.ndarray(snum x tnum), dB"d radar data pyramids
         self.dPyramid = None
         #: np.ndarray(snum x tnum), dB"d clutter simulation
         self.sim = None
         #: np.ndarray(snum x tnum), dB"s clutter simulation pyramids
         self.sPyramid = None
+        #: tuple (counts, bin edges), histogram of a subsample of the clutter simulation, for colour limits
+        self.sim_hist = None
         #: radar flags object
         self.flags = flags()
         # geographic crs string
@@ -92,15 +98,54 @@ class garlic(object):
         self.hist = []
         #: np.ndarray(tnum,), surface elevation per trace
         self.srfElev = None
+        #: int srfElev_version, incremented each time surface elevation is set
+        self.srfElev_version = 0
         #: pick object
         self.pick = pick()
         #: pandas dataframe output data
         self.out = None
+        #: list of dict, source garlic objects with their sample offset and scale for mosaicked profiles - None otherwise
+        self.sources = None
+
+        # multi-channel attributes
+        #: np.ndarray(nchan x snum x tnum), channel-major raw amplitude of multi-channel data - None otherwise. dat is a view of the active channel
+        self.chans = None
+        #: int or str, active channel - channel index, or "sum" or "mean" for the channel sum or incoherent average
+        self.chan = 0
+        #: dict, raw amplitude, processed data object and pyramids of each inactive channel
+        self.chan_cache = {}
+        #: dict depth_index, cached depth conversion index of each domain
+        self.depth_index = {}
         return
 
 
-    # set radar data
+    # set_precision sets the dtype policy for all garlic objects - "single" (default) or "double" precision
+    @classmethod
+    def set_precision(cls, precision="single"):
+        if precision == "double":
+            cls.fdtype, cls.cdtype = np.float64, np.complex128
+        elif precision == "single":
+            cls.fdtype, cls.cdtype = np.float32, np.complex64
+        else:
+            raise raguError("Unknown precision: {}. Options are single or double.".format(precision))
+
+
+    # get_dtype returns the policy dtype for an array - cdtype for complex arrays, fdtype otherwise
+    def get_dtype(self, dat=None):
+        if dat is not None and np.iscomplexobj(dat):
+            return self.cdtype
+        return self.fdtype
+
+
+    # as_dtype casts an array to the policy dtype, without copying if it already matches
+    def as_dtype(self, dat):
+        return np.asarray(dat).astype(self.get_dtype(dat), copy=False)
+
+
+    # set radar data - floating point and complex arrays are held at the precision policy dtype, integer samples and lazy mosaics as given
     def set_dat(self,dat):
+        if isinstance(dat, np.ndarray) and dat.dtype.kind in "fc":
+            dat = self.as_dtype(dat)
         self.dat = dat
 
 
@@ -109,13 +154,70 @@ class garlic(object):
         return self.dat
 
 
+    # set_chans sets channel-major multi-channel data, precomputing processed data and pyramids of each channel so channels may be switched without recomputing
+    def set_chans(self, dat):
+        self.chans = np.ascontiguousarray(self.as_dtype(dat))
+        self.nchan = self.chans.shape[0]
+        self.chan_cache = {}
+        for chan in range(self.nchan - 1, -1, -1):
+            self.set_chan(chan, log=False)
+
+
+    # get_chan_dat returns the raw amplitude of a channel - a view for single channels, computed for the channel sum or incoherent average
+    def get_chan_dat(self, chan):
+        if chan == "sum":
+            return self.chans.sum(axis=0)
+        elif chan == "mean":
+            return np.sqrt(np.mean(np.square(self.chans), axis=0))
+        elif chan in range(self.nchan):
+            return self.chans[chan]
+        raise raguError("Invalid channel: {}. Options are {}, sum, or mean.".format(chan, ", ".join(str(c) for c in range(self.nchan))))
+
+
+    # set_chan sets the active channel, swapping in its cached processed data and pyramids, or processing its raw data if not yet cached
+    def set_chan(self, chan, log=True):
+        if self.chans is None:
+            if chan != 0:
+                raise raguError("{} has a single data channel.".format(self.fn))
+            return
+        cached = self.chan_cache.pop(chan, None)
+        if cached and cached[1].get_curr_amp().shape != (self.snum, self.tnum):
+            cached = None
+        dat = cached[0] if cached else self.get_chan_dat(chan)
+        if self.proc.get_curr_amp() is not None:
+            self.chan_cache[self.chan] = (self.dat, self.proc, self.dPyramid)
+        self.chan = chan
+        self.set_dat(dat)
+        if cached:
+            self.proc, self.dPyramid = cached[1:]
+        else:
+            self.proc = proc(self.dBscale)
+            self.set_proc(dat)
+        if log:
+            self.log("rdata.set_chan({})".format(repr(chan)))
+
+
+    # clear_chans drops cached processed data of inactive channels, after steps which change the trace axis of the active channel
+    def clear_chans(self):
+        self.chan_cache = {}
+
+
     # set processed radar data method
-    def set_proc(self, dat):
-        self.proc.set_curr_amp(dat)
+    @perf.timed()
+    def set_proc(self, dat, hist=None):
+        # processed data is amplitude - complex data is held as its magnitude
+        amp = self.as_dtype(np.abs(dat) if np.iscomplexobj(dat) else dat)
+        # if processed data is the raw data array, hold a read-only view rather than a copy - processing steps always return new arrays
+        if (self.dat is not None) and np.may_share_memory(amp, self.dat):
+            amp = amp.view()
+            amp.flags.writeable = False
+        self.proc.set_curr_amp(amp)
         # dB it
         self.proc.set_curr_dB(self.dBscale(self.proc.curr_amp))
         # generate pyramid arrays
         self.dPyramid = self.genPyramids(self.proc.get_curr_dB())
+        # histogram for colour limits - reused when data is restored by undo or redo
+        self.proc.set_curr_hist(utils.dB_hist(self.proc.get_curr_dB()) if hist is None else hist)
         return
 
 
@@ -125,6 +227,8 @@ class garlic(object):
         self.sim = self.dBscale(dat)
         # generate pyramid arrays
         self.sPyramid = self.genPyramids(self.sim)
+        # histogram for colour limits
+        self.sim_hist = utils.dB_hist(self.sim)
         # set sim flag to True
         self.flags.sim = True
         return
@@ -147,6 +251,7 @@ class garlic(object):
     # set ground height
     def set_srfElev(self, dat=None):
         #: np.ndarray(tnum,) data, surface elevation per trace
+        self.srfElev_version += 1
         if dat is not None:
             self.srfElev = dat
         else:
@@ -165,17 +270,18 @@ class garlic(object):
         return self.srfElev
 
 
-    # set output dataframe
+    # set output dataframe - exported picks are marked as saved
     def set_out(self, dat):
         self.out = dat
+        self.pick.mark_saved()
         return
 
 
     # convert amplitude array to dB log scale
     def dBscale(self, dat):
         if self.dbit:
-            # convert to power
-            pow = np.power(dat.astype(float), 2)
+            # convert to power, as the squared magnitude for complex data
+            pow = np.square(np.abs(np.asarray(dat)), dtype=self.fdtype)
             # mask zero-power values
             pow[pow == 0] = np.nan
             # dB it
@@ -185,6 +291,7 @@ class garlic(object):
         return out
 
 
+    @perf.timed()
     def genPyramids(self, dat):
         # downsample in fast time by 2^0, 2^1, 2^2, 2^3
         pyramid = []
@@ -197,6 +304,50 @@ class garlic(object):
         return pyramid
 
 
+    # get_nbytes returns the resident bytes of each data array, counting memory shared between arrays only once
+    def get_nbytes(self):
+        arrays = {"dat": self.dat,
+                  "prev_amp": self.proc.get_prev_amp(),
+                  "curr_amp": self.proc.get_curr_amp(),
+                  "curr_dB": self.proc.get_curr_dB(),
+                  "sim": self.sim,
+                  "chans": self.chans}
+        for chan, (_, cproc, cpyramid) in self.chan_cache.items():
+            arrays["chan{}_amp".format(chan)] = cproc.get_curr_amp()
+            arrays["chan{}_dB".format(chan)] = cproc.get_curr_dB()
+            for i, arr in enumerate(cpyramid or []):
+                arrays["chan{}_dPyramid{}".format(chan, i)] = arr
+        for domain, idx in self.depth_index.items():
+            arrays["{}_i0".format(domain)] = idx.i0
+            arrays["{}_w".format(domain)] = idx.w
+        for name, pyramid in [("dPyramid", self.dPyramid), ("sPyramid", self.sPyramid)]:
+            for i, arr in enumerate(pyramid or []):
+                arrays["{}{}".format(name, i)] = arr
+        # mosaic arrays are views of their source arrays
+        from ragu.radar.mosaic import concat
+        for name, arr in list(arrays.items()):
+            if isinstance(arr, concat):
+                del arrays[name]
+                for i, src in enumerate(arr.arrays):
+                    arrays["{}_src{}".format(name, i)] = src
+        out = {}
+        seen = []
+        for name, arr in arrays.items():
+            if not isinstance(arr, np.ndarray):
+                continue
+            # find array owning the memory
+            base = arr
+            while isinstance(base.base, np.ndarray):
+                base = base.base
+            if any(base is b for b in seen):
+                out[name] = 0
+            else:
+                seen.append(base)
+                out[name] = base.nbytes
+        out["total"] = sum(out.values())
+        return out
+
+
     # append previous command to log
     def log(self, cmd=None):
         if cmd and isinstance(cmd,str):
@@ -0,0 +1,225 @@
+# RAGU - Radar Analysis Graphical Utility
+#
+# copyright © 2020 btobers <tobers.brandon@gmail.com>
+#
+# distributed under terms of the GNU GPL3.0 license
+"""
+depth module converts radargrams from two-way travel time to depth below the surface pick, or to elevation,
+migrating each trace onto a regular grid through units of given relative dielectric permittivity between horizons.
+the conversion is a precomputed per-trace interpolation index cached on the garlic object, so displaying a profile in another domain costs one gather
+"""
+### imports ###
+from ragu.tools import perf
+from ragu.tools.constants import C
+from ragu.raguError import raguError
+import numpy as np
+
+# display domains - twtt is the native sample axis
+domains = ["twtt", "depth", "elev"]
+# number of traces converted at once, bounding float temporaries
+chunk_size = 4096
+# number of traces gathered at once
+gather_size = 256
+# maximum number of output grid rows, as a multiple of the number of samples
+max_rows = 4
+
+
+class index(object):
+    """
+    index holds the fractional input sample of each output grid row and trace, as a lower sample and an interpolation weight,
+    along with the unit boundaries of each trace used to convert picks to the output domain
+    """
+    def __init__(self, domain, key, z0, dz, nz, bounds, depths, eps_r, asep, dt, srfElev=None):
+        #: str domain, depth [m below surface] or elev [m]
+        self.domain = domain
+        #: tuple key, inputs the index was computed from
+        self.key = key
+        #: float z0, grid value of the first row, and dz, grid spacing - negative for elevation
+        self.z0 = z0
+        self.dz = dz
+        #: int nz, number of grid rows
+        self.nz = nz
+        #: np.ndarray(nunit x tnum) bounds, sample of the top of each unit - the surface first, inf below the last picked unit
+        self.bounds = bounds
+        #: np.ndarray(nunit x tnum) depths, depth below the surface of the top of each unit
+        self.depths = depths
+        #: list eps_r, relative dielectric permittivity of each unit
+        self.eps_r = eps_r
+        #: np.ndarray(tnum,) asep, antenna separation
+        self.asep = asep
+        self.dt = dt
+        #: np.ndarray(tnum,) srfElev, surface elevation - elevation domain only
+        self.srfElev = srfElev
+        #: np.ndarray(nz x tnum) i0, lower input sample of each grid row, and w, interpolation weight - nan outside the data
+        self.i0 = None
+        self.w = None
+
+
+    # get_axis returns the grid value of each output row
+    def get_axis(self):
+        return self.z0 + np.arange(self.nz)*self.dz
+
+
+    # get_extent returns the [bottom, top] grid values bounding the output rows, for image extents and axis limits
+    def get_extent(self):
+        return [self.z0 + (self.nz - .5)*self.dz, self.z0 - .5*self.dz]
+
+
+    # apply gathers an (snum x tnum) array onto the output grid, over blocks of traces small enough that each block stays in cache
+    def apply(self, arr):
+        out = np.empty((self.nz, self.i0.shape[1]), dtype=np.float32)
+        for t0 in range(0, self.i0.shape[1], gather_size):
+            t1 = min(t0 + gather_size, self.i0.shape[1])
+            blk = np.ascontiguousarray(arr[:, t0:t1], dtype=np.float32).ravel()
+            flat = self.i0[:, t0:t1]*(t1 - t0) + np.arange(t1 - t0, dtype=np.int32)
+            lo = blk.take(flat)
+            hi = blk.take(flat + (t1 - t0))
+            hi -= lo
+            hi *= self.w[:, t0:t1]
+            hi += lo
+            out[:, t0:t1] = hi
+        return out
+
+
+    # from_samples converts samples of each trace, such as a pick horizon, to the output domain
+    def from_samples(self, samples):
+        d = sample2depth(np.asarray(samples, dtype=float), self.bounds, self.depths, self.eps_r, self.asep, self.dt)
+        return d if self.domain == "depth" else self.srfElev - d
+
+
+# unit_depth is a function to return the thickness of a unit traversed in twtt, accounting for antenna separation as utils.twtt2depth
+# thickness is clipped at zero where the separation correction exceeds the path
+def unit_depth(twtt, asep, eps_r):
+    v = C/np.sqrt(eps_r)
+    return np.sqrt(np.fmax((v / 2 * (twtt + (asep / C)))**2 - (asep / 2)**2, 0))
+
+
+# unit_twtt is a function to return the twtt to traverse a thickness of a unit, the inverse of unit_depth as utils.depth2twtt
+def unit_twtt(depth, asep, eps_r):
+    v = C/np.sqrt(eps_r)
+    return 2 / v * (np.sqrt((depth**2) + (asep / 2)**2)) - (asep / C)
+
+
+# get_units is a function to return the top sample of each unit and its depth below the surface, per trace
+# traces without a surface pick are nan - a unit continues to the bottom of the trace where the horizon beneath it is unpicked
+def get_units(srf, horizons, eps_r, asep, dt):
+    bounds = np.vstack([srf] + list(horizons)).astype(float)
+    for j in range(1, bounds.shape[0]):
+        bounds[j] = np.where(np.isnan(bounds[j]), np.inf, np.fmax(bounds[j], bounds[j - 1]))
+    bounds[:, np.isnan(srf)] = np.nan
+    depths = np.zeros_like(bounds)
+    for j in range(1, bounds.shape[0]):
+        with np.errstate(invalid="ignore"):
+            thick = unit_depth((bounds[j] - bounds[j - 1])*dt, asep, eps_r[j - 1])
+        depths[j] = np.where(np.isinf(bounds[j]), np.inf, depths[j - 1] + thick)
+    return bounds, depths
+
+
+# sample2depth is a function to convert samples to depth below the surface - samples above the surface are in air, at negative depth
+def sample2depth(samples, bounds, depths, eps_r, asep, dt):
+    d = (samples - bounds[0])*dt*C/2
+    for j in range(bounds.shape[0]):
+        bot = bounds[j + 1] if j + 1 < bounds.shape[0] else np.inf
+        with np.errstate(invalid="ignore"):
+            m = (samples >= bounds[j]) & (samples < bot)
+            d = np.where(m, depths[j] + unit_depth((samples - bounds[j])*dt, asep, eps_r[j]), d)
+    return d
+
+
+# depth2sample is a function to convert depth below the surface to fractional samples, the inverse of sample2depth
+# each unit's conversion is evaluated only where depths fall within it
+def depth2sample(d, bounds, depths, eps_r, asep, dt):
+    shape = np.broadcast_shapes(np.shape(d), bounds.shape[1:])
+    d = np.broadcast_to(d, shape)
+    k = np.full(shape, np.nan)
+    with np.errstate(invalid="ignore"):
+        m = d < np.broadcast_to(depths[0], shape)
+        k[m] = np.broadcast_to(bounds[0], shape)[m] + d[m]/(dt*C/2)
+        for j in range(bounds.shape[0]):
+            top = np.broadcast_to(depths[j], shape)
+            m = d >= top
+            if j + 1 < bounds.shape[0]:
+                m &= d < np.broadcast_to(depths[j + 1], shape)
+            if not m.any():
+                continue
+            k[m] = np.broadcast_to(bounds[j], shape)[m] + unit_twtt(d[m] - top[m], np.broadcast_to(asep, shape)[m], eps_r[j])/dt
+    return k
+
+
+# get_depth_index returns the cached index converting the radargram to the depth or elev domain, computing it if its inputs changed
+# horizons are the subsurface horizons bounding units beneath the surface pick, top down - eps_r is a float for all units, or a list of one value per unit
+# dz is the grid spacing [m], defaulting to the sample spacing in the unit of highest permittivity
+@perf.timed()
+def get_depth_index(self, domain="depth", eps_r=3.15, horizons=None, dz=None):
+    if domain not in domains[1:]:
+        raise raguError("Invalid domain: {}. Options are {}.".format(domain, ", ".join(domains[1:])))
+    srf = self.pick.get_srf()
+    if srf is None or srf not in self.pick.horizons:
+        raise raguError("A surface horizon must be defined to convert {} to {}.".format(self.fn, domain))
+    horizons = [h for h in (horizons or []) if h != srf]
+    for h in horizons:
+        if h not in self.pick.horizons:
+            raise raguError("Horizon <{}> does not exist.".format(h))
+    eps_r = [float(eps_r)]*(len(horizons) + 1) if np.ndim(eps_r) == 0 else [float(e) for e in eps_r]
+    if len(eps_r) != len(horizons) + 1:
+        raise raguError("A relative dielectric permittivity must be specified for each of the {} units beneath the surface.".format(len(horizons) + 1))
+    if min(eps_r) < 1:
+        raise raguError("Relative dielectric permittivities must be >=1.")
+    srfElev = None
+    if domain == "elev":
+        srfElev = np.broadcast_to(np.nan if self.srfElev is None else self.srfElev, (self.tnum,)).astype(float)
+        if np.isnan(srfElev).all():
+            raise raguError("Surface elevation is required to convert {} to elevation.".format(self.fn))
+
+    # reuse the cached index if none of its inputs changed
+    key = (domain, tuple(eps_r), (srf,) + tuple(horizons), dz, self.snum, self.tnum, self.dt,
+            tuple(self.pick.get_version(h) for h in [srf] + horizons), hash(np.asarray(self.asep, dtype=float).tobytes()),
+            self.srfElev_version if domain == "elev" else None)
+    cached = self.depth_index.get(domain)
+    if cached is not None and cached.key == key:
+        return cached
+
+    asep = np.broadcast_to(np.asarray(self.asep, dtype=float), (self.tnum,))
+    bounds, depths = get_units(self.pick.horizons[srf], [self.pick.horizons[h] for h in horizons], eps_r, asep, self.dt)
+    # depth of the first and last sample of each trace
+    dtop = sample2depth(np.zeros(self.tnum), bounds, depths, eps_r, asep, self.dt)
+    dbot = sample2depth(np.full(self.tnum, self.snum - 1.), bounds, depths, eps_r, asep, self.dt)
+    if np.isnan(dbot).all():
+        raise raguError("Surface horizon of {} has no picks.".format(self.fn))
+    if dz is None:
+        dz = C/np.sqrt(max(eps_r))*self.dt/2
+    if domain == "depth":
+        z0, z1 = 0., np.nanmax(dbot)
+    else:
+        z0, z1 = np.nanmax(srfElev - dtop), np.nanmin(srfElev - dbot)
+    nz = int(np.floor(abs(z1 - z0) / dz)) + 1
+    if nz > max_rows*self.snum:
+        nz = max_rows*self.snum
+        dz = abs(z1 - z0) / (nz - 1)
+    if domain == "elev":
+        dz = -dz
+    out = index(domain, key, z0, dz, nz, bounds, depths, eps_r, asep, self.dt, srfElev)
+
+    # fractional input sample of each grid row, per trace
+    out.i0 = np.empty((nz, self.tnum), dtype=np.int32)
+    out.w = np.empty((nz, self.tnum), dtype=np.float32)
+    z = out.get_axis()[:,None]
+    for t0 in range(0, self.tnum, chunk_size):
+        t1 = min(t0 + chunk_size, self.tnum)
+        d = z if domain == "depth" else srfElev[None,t0:t1] - z
+        k = depth2sample(d, bounds[:,t0:t1], depths[:,t0:t1], eps_r, asep[t0:t1], self.dt)
+        with np.errstate(invalid="ignore"):
+            k[(k < 0) | (k > self.snum - 1)] = np.nan
+        i0 = np.clip(np.floor(np.where(np.isnan(k), 0, k)), 0, max(self.snum - 2, 0)).astype(np.int32)
+        out.i0[:,t0:t1] = i0
+        out.w[:,t0:t1] = k - i0
+    self.depth_index[domain] = out
+
+    return out
+
+
+# to_domain returns an (snum x tnum) array converted to the depth or elev domain, or the array itself for the twtt domain
+def to_domain(self, arr, domain="depth", eps_r=3.15, horizons=None, dz=None):
+    if domain == "twtt":
+        return arr
+    return self.get_depth_index(domain, eps_r, horizons, dz).apply(arr)
@@ -0,0 +1,238 @@
+# RAGU - Radar Analysis Graphical Utility
+#
+# copyright © 2020 btobers <tobers.brandon@gmail.com>
+#
+# distributed under terms of the GNU GPL3.0 license
+"""
+mosaic module stitches consecutive radar data files along the trace axis into a single virtual garlic object,
+so that a flight line split across many files may be interpreted continuously, with picks written back per source file.
+raw data stays a lazy view of the source arrays - the processed amplitude and its display pyramids are built once for the stitched profile
+"""
+### imports ###
+from ragu.radar import garlic
+from ragu.radar.processing import proc
+from ragu.ingest import ingest
+from ragu.nav import navparse
+from ragu.tools import perf
+from ragu.raguError import raguError
+import numpy as np
+import pandas as pd
+
+
+class concat(object):
+    """
+    concat is a lazy array-like view of source arrays stitched along the trace axis.
+    each source is resampled onto the common sample interval and shifted by its sample offset when read,
+    and only the source traces covering the requested columns are read.
+    """
+    def __init__(self, arrays, snum, offsets, scales):
+        #: list of np.ndarray(snum_i x tnum_i) source arrays
+        self.arrays = arrays
+        #: int snum, number of samples in the stitched array
+        self.snum = snum
+        #: list offsets, sample number of source sample zero in the stitched array
+        self.offsets = offsets
+        #: list scales, ratio of source sample interval to stitched sample interval
+        self.scales = scales
+        #: np.ndarray bounds, first trace of each source in the stitched array, plus the total number of traces
+        self.bounds = np.r_[0, np.cumsum([a.shape[1] for a in arrays])]
+        self.shape = (snum, int(self.bounds[-1]))
+        self.ndim = 2
+        self.dtype = np.result_type(*[a.dtype for a in arrays])
+
+
+    def __len__(self):
+        return self.shape[0]
+
+
+    def __array__(self, dtype=None, copy=None):
+        out = self.get_traces(0, self.shape[1])
+        return out if dtype is None else out.astype(dtype, copy=False)
+
+
+    def __getitem__(self, key):
+        if not isinstance(key, tuple):
+            key = (key, slice(None))
+        rows, cols = key if len(key) == 2 else (key[0], key[1])
+        # only read the traces needed for simple trace slices
+        if isinstance(cols, slice) and cols.step in (None, 1):
+            t0, t1, _ = cols.indices(self.shape[1])
+            return self.get_traces(t0, max(t0, t1))[rows]
+        # integer, strided and array trace keys read only the requested columns, indexed as numpy would index the stitched array
+        if isinstance(cols, (int, np.integer, slice, list, np.ndarray)) and not isinstance(cols, bool):
+            idx = np.arange(self.shape[1])[cols]
+            ucols, inv = np.unique(idx, return_inverse=True)
+            return self.get_columns(ucols)[rows, inv.reshape(idx.shape)]
+        return np.asarray(self)[key]
+
+
+    # get_traces returns the stitched array for traces t0 through t1 - 1
+    def get_traces(self, t0, t1):
+        dtype = self.dtype if np.issubdtype(self.dtype, np.complexfloating) else np.result_type(self.dtype, np.float32)
+        out = np.full((self.snum, t1 - t0), np.nan, dtype=dtype)
+        for i, arr in enumerate(self.arrays):
+            lo, hi = max(t0, self.bounds[i]), min(t1, self.bounds[i + 1])
+            if lo >= hi:
+                continue
+            src = arr[:, lo - self.bounds[i]:hi - self.bounds[i]]
+            out[:, lo - t0:hi - t0] = resample(src, self.snum, self.offsets[i], self.scales[i])
+        return out
+
+
+    # get_columns returns the stitched array for a sorted array of unique trace numbers
+    def get_columns(self, cols):
+        dtype = self.dtype if np.issubdtype(self.dtype, np.complexfloating) else np.result_type(self.dtype, np.float32)
+        out = np.full((self.snum, len(cols)), np.nan, dtype=dtype)
+        edges = np.searchsorted(cols, self.bounds)
+        for i, arr in enumerate(self.arrays):
+            lo, hi = edges[i], edges[i + 1]
+            if lo >= hi:
+                continue
+            out[:, lo:hi] = resample(arr[:, cols[lo:hi] - self.bounds[i]], self.snum, self.offsets[i], self.scales[i])
+        return out
+
+
+# resample is a function to linearly resample source traces onto the stitched sample axis
+# stitched sample m corresponds to source sample (m - offset) / scale - samples outside the source are nan
+def resample(src, snum, offset, scale):
+    pos = (np.arange(snum) - offset) / scale
+    valid = (pos >= 0) & (pos <= src.shape[0] - 1)
+    out = np.full((snum, src.shape[1]), np.nan, dtype=np.result_type(src.dtype, np.float32))
+    if not valid.any():
+        return out
+    pos = pos[valid]
+    i0 = np.floor(pos).astype(int)
+    i1 = np.minimum(i0 + 1, src.shape[0] - 1)
+    w = (pos - i0)[:,None]
+    # avoid interpolation where samples align
+    if np.all(w == 0):
+        out[valid] = src[i0]
+    else:
+        out[valid] = src[i0]*(1 - w) + src[i1]*w
+    return out
+
+
+# get_wind is a function to return the twtt from the radar platform to physical sample zero of a source, accounting for truncation
+def get_wind(rdata):
+    return rdata.navdf["twtt_wind"].to_numpy() + rdata.truncs*rdata.dt
+
+
+# read is a function to ingest a list of consecutive data files and stitch them into a single garlic object
+@perf.timed()
+def read(flist, simpath=None, navcrs="+proj=longlat +ellps=WGS84 +datum=WGS84 +no_defs", body="earth"):
+    if len(flist) < 1:
+        raise raguError("No files to mosaic.")
+    sources = [ingest(f).read(simpath, navcrs, body) for f in flist]
+    rdata = stitch(sources)
+    # two header lines, as for ingested data - undo and reset keep the first two log entries
+    rdata.log("from ragu.radar import mosaic")
+    rdata.log("rdata = mosaic.read({},'{}','{}','{}')".format(list(flist), simpath, navcrs, body))
+
+    return rdata
+
+
+# stitch is a function to stitch a list of consecutive garlic objects into a single garlic object
+def stitch(sources):
+    for s in sources:
+        if s.nchan != sources[0].nchan or s.dtype != sources[0].dtype:
+            raise raguError("Unable to mosaic files of different data types or channel counts: {} and {}".format(sources[0].fn, s.fn))
+
+    # stitch onto the finest sample interval, placing each source by its median twtt window to sample zero
+    dt = min(s.dt for s in sources)
+    scales = [s.dt / dt for s in sources]
+    winds = [np.nanmedian(get_wind(s)) for s in sources]
+    wind0 = np.nanmin(winds)
+    offsets = [int(np.rint((w - wind0) / dt)) for w in winds]
+    snum = max(int(np.ceil((s.snum - 1)*scale)) + 1 + offset for s, scale, offset in zip(sources, scales, offsets))
+
+    rdata = garlic(sources[0].fpath)
+    rdata.fn = sources[0].fn + "_" + sources[-1].fn
+    rdata.dtype = sources[0].dtype
+    rdata.nchan = sources[0].nchan
+    rdata.info = dict(sources[0].info)
+    rdata.info["Mosaic Files"] = len(sources)
+    rdata.fs = 1/dt
+    rdata.prf = sources[0].prf
+    rdata.dt = dt
+    rdata.snum = snum
+    rdata.geocrs = sources[0].geocrs
+    rdata.xyzcrs = sources[0].xyzcrs
+    rdata.sources = [{"rdata": s, "offset": o, "scale": sc} for s, o, sc in zip(sources, offsets, scales)]
+
+    rdata.set_dat(concat([s.dat for s in sources], snum, offsets, scales))
+    rdata.tnum = rdata.dat.shape[1]
+    rdata.set_twtt()
+    # processed amplitude is built here for display - source processed arrays already hold the magnitude of complex data
+    rdata.set_proc(concat([s.proc.get_curr_amp() for s in sources], snum, offsets, scales))
+    if all(s.flags.sim for s in sources):
+        from ragu.tools import utils
+        rdata.set_sim(utils.powdB2amp(np.asarray(concat([s.sim for s in sources], snum, offsets, scales))))
+
+    # stitch nav - twtt window is referenced to stitched sample zero
+    navdf = []
+    for s, offset in zip(sources, offsets):
+        df = s.navdf.copy()
+        df["twtt_wind"] = get_wind(s) - offset*dt
+        navdf.append(df)
+    rdata.navdf = pd.concat(navdf, ignore_index=True)
+    if {"x", "y", "z"}.issubset(rdata.navdf.keys()) and not rdata.navdf[["x", "y", "z"]].isna().any(axis=None):
+        rdata.navdf["dist"] = navparse.euclid_dist(rdata.navdf["x"].to_numpy(), rdata.navdf["y"].to_numpy(), rdata.navdf["z"].to_numpy())
+    else:
+        # continue each file's along track distance from the end of the previous file
+        dist = [s.navdf["dist"].to_numpy(dtype=float) for s in sources]
+        shift = np.r_[0, np.cumsum([np.nan_to_num(d[-1] - d[0]) for d in dist[:-1]])]
+        rdata.navdf["dist"] = np.concatenate([d - d[0] + sh for d, sh in zip(dist, shift)])
+    asep = [np.broadcast_to(s.asep, (s.tnum,)) for s in sources]
+    rdata.asep = np.concatenate(asep) if any(np.ndim(s.asep) for s in sources) else sources[0].asep
+    rdata.set_srfElev(dat=np.concatenate([np.broadcast_to(np.nan if s.srfElev is None else s.srfElev, (s.tnum,)) for s in sources]))
+
+    # stitch source picks
+    for i, s in enumerate(sources):
+        for h, samples in s.pick.horizons.items():
+            if h not in rdata.pick.horizons:
+                rdata.pick.horizons[h] = np.repeat(np.nan, rdata.tnum)
+            rdata.pick.horizons[h][rdata.dat.bounds[i]:rdata.dat.bounds[i + 1]] = samples*rdata.sources[i]["scale"] + rdata.sources[i]["offset"]
+    for h in list(rdata.pick.horizons):
+        rdata.pick.set_horizon(h, rdata.pick.horizons[h])
+    srfs = {s.pick.get_srf() for s in sources}
+    if len(srfs) == 1:
+        rdata.pick.set_srf(srfs.pop())
+
+    # source processed and display arrays are no longer needed - only raw data, nav and picks are kept per source
+    for s in sources:
+        s.proc = proc(s.dBscale)
+        s.dPyramid = s.sim = s.sPyramid = s.sim_hist = None
+        s.clear_chans()
+
+    rdata.check_attrs()
+    print("Mosaicked: " + ", ".join(s.fn for s in sources))
+
+    return rdata
+
+
+# split_picks is a function to write mosaic picks back to each source garlic object, on the source sample axis
+# returns list of source garlic objects
+def split_picks(rdata):
+    if not rdata.sources:
+        raise raguError("{} is not a mosaic.".format(rdata.fn))
+    # trace reordering steps (reverse, restack) replace the stitched array, so traces no longer map to source files
+    if not isinstance(rdata.dat, concat) or rdata.tnum != rdata.dat.bounds[-1]:
+        raise raguError("Unable to split picks to source files after reversing or restacking a mosaic.")
+    out = []
+    sampzero = np.broadcast_to(rdata.flags.sampzero, (rdata.tnum,))
+    for i, src in enumerate(rdata.sources):
+        s = src["rdata"]
+        t0, t1 = rdata.dat.bounds[i], rdata.dat.bounds[i + 1]
+        for h in list(s.pick.horizons):
+            if h not in rdata.pick.horizons:
+                s.pick.rm_horizon(h)
+        for h, samples in rdata.pick.horizons.items():
+            s.pick.set_horizon(h, np.rint((samples[t0:t1] + sampzero[t0:t1] - src["offset"]) / src["scale"]))
+        s.pick.set_srf(rdata.pick.get_srf())
+        if s.pick.get_srf() is not None:
+            try:
+                s.set_srfElev()
+            except Exception:
+                s.set_srfElev(dat=rdata.srfElev[t0:t1])
+        out.append(s)
+    return out
@@ -18,12 +18,153 @@ class pick(object):
         # of type np.ndarray(tnum,), representing the
         # pick in sample number for each trace
         self.horizons = {}
+        #: dict segids, segment id of each pick for each horizon
+        # each key of type np.ndarray(tnum,), -1 where trace is unpicked
+        self.segids = {}
+        #: dict segs, segment trace bounds for each horizon
+        # each horizon is itself a dictionary with segment number keys
+        # holding [first, last] picked trace, or None for an empty segment
+        self.segs = {}
         #: str srf, surface horizon name
         self.srf = None
+        #: int edit, pick edit counter - incremented by each change to any horizon
+        self.edit = 0
+        #: dict versions, edit counter value of the last change to each horizon
+        self.versions = {}
+        #: dict saved, horizon versions when picks were last loaded or exported
+        self.saved = {}
 
         return
 
 
+    # touch records a change to a horizon
+    def touch(self, horizon):
+        self.edit += 1
+        self.versions[horizon] = self.edit
+
+
+    # init_horizon initializes an empty horizon
+    def init_horizon(self, horizon, tnum):
+        self.horizons[horizon] = np.repeat(np.nan, tnum)
+        self.segids[horizon] = np.full(tnum, -1, dtype=np.int32)
+        self.segs[horizon] = {}
+        self.touch(horizon)
+
+
+    # set_horizon sets a horizon from a pick sample array, splitting contiguous picks into segments
+    def set_horizon(self, horizon, samples):
+        samples = np.asarray(samples, dtype=float)
+        self.horizons[horizon] = samples
+        self.segids[horizon] = np.full(samples.shape[0], -1, dtype=np.int32)
+        self.segs[horizon] = {}
+        for seg, s in enumerate(np.ma.clump_unmasked(np.ma.masked_invalid(samples))):
+            self.segids[horizon][s] = seg
+            self.segs[horizon][seg] = [int(s.start), int(s.stop - 1)]
+        self.touch(horizon)
+
+
+    # rm_horizon removes a horizon
+    def rm_horizon(self, horizon):
+        for d in [self.horizons, self.segids, self.segs, self.versions]:
+            d.pop(horizon, None)
+        self.edit += 1
+        if horizon == self.srf:
+            self.set_srf(None)
+
+
+    # rename_horizon renames a horizon, maintaining horizon order
+    def rename_horizon(self, horizon, name):
+        self.horizons = {name if k==horizon else k:v for k,v in self.horizons.items()}
+        self.segids = {name if k==horizon else k:v for k,v in self.segids.items()}
+        self.segs = {name if k==horizon else k:v for k,v in self.segs.items()}
+        self.versions.pop(horizon, None)
+        self.touch(name)
+        if horizon == self.srf:
+            self.set_srf(name)
+
+
+    # add_segment adds an empty segment to the end of a horizon and returns the segment number
+    def add_segment(self, horizon):
+        seg = len(self.segs[horizon])
+        self.segs[horizon][seg] = None
+        self.touch(horizon)
+        return seg
+
+
+    # get_segment returns the picked traces and samples of a horizon segment
+    def get_segment(self, horizon, seg):
+        bounds = self.segs[horizon].get(seg)
+        if bounds is None:
+            return np.array((), dtype=int), np.array(())
+        traces = np.arange(bounds[0], bounds[1] + 1)
+        traces = traces[self.segids[horizon][bounds[0]:bounds[1] + 1] == seg]
+        return traces, self.horizons[horizon][traces]
+
+
+    # set_segment sets picks for a horizon segment - traces picked by other segments are left alone
+    def set_segment(self, horizon, seg, traces, samples):
+        traces = np.asarray(traces, dtype=int)
+        samples = np.asarray(samples, dtype=float)
+        ids = self.segids[horizon]
+        mask = ((ids[traces] == -1) | (ids[traces] == seg)) & ~np.isnan(samples)
+        traces = traces[mask]
+        if traces.size == 0:
+            return
+        ids[traces] = seg
+        self.horizons[horizon][traces] = samples[mask]
+        # update segment bounds
+        first, last = int(traces.min()), int(traces.max())
+        bounds = self.segs[horizon].get(seg)
+        if bounds is not None:
+            first, last = min(first, bounds[0]), max(last, bounds[1])
+        self.segs[horizon][seg] = [first, last]
+        self.touch(horizon)
+
+
+    # clear_segment removes all picks from a horizon segment, leaving the segment empty
+    def clear_segment(self, horizon, seg):
+        traces, _ = self.get_segment(horizon, seg)
+        self.segids[horizon][traces] = -1
+        self.horizons[horizon][traces] = np.nan
+        if seg in self.segs[horizon]:
+            self.segs[horizon][seg] = None
+        if traces.size > 0:
+            self.touch(horizon)
+
+
+    # get_segments returns compact segment objects for each segment of a horizon
+    def get_segments(self, horizon):
+        out = {}
+        for seg in self.segs[horizon]:
+            traces, _ = self.get_segment(horizon, seg)
+            if traces.size == 0:
+                out[seg] = segment()
+                continue
+            start, end = traces[0], traces[-1] + 1
+            samples = np.repeat(np.nan, end - start)
+            samples[traces - start] = self.horizons[horizon][traces]
+            out[seg] = segment(start, end, samples)
+        return out
+
+
+    # set_segments sets picks for each segment of a horizon from compact segment objects
+    def set_segments(self, horizon, segments):
+        for seg, sgmt in segments.items():
+            self.clear_segment(horizon, seg)
+            self.set_segment(horizon, seg, sgmt.get_traces(), sgmt.samples)
+
+
+    # rm_segment removes a horizon segment and renumbers subsequent segments
+    def rm_segment(self, horizon, seg):
+        if seg not in self.segs[horizon]:
+            return
+        self.clear_segment(horizon, seg)
+        ids = self.segids[horizon]
+        ids[ids > seg] -= 1
+        self.segs[horizon] = {(k - 1 if k > seg else k):v for k,v in self.segs[horizon].items() if k != seg}
+        self.touch(horizon)
+
+
     # set_srf defines the surface horizon name
     def set_srf(self, srf=None):
         self.srf = srf
@@ -36,12 +177,121 @@ class pick(object):
 
     # get_pick_flag returns true if interpretations exist, false otherwise
     def get_pick_flag(self):
-        flag = False
-        for key, item in self.horizons.items():
-            if np.isnan(item).all():
-                continue
-            else:
-                flag = True
+        for horizon, segs in self.segs.items():
+            if any(bounds is not None for bounds in segs.values()):
+                return True
+
+        return False
+
+
+    # get_version returns the edit counter value of the last change to a horizon, or to any horizon if none specified
+    def get_version(self, horizon=None):
+        if horizon is None:
+            return self.edit
+        return self.versions.get(horizon)
+
+
+    # mark_saved records current horizon versions as saved
+    def mark_saved(self):
+        self.saved = dict(self.versions)
+
+
+    # get_dirty returns true if any horizon has changed since picks were last saved
+    def get_dirty(self):
+        return self.versions != self.saved
+
+
+    # get_order returns horizon names sorted from shallowest to deepest, with the surface horizon first
+    def get_order(self):
+        keys = [k for k in self.horizons if k != self.srf]
+        stat = {}
+        # sort on the trace at which all horizons are picked, if one exists, otherwise on mean pick sample
+        common = None
+        for k in keys:
+            bounds = [b for b in self.segs[k].values() if b is not None]
+            if not bounds:
+                common = None
                 break
+            lo, hi = min(b[0] for b in bounds), max(b[1] for b in bounds)
+            common = (lo, hi) if common is None else (max(common[0], lo), min(common[1], hi))
+        if common is not None and common[0] <= common[1]:
+            picked = np.logical_and.reduce([self.segids[k][common[0]:common[1] + 1] != -1 for k in keys])
+            if picked.any():
+                idx = common[0] + int(np.argmax(picked))
+                stat = {k: self.horizons[k][idx] for k in keys}
+        if not stat:
+            for k in keys:
+                traces = self.segids[k] != -1
+                stat[k] = self.horizons[k][traces].mean() if traces.any() else np.inf
+        keys = sorted(keys, key=lambda k: stat[k])
+
+        return ([self.srf] if self.srf in self.horizons else []) + keys
+
+
+    # sort_horizons reorders horizons from shallowest to deepest, with the surface horizon first
+    def sort_horizons(self):
+        order = self.get_order()
+        for d in ["horizons", "segids", "segs"]:
+            setattr(self, d, {k: getattr(self, d)[k] for k in order})
+
+
+class segment(object):
+    """
+    segment class holds a compact horizon segment - pick samples for traces start through end - 1
+    """
+    __slots__ = ("start", "end", "samples")
+
+    def __init__(self, start=0, end=0, samples=None):
+        #: int start, first trace in segment
+        self.start = int(start)
+        #: int end, one past last trace in segment
+        self.end = int(end)
+        #: np.ndarray(end - start,) samples, pick sample number for each trace in segment
+        self.samples = np.repeat(np.nan, self.end - self.start) if samples is None else np.asarray(samples, dtype=float)
+
+
+    def __len__(self):
+        return self.end - self.start
+
+
+    # copy returns a copy of the segment
+    def copy(self):
+        return segment(self.start, self.end, self.samples.copy())
+
+
+    # get_traces returns the trace numbers spanned by the segment
+    def get_traces(self):
+        return np.arange(self.start, self.end)
+
+
+    # get returns pick samples for traces, nan for traces outside the segment
+    def get(self, traces):
+        traces = np.asarray(traces)
+        out = np.full(traces.shape, np.nan)
+        mask = (traces >= self.start) & (traces < self.end)
+        out[mask] = self.samples[traces[mask] - self.start]
+        return out if out.ndim else out.item()
+
+
+    # set sets pick samples for traces within the segment
+    def set(self, traces, samples):
+        traces = np.asarray(traces)
+        samples = np.broadcast_to(samples, traces.shape)
+        mask = (traces >= self.start) & (traces < self.end)
+        self.samples[traces[mask] - self.start] = samples[mask]
+
+
+    # to_dense returns the segment as a full length (tnum,) pick array
+    def to_dense(self, tnum):
+        out = np.repeat(np.nan, tnum)
+        out[self.start:self.end] = self.samples
+        return out
+
 
-        return flag
\ No newline at end of file
+    # from_dense returns a segment holding the picked traces of a full length (tnum,) pick array
+    @classmethod
+    def from_dense(cls, samples):
+        traces = np.where(~np.isnan(samples))[0]
+        if traces.size == 0:
+            return cls()
+        return cls(traces[0], traces[-1] + 1, samples[traces[0]:traces[-1] + 1].copy())
@@ -7,38 +7,45 @@
 RAGU radar data processing class and tools
 """
 ### imports ###
-from ragu.tools import utils
+from ragu.tools import utils, surface, perf, lazy
+from ragu.radar import stream
 from ragu.nav import navparse
-import pyproj
 import numpy as np
 import pandas as pd
-import numpy.matlib as matlib
-import matplotlib.pyplot as plt
-import scipy.interpolate as interp
-import scipy.signal as signal
+import ast
+
+pyproj = lazy.load("pyproj")
+signal = lazy.load("scipy.signal")
 
 class proc(object):
-    def __init__(self):
+    def __init__(self, dBscale=None):
         #: np.ndarray(snum x tnum), previously processed radar data (amp)
         self.prev_amp = None
-        #: np.ndarray(snum x tnum), previously processed radar data (dB)
-        self.prev_dB = None
         #: np.ndarray(snum x tnum), current processed radar data (amp)
         self.curr_amp = None
         #: np.ndarray(snum x tnum), current processed radar data (dB)
         self.curr_dB = None
-
-    def set_prev_amp(self, amp):
+        #: function dBscale, converts amp to dB - previously processed dB data is recomputed from prev_amp on demand rather than stored
+        self.dBscale = dBscale
+        #: tuple (counts, bin edges), histogram of a subsample of current dB data, for colour limits
+        self.curr_hist = None
+        #: tuple (counts, bin edges), histogram of previous dB data, kept so that undo and redo reuse it
+        self.prev_hist = None
+
+    def set_prev_amp(self, amp, hist=None):
+        # carry the current histogram over when the current data becomes the previous data
+        if hist is None and amp is self.curr_amp:
+            hist = self.curr_hist
         self.prev_amp = amp
+        self.prev_hist = hist
 
     def get_prev_amp(self):
         return self.prev_amp
 
-    def set_prev_dB(self, dB):
-        self.prev_dB = dB
-
     def get_prev_dB(self):
-        return self.prev_dB
+        if self.prev_amp is None or self.dBscale is None:
+            return None
+        return self.dBscale(self.prev_amp)
 
     def set_curr_amp(self, amp):
         self.curr_amp = amp
@@ -52,7 +59,17 @@ class proc(object):
     def get_curr_dB(self):
         return self.curr_dB
 
+    def set_curr_hist(self, hist):
+        self.curr_hist = hist
+
+    def get_curr_hist(self):
+        return self.curr_hist
 
+    def get_prev_hist(self):
+        return self.prev_hist
+
+
+@perf.timed()
 def set_tzero(self):
     # get mean trace and find max sample and update sampzero flag
     if self.info["Signal Type"] == "Chirp":
@@ -72,11 +89,11 @@ def set_tzero(self):
     return
 
 
+@perf.timed()
 def tzero_shift(self):
     # shift 2d proc data array so first row is time zero sample - use nan to fill bottom samples
     amp = self.proc.get_curr_amp()
     self.proc.set_prev_amp(amp)
-    self.proc.set_prev_dB(self.proc.get_curr_dB())
     out = np.zeros_like(amp)
     out[:-self.flags.sampzero,:] = amp[self.flags.sampzero:,:]
     out[-self.flags.sampzero:,:] = np.nan
@@ -85,12 +102,16 @@ def tzero_shift(self):
     return
 
 
+@perf.timed()
 def reverse(self):
     # reverse left-right order of radargram
     self.set_dat(self.get_dat()[:,::-1])
     self.set_proc(self.get_dat())
 
-    # need to flip all relevant arrays - nav, picks, clutter
+    # need to flip all relevant arrays - nav, picks, clutter, and all channels of multi-channel data
+    if self.chans is not None:
+        self.chans = self.chans[:,:,::-1]
+        self.clear_chans()
     if self.flags.sim:
         self.set_sim(utils.powdB2amp(self.sim)[:,::-1])
 
@@ -100,7 +121,7 @@ def reverse(self):
 
     # reverse picks
     for h in self.pick.horizons.keys():
-        self.pick.horizons[h] = np.flip(self.pick.horizons[h])
+        self.pick.set_horizon(h, np.flip(self.pick.horizons[h]))
 
     # log
     self.log("rdata.rgram_reverse()")
@@ -108,11 +129,11 @@ def reverse(self):
 
     return
 
+@perf.timed()
 def flatten(self):
     # flatten radargram by rolling each trace so that the surface is at sample zero
     amp = self.proc.get_curr_amp()
     self.proc.set_prev_amp(amp)
-    self.proc.set_prev_dB(self.proc.get_curr_dB())
     # initialize output array
     out = np.zeros_like(amp.T)
     # get surf samples in integer form for rolling
@@ -131,11 +152,11 @@ def flatten(self):
     return
 
 
+@perf.timed()
 def vertical_roll(self, samples=0):
     # roll 2d proc data array vertically to fix mismatch
     amp = self.proc.get_curr_amp()
     self.proc.set_prev_amp(amp)
-    self.proc.set_prev_dB(self.proc.get_curr_dB())
     out = np.roll(amp, shift=samples, axis=0)
     self.set_proc(out)
 
@@ -146,40 +167,14 @@ def vertical_roll(self, samples=0):
     return
 
 
+@perf.timed()
 def removeSlidingMeanFFT(self, window):
     # background noise removal using sliding mean in frequency space
     amp = self.proc.get_curr_amp()
     self.proc.set_prev_amp(amp)
-    self.proc.set_prev_dB(self.proc.get_curr_dB())
-
-    # window in interval to avg over for mean removal
-    mean = np.zeros(amp.shape)
-    a = np.zeros(amp.shape[1])
-    a[0 : window // 2] = 1
-    a[amp.shape[1] - window // 2 : amp.shape[1]] = 1
-    A = np.fft.fft(a)
 
-    # Main circular convolution
-    for i in range(amp.shape[0]):
-        T = np.fft.fft(amp[i, :])
-        mean[i, :] = np.real(np.fft.ifft(np.multiply(T, A)) / window)
-
-    # Handle edges
-    mt = np.zeros(amp.shape[0])
-    for i in range(0, window):
-        mt = np.add(mt, np.divide(amp[:, i], window))
-
-    for i in range(0, window // 2):
-        mean[:, i] = mt
-
-    mt = np.zeros(amp.shape[0])
-    for i in range(amp.shape[1] - window, amp.shape[1]):
-        mt = np.add(mt, np.divide(amp[:, i], window))
-
-    for i in range(amp.shape[1] - window // 2, amp.shape[1]):
-        mean[:, i] = mt
-
-    out = np.subtract(amp, mean)
+    # sliding mean over window traces - cumulative sum equivalent of circular convolution in frequency space
+    out = stream.remove_sliding_mean(amp, window, dtype=self.fdtype)
     self.set_proc(out)
     # log
     self.log("rdata.removeSlidingMeanFFT(window={})".format(window))
@@ -206,12 +201,11 @@ def butter(btype="lowpass", lowcut=None, highcut=None, fs=None, order=5):
     return b, a
 
 
+@perf.timed()
 def hilbertxform(self):
     amp = self.proc.get_curr_amp()
     self.proc.set_prev_amp(amp)
-    self.proc.set_prev_dB(self.proc.get_curr_dB())
-    analytic_signal = signal.hilbert(amp, axis=0)
-    amplitude_envelope = np.abs(analytic_signal)
+    amplitude_envelope = stream.envelope(amp, dtype=self.fdtype)
     self.set_proc(amplitude_envelope)
     # log
     self.log("rdata.hilbertxform()")
@@ -220,25 +214,28 @@ def hilbertxform(self):
     return 
 
 
+@perf.timed()
 def filter(self, btype="lowpass", lowcut=None, highcut=None, order=5, direction=0):
     # apply low pass filter to data array
     amp = self.proc.get_curr_amp()
     self.proc.set_prev_amp(amp)
-    # use abs value of amp
-    amp = np.abs(amp)
-    self.proc.set_prev_dB(self.proc.get_curr_dB())
     if direction == 0:
         fs=1/self.dt
     elif direction == 1:
         fs=self.prf
     b, a = butter(btype=btype, lowcut=lowcut, highcut=highcut, fs=fs, order=order)
-    # avoid scipy filter nan issues by windowing out any time zero shift
-    out = np.zeros_like(amp)
-    # get indices of any nans and temporarily replace
-    idx = np.where(np.isnan(amp))
-    amp[idx] = -9999
-    out = signal.filtfilt(b, a, amp, axis=direction)
-    out[idx] = np.nan
+    if direction == 0:
+        # fast-time filtering is trace-local, so stream over blocks of traces
+        out = stream.fast_time_filter(amp, b, a, dtype=self.fdtype)
+    else:
+        # use abs value of amp
+        amp = np.abs(amp)
+        # avoid scipy filter nan issues by windowing out any time zero shift
+        # get indices of any nans and temporarily replace
+        idx = np.where(np.isnan(amp))
+        amp[idx] = -9999
+        out = signal.filtfilt(b, a, amp, axis=direction).astype(self.fdtype, copy=False)
+        out[idx] = np.nan
     # out[:-self.flags.sampzero,:] = signal.filtfilt(b, a, np.abs(amp[:-self.flags.sampzero:,:]), axis=direction)
     # out[-self.flags.sampzero:,:] = np.nan
     # use amplitude of lp filtered data to reset as pc array
@@ -250,6 +247,7 @@ def filter(self, btype="lowpass", lowcut=None, highcut=None, order=5, direction=
     return
 
 
+@perf.timed()
 def restack(self, intrvl=None,thold=None):
     # get coordinate transformation
     xform = pyproj.Transformer.from_crs(self.geocrs, self.xyzcrs)
@@ -275,49 +273,32 @@ def restack(self, intrvl=None,thold=None):
         # get surface elev
         navdf['srfelev'] = self.srfElev[drift_mask]
 
-    totdist = navdf.dist.iloc[-1]  # Total distance
-    ntrace = int(totdist//intrvl)
-
-    rstack = np.zeros((self.snum, ntrace))
-    lat = np.zeros(ntrace)
-    lon = np.zeros(ntrace)
-    hgt = np.zeros(ntrace)
-    srf = np.repeat(np.nan,ntrace)
-    asep = np.repeat(np.nan,ntrace)
-    twtt_wind = np.repeat(np.nan,ntrace)
+    # get output trace for each input trace
+    bins, ntrace = stream.restack_bins(navdf["dist"].to_numpy(), intrvl)
+    rstack = stream.restack(amp, bins, ntrace, dtype=self.get_dtype(amp))
+    # restack raw amplitude of all channels of multi-channel data, so that channels may still be switched
+    if self.chans is not None:
+        chans = self.chans[:,:,drift_mask] if thold > 0 else self.chans
+        self.chans = np.stack([stream.restack(c, bins, ntrace, dtype=self.get_dtype(c)) for c in chans])
+        self.clear_chans()
 
     if "asep" not in navdf.keys():
         navdf["asep"] = self.asep
-        
-    for i in range(ntrace):
-        stack_slice = np.logical_and(navdf.dist > i*intrvl, navdf.dist < (i+1)*intrvl)
-        nstack = np.sum(stack_slice)
-        if(nstack == 0):
-            if i==0:
-                rstack[:, i] = amp[:, i]
-                lat[i] = navdf["lat"][i]
-                lon[i] = navdf["lon"][i]
-                hgt[i] = navdf["elev"][i]
-                srf[i] = navdf["srfelev"][i]
-                twtt_wind[i] = navdf["twtt_wind"][i]
-                asep[i] = navdf["asep"][i]
-            else:
-                rstack[:, i] = rstack[:, i-1]
-                lat[i] = lat[i-1]
-                lon[i] = lon[i-1]
-                hgt[i] = hgt[i-1]
-                srf[i] = srf[i-1]
-                twtt_wind[i] = twtt_wind[i-1]
-                asep[i] = asep[i-1]
-            continue
-
-        rstack[:, i] = np.sum(amp[:, stack_slice], axis=1)/nstack
-        lat[i] = np.mean(navdf["lat"][stack_slice])
-        lon[i] = np.mean(navdf["lon"][stack_slice])
-        hgt[i] = np.mean(navdf["elev"][stack_slice])
-        srf[i] = np.mean(navdf["srfelev"][stack_slice])
-        twtt_wind[i] = np.mean(navdf["twtt_wind"][stack_slice])
-        asep[i] = np.mean(navdf["asep"][stack_slice])
+    if "srfelev" not in navdf.keys():
+        navdf["srfelev"] = self.srfElev
+
+    # average nav within each bin, repeating the previous bin for empty bins
+    valid = bins >= 0
+    counts = np.bincount(bins[valid], minlength=ntrace)
+    stacked = np.where(counts > 0)[0]
+    idx = stream.fill_bins(stacked, ntrace)
+    stacked_nav = {}
+    for key in ["lat", "lon", "elev", "srfelev", "twtt_wind", "asep"]:
+        val = np.asarray(navdf[key], dtype=float)
+        mean = np.bincount(bins[valid], weights=val[valid], minlength=ntrace)[stacked] / counts[stacked]
+        stacked_nav[key] = np.where(idx >= 0, mean[np.maximum(idx, 0)], val[0])
+    lat, lon, hgt = stacked_nav["lat"], stacked_nav["lon"], stacked_nav["elev"]
+    srf, twtt_wind, asep = stacked_nav["srfelev"], stacked_nav["twtt_wind"], stacked_nav["asep"]
 
     # store updated nav data
     self.navdf = pd.DataFrame()
@@ -341,15 +322,12 @@ def restack(self, intrvl=None,thold=None):
     
     return
 
+@perf.timed()
 def tpowGain(self, power):
     # t-power gain to each trace with the given exponent.
     amp = self.proc.get_curr_amp()
     self.proc.set_prev_amp(amp)
-    self.proc.set_prev_dB(self.proc.get_curr_dB())
-    twtt = np.arange(self.snum)*self.dt
-    factor = np.reshape(twtt**(float(power)),(len(twtt),1))
-    factmat = np.matlib.repmat(factor,1,self.tnum)
-    out = np.multiply(amp,factmat)
+    out = stream.tpow_gain(amp, self.dt, power, dtype=self.fdtype)
     self.set_proc(out)
     # log
     self.log("rdata.tpowGain(power={})".format(power))
@@ -358,12 +336,63 @@ def tpowGain(self, power):
     return
 
 
+@perf.timed()
+def dem_srf(self, fpath):
+    # predict surface sample for each trace by sampling a dem along the track
+    # dem elevations are referenced to the same datum as navdf["elev"]
+    gndElev = navparse.sample_raster(fpath, self.navdf["lon"].to_numpy(), self.navdf["lat"].to_numpy(), self.geocrs)
+    # range from radar platform to ground, in air
+    twtt = utils.depth2twtt(self.navdf["elev"].to_numpy() - gndElev, np.nanmean(self.asep), eps_r=1)
+    # account for twtt window to sample 0, as well as any time zero shift or truncation
+    return utils.twtt2sample(twtt - self.navdf["twtt_wind"].to_numpy(), self.dt) - self.flags.sampzero - self.truncs
+
+
+@perf.timed()
+def srf_autopick(self, method=None, horizon="srf", skip=0, maxjump=None, center=None, halfwidth=None, dem=None, **kwargs):
+    # auto-pick surface horizon - if no detection method is specified, use the default for the signal type
+    # method options are those in tools.surface.criteria
+    # if maxjump is specified, the surface is tracked with at most maxjump samples between adjacent traces,
+    # searching only within halfwidth samples of the center horizon (e.g. a nav predicted surface), 
+    # or of the surface predicted from a dem geotiff file if specified
+    if (center is not None) or (dem is not None):
+        if maxjump is None:
+            maxjump = max(1, self.snum // 100)
+        if halfwidth is None:
+            halfwidth = 4*maxjump
+        pred = self.dem_srf(dem) if dem is not None else self.pick.horizons[center]
+        samples = surface.track(np.abs(self.dat), method or "max", maxjump, pred, halfwidth, skip, **kwargs)
+    elif maxjump is not None:
+        samples = surface.track(np.abs(self.dat), method or "max", maxjump, skip=skip, **kwargs)
+    elif method is None:
+        samples = utils.get_srf(np.abs(self.dat), self.info["Signal Type"])
+    else:
+        samples = surface.detect(np.abs(self.dat), method, skip, **kwargs)
+    self.pick.set_horizon(horizon, samples)
+    self.pick.set_srf(horizon)
+    self.set_srfElev()
+    # log
+    args = "".join(", {}={}".format(k, v) for k, v in kwargs.items())
+    self.log("rdata.srf_autopick(method={!r}, horizon={!r}, skip={}, maxjump={}, center={!r}, halfwidth={}, dem={!r}{})".format(method, horizon, skip, maxjump, center, halfwidth, dem, args))
+    print("# surface horizon {} auto-picked".format(horizon))
+
+    return
+
+
+@perf.timed()
 def undo(self):
     # undo last processing step
     if len(self.hist) > 2:
-        tmp = self.proc.get_curr_amp()
-        self.set_proc(self.proc.get_prev_amp())
-        self.proc.set_prev_amp(tmp)
+        if self.hist[-1].startswith("rdata.set_chan("):
+            # undo a channel switch by switching back to the previously logged channel - channels start on channel 0
+            chans = [get_chan_arg(h) for h in self.hist[2:-1] if h.startswith("rdata.set_chan(")]
+            self.set_chan(chans[-1] if chans else 0, log=False)
+        elif self.proc.get_prev_amp() is None:
+            print("# no previous processing step held for the active channel")
+            return
+        else:
+            tmp, tmp_hist = self.proc.get_curr_amp(), self.proc.get_curr_hist()
+            self.set_proc(self.proc.get_prev_amp(), hist=self.proc.get_prev_hist())
+            self.proc.set_prev_amp(tmp, hist=tmp_hist)
         # clear last log entry
         self.last = self.hist[-1]
         del self.hist[-1]
@@ -372,15 +401,30 @@ def undo(self):
     return
 
 
+@perf.timed()
 def redo(self):
-    tmp = self.proc.get_curr_amp()
-    self.set_proc(self.proc.get_prev_amp())
-    self.proc.set_prev_amp(tmp)
+    if getattr(self, "last", None) and self.last.startswith("rdata.set_chan("):
+        # redo a channel switch - set_chan logs it again
+        self.set_chan(get_chan_arg(self.last))
+        self.last = None
+        return
+    if self.proc.get_prev_amp() is None:
+        print("# no processing step to redo")
+        return
+    tmp, tmp_hist = self.proc.get_curr_amp(), self.proc.get_curr_hist()
+    self.set_proc(self.proc.get_prev_amp(), hist=self.proc.get_prev_hist())
+    self.proc.set_prev_amp(tmp, hist=tmp_hist)
     self.log(self.last)
 
     return
 
 
+# get_chan_arg is a function to get the channel from a logged rdata.set_chan() call
+def get_chan_arg(cmd):
+    return ast.literal_eval(cmd[len("rdata.set_chan("):-1])
+
+
+@perf.timed()
 def reset(self):
     # reset processed data to original
     if self.dtype == "oibak":
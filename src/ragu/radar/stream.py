@@ -0,0 +1,199 @@
+# RAGU - Radar Analysis Graphical Utility
+#
+# copyright © 2020 btobers <tobers.brandon@gmail.com>
+#
+# distributed under terms of the GNU GPL3.0 license
+"""
+stream module contains chunked radargram processing functions which stream over blocks of traces,
+so that radargrams larger than memory may be processed from a memmap or hdf5 source to a chunked output store.
+trace-neighbourhood operations read each block with a halo of neighbouring traces.
+the in-memory processing functions use the same kernels, so results match either way
+"""
+### imports ###
+from ragu.tools import lazy
+import numpy as np
+
+signal = lazy.load("scipy.signal")
+h5py = lazy.load("h5py")
+
+# default number of traces per block
+chunk_size = 4096
+
+
+# open_source is a function to open a radargram array without reading it into memory
+# .npy files are memory mapped, hdf5 files require the dataset path
+def open_source(fpath, dset=None):
+    if fpath.endswith(".npy"):
+        return np.load(fpath, mmap_mode="r")
+    elif fpath.endswith(".h5"):
+        if dset is None:
+            raise ValueError("stream.open_source error: dataset path required for hdf5 source " + fpath)
+        return h5py.File(fpath, "r")[dset]
+    raise ValueError("stream.open_source error: unsupported source " + fpath)
+
+
+# create_store is a function to create a chunked output array on disk
+# .npy files are memory mapped, hdf5 stores are chunked by blocks of traces
+def create_store(fpath, shape, dtype=np.float32, dset="dat", chunk=chunk_size):
+    if fpath.endswith(".npy"):
+        return np.lib.format.open_memmap(fpath, mode="w+", dtype=dtype, shape=shape)
+    elif fpath.endswith(".h5"):
+        f = h5py.File(fpath, "a")
+        if dset in f:
+            del f[dset]
+        return f.create_dataset(dset, shape=shape, dtype=dtype, chunks=(shape[0], min(chunk, shape[1])))
+    raise ValueError("stream.create_store error: unsupported store " + fpath)
+
+
+# blocks is a generator function to return trace slices of size chunk
+def blocks(tnum, chunk=chunk_size):
+    for _i in range(0, tnum, chunk):
+        yield slice(_i, min(_i + chunk, tnum))
+
+
+# run is a function to apply func over blocks of traces from src, writing to dst
+# func receives the block (including halo traces) and the trace number of its first column,
+# and returns an array the same shape as the block
+def run(src, func, dst=None, chunk=chunk_size, halo=(0, 0), dtype=np.float32):
+    snum, tnum = src.shape[:2]
+    if dst is None:
+        dst = np.empty((snum, tnum), dtype=dtype)
+    for s in blocks(tnum, chunk):
+        lo, hi = max(0, s.start - halo[0]), min(tnum, s.stop + halo[1])
+        out = func(np.asarray(src[:, lo:hi]), lo)
+        dst[:, s] = out[:, s.start - lo:s.stop - lo]
+    return dst
+
+
+### trace-local kernels ###
+
+# tpow_gain applies t-power gain to each trace with the given exponent
+def tpow_gain(src, dt, power, dst=None, chunk=chunk_size, dtype=np.float32):
+    factor = ((np.arange(src.shape[0])*dt)**float(power)).astype(dtype)[:,None]
+    return run(src, lambda blk, lo: blk*factor, dst, chunk, dtype=dtype)
+
+
+# envelope returns the hilbert transform amplitude envelope of each trace
+def envelope(src, dst=None, chunk=chunk_size, dtype=np.float32):
+    return run(src, lambda blk, lo: np.abs(signal.hilbert(blk, axis=0)), dst, chunk, dtype=dtype)
+
+
+# fast_time_filter applies a zero-phase filter with coefficients b, a along each trace - nan samples are windowed out
+def fast_time_filter(src, b, a, dst=None, chunk=chunk_size, dtype=np.float32):
+    def func(blk, lo):
+        blk = np.abs(blk)
+        idx = np.isnan(blk)
+        blk[idx] = -9999
+        out = signal.filtfilt(b, a, blk, axis=0)
+        out[idx] = np.nan
+        return out
+    return run(src, func, dst, chunk, dtype=dtype)
+
+
+# dBscale converts amplitude to power in decibels, masking zero-power samples
+def dBscale(src, dst=None, chunk=chunk_size, dtype=np.float32):
+    def func(blk, lo):
+        pow = np.power(blk.astype(dtype), 2)
+        pow[pow == 0] = np.nan
+        return 10*np.log10(pow)
+    return run(src, func, dst, chunk, dtype=dtype)
+
+
+### trace-neighbourhood kernels ###
+
+# sliding_mean returns the along-track sliding mean over window traces, equivalent to the circular fft convolution
+# previously used for background removal: mean of traces i - (window//2 - 1) through i + window//2 divided by window,
+# with the first and last window//2 traces set to the mean of the first and last window traces
+# blocks are read with a halo of window//2 traces on either side
+def sliding_mean(src, window, dst=None, chunk=chunk_size, dtype=np.float32):
+    tnum = src.shape[1]
+    half = window // 2
+    head = np.sum(np.asarray(src[:, :window]), axis=1, dtype=np.float64) / window
+    tail = np.sum(np.asarray(src[:, tnum - window:]), axis=1, dtype=np.float64) / window
+    def func(blk, lo):
+        cs = np.zeros((blk.shape[0], blk.shape[1] + 1))
+        np.cumsum(blk, axis=1, dtype=np.float64, out=cs[:,1:])
+        # global trace numbers of block columns
+        t = lo + np.arange(blk.shape[1])
+        i0 = np.clip(t - (half - 1) - lo, 0, blk.shape[1])
+        i1 = np.clip(t + half + 1 - lo, 0, blk.shape[1])
+        out = (cs[:, i1] - cs[:, i0]) / window
+        out[:, t < half] = head[:,None]
+        out[:, t >= tnum - half] = tail[:,None]
+        return out
+    return run(src, func, dst, chunk, halo=(half, half), dtype=dtype)
+
+
+# remove_sliding_mean subtracts the along-track sliding mean from src
+def remove_sliding_mean(src, window, dst=None, chunk=chunk_size, dtype=np.float32):
+    dst = sliding_mean(src, window, dst, chunk, dtype)
+    for s in blocks(src.shape[1], chunk):
+        dst[:, s] = np.asarray(src[:, s]) - np.asarray(dst[:, s])
+    return dst
+
+
+# restack_bins returns the output trace number of each input trace for restacking at an along-track distance interval,
+# -1 for traces falling exactly on a bin edge, along with the number of output traces
+def restack_bins(dist, intrvl):
+    dist = np.asarray(dist, dtype=float)
+    ntrace = int(dist[-1]//intrvl)
+    bins = np.floor(dist / intrvl).astype(int)
+    bins[(dist == bins*intrvl) | (bins >= ntrace)] = -1
+    return bins, ntrace
+
+
+# fill_bins returns the index into an array of stacked bins for each output trace,
+# repeating the previous stacked bin for empty bins - -1 where no previous bin exists
+def fill_bins(stacked, ntrace):
+    return np.searchsorted(stacked, np.arange(ntrace), side="right") - 1
+
+
+# restack averages traces within each along-track distance bin, repeating the previous trace for empty bins
+# bins are ordered along track, so a bin spanning a block boundary is carried into the next block rather than read with a halo
+def restack(src, bins, ntrace, dst=None, chunk=chunk_size, dtype=np.float32):
+    snum, tnum = src.shape[:2]
+    if dst is None:
+        dst = np.empty((snum, ntrace), dtype=dtype)
+    # previous stacked trace - first input trace if the first bin is empty
+    prev = np.asarray(src[:, 0], dtype=np.float64)
+    # next output trace to write
+    nxt = 0
+    carry = None
+    for s in blocks(tnum, chunk):
+        bb = bins[s]
+        valid = np.where(bb >= 0)[0]
+        if valid.size == 0:
+            continue
+        bv = bb[valid]
+        blk = np.asarray(src[:, s])[:, valid]
+        starts = np.r_[0, np.where(np.diff(bv))[0] + 1]
+        sums = np.add.reduceat(blk, starts, axis=1, dtype=np.float64)
+        counts = np.diff(np.r_[starts, bv.size])
+        ubins = bv[starts]
+        if carry is not None:
+            if carry[0] == ubins[0]:
+                sums[:,0] += carry[1]
+                counts[0] += carry[2]
+            else:
+                sums = np.hstack((carry[1][:,None], sums))
+                counts = np.r_[carry[2], counts]
+                ubins = np.r_[carry[0], ubins]
+        # last bin may continue into next block
+        carry = (ubins[-1], sums[:,-1], counts[-1])
+        if ubins.size > 1:
+            prev, nxt = write_bins(dst, sums[:,:-1] / counts[:-1], ubins[:-1], prev, nxt, ubins[-1])
+    if carry is not None:
+        prev, nxt = write_bins(dst, (carry[1] / carry[2])[:,None], np.r_[carry[0]], prev, nxt, ntrace)
+    elif nxt < ntrace:
+        dst[:, nxt:ntrace] = prev[:,None]
+    return dst
+
+
+# write_bins writes stacked bins to dst for output traces nxt up to end, filling empty bins with the previous stacked trace
+def write_bins(dst, means, ubins, prev, nxt, end):
+    if end <= nxt:
+        return prev, nxt
+    idx = fill_bins(ubins, end)[nxt:]
+    cols = np.hstack((prev[:,None], means))
+    dst[:, nxt:end] = cols[:, idx + 1]
+    return cols[:, -1], end
@@ -0,0 +1,501 @@
+# RAGU - Radar Analysis Graphical Utility
+#
+# copyright © 2020 btobers <tobers.brandon@gmail.com>
+#
+# distributed under terms of the GNU GPL3.0 license
+"""
+synth module generates synthetic radargrams of controlled size and structure - surface and bed reflectors, off-nadir clutter,
+noise and a nav track - as garlic objects or as data files in each supported ingest format.
+traces are generated deterministically in blocks, so files of hundreds of thousands of traces are written without holding the radargram in memory
+"""
+### imports ###
+from ragu.radar import garlic
+from ragu.nav import navparse
+from ragu.tools.constants import C
+from ragu.tools import lazy
+import os, struct
+import numpy as np
+import pandas as pd
+
+h5py = lazy.load("h5py")
+
+# default number of traces generated at once
+chunk_size = 4096
+# number of traces sharing a noise seed - noise does not depend on block size
+tile = 1024
+
+# planetary radius [m] and geographic crs for each body
+radii = {"earth": 6378137.0,
+         "mars": 3396190.0,
+         "moon": 1737400.0}
+navcrs = {"earth": "+proj=longlat +ellps=WGS84 +datum=WGS84 +no_defs",
+          "mars": "+proj=longlat +a=3396190 +b=3376200 +no_defs",
+          "moon": "+proj=longlat +a=1737400 +b=1737400 +no_defs"}
+
+
+class scene(object):
+    """
+    scene holds the parameters of a synthetic radargram and generates its traces, clutter simulation and nav in blocks.
+    reflector depths are fractions of snum, amplitudes are relative to unit noise
+    """
+    def __init__(self, snum=1000, tnum=10000, dt=2e-8, srf=0.2, bed=0.5, relief=0.05, srf_amp=50.0, bed_amp=10.0,
+                 clutter=5.0, noise=1.0, body="earth", lon=-148.5, lat=61.5, elev=1000.0, alt=0.0, spacing=5.0, prf=1e3,
+                 name="synth", seed=0):
+        #: int number of samples per trace
+        self.snum = int(snum)
+        #: int number of traces
+        self.tnum = int(tnum)
+        #: float sampling interval [s]
+        self.dt = dt
+        #: float mean surface and bed sample, as fractions of snum
+        self.srf = srf
+        self.bed = bed
+        #: float reflector relief, as a fraction of snum
+        self.relief = relief
+        #: float surface, bed and clutter amplitudes, and noise standard deviation
+        self.srf_amp = srf_amp
+        self.bed_amp = bed_amp
+        self.clutter = clutter
+        self.noise = noise
+        #: str planetary body
+        self.body = body
+        #: float track start lon, lat, mean surface elevation [m], platform height above surface [m] and trace spacing [m]
+        self.lon = lon
+        self.lat = lat
+        self.elev = elev
+        self.alt = alt
+        self.spacing = spacing
+        #: float pulse repetition frequency [Hz]
+        self.prf = prf
+        #: str file name root
+        self.name = name
+        #: int random seed
+        self.seed = seed
+        #: float twtt from platform to sample zero - zero for ground-based radar
+        self.twtt_wind = max(0.0, 2*alt/C - srf*self.snum*dt)
+
+
+    # blocks is a generator method to return the first and last trace of each block
+    def blocks(self, chunk=chunk_size):
+        for _i in range(0, self.tnum, chunk):
+            yield _i, min(_i + chunk, self.tnum)
+
+
+    # get_srf returns the surface sample for traces t
+    def get_srf(self, t):
+        t = np.asarray(t, dtype=float)
+        p = 2*np.pi*t/self.tnum
+        return self.snum*(self.srf + self.relief*(0.6*np.sin(p) + 0.4*np.sin(7*p + 1.3)))
+
+
+    # get_bed returns the bed sample for traces t
+    def get_bed(self, t):
+        t = np.asarray(t, dtype=float)
+        p = 2*np.pi*t/self.tnum
+        thick = self.snum*(self.bed - self.srf)*(1 + 2*self.relief*(0.7*np.cos(3*p) + 0.3*np.sin(11*p + 0.4)))
+        return np.clip(self.get_srf(t) + thick, 0, self.snum - 2)
+
+
+    # get_nav returns platform lon, lat and elevation for traces t0 through t1 - 1
+    def get_nav(self, t0, t1):
+        t = np.arange(t0, t1)
+        deg = np.degrees(self.spacing*t/radii[self.body])/np.sqrt(2)
+        lon = self.lon + deg/np.cos(np.radians(self.lat))
+        lat = self.lat + deg
+        return lon, lat, np.repeat(self.elev + self.alt, t1 - t0)
+
+
+    # get_srfElev returns the surface elevation for traces t0 through t1 - 1
+    def get_srfElev(self, t0, t1):
+        return self.elev + self.alt - (self.twtt_wind + self.get_srf(np.arange(t0, t1))*self.dt)*C/2
+
+
+    # get_block returns the radargram amplitude for traces t0 through t1 - 1
+    def get_block(self, t0, t1):
+        out = np.empty((self.snum, t1 - t0), dtype=np.float32)
+        for i0 in range(t0 - t0 % tile, t1, tile):
+            rng = np.random.default_rng([self.seed, 0, i0 // tile])
+            tl = rng.standard_normal((self.snum, tile), dtype=np.float32)
+            lo, hi = max(t0, i0), min(t1, i0 + tile)
+            out[:, lo - t0:hi - t0] = tl[:, lo - i0:hi - i0]
+        out *= self.noise
+        self.add_clutter(out, t0, t1)
+        t = np.arange(t0, t1)
+        add_pulse(out, self.get_srf(t), self.srf_amp)
+        add_pulse(out, self.get_bed(t), self.bed_amp)
+        return out
+
+
+    # get_sim_block returns a clutter simulation - surface and off-nadir clutter without noise or bed - for traces t0 through t1 - 1
+    def get_sim_block(self, t0, t1):
+        out = np.zeros((self.snum, t1 - t0), dtype=np.float32)
+        self.add_clutter(out, t0, t1)
+        add_pulse(out, self.get_srf(np.arange(t0, t1)), self.srf_amp)
+        return np.abs(out)
+
+
+    # add_clutter adds hyperbolic off-nadir surface clutter from scatterers spaced about every 100 traces
+    def add_clutter(self, out, t0, t1, spacing=100, width=200):
+        if not self.clutter:
+            return
+        for k in range((t0 - width) // spacing, (t1 + width) // spacing + 1):
+            rng = np.random.default_rng([self.seed, 1, k + 2**16])
+            xk = k*spacing + rng.uniform(0, spacing)
+            dk = rng.uniform(5, 0.3*self.snum)
+            ak = self.clutter*rng.uniform(0.2, 1)
+            t = np.arange(max(t0, int(xk) - width), min(t1, int(xk) + width + 1))
+            if t.size == 0:
+                continue
+            s = self.get_srf(xk) + np.sqrt(dk**2 + (t - xk)**2)
+            add_pulse(out, s, ak*np.exp(-np.abs(t - xk)/50), cols=t - t0)
+
+
+    # to_garlic returns the scene as a garlic object, with nav, clutter simulation and surface and bed horizons
+    def to_garlic(self):
+        rdata = garlic(self.name)
+        rdata.fn = self.name
+        rdata.dtype = "synth"
+        rdata.snum = self.snum
+        rdata.tnum = self.tnum
+        rdata.dt = self.dt
+        rdata.fs = 1/self.dt
+        rdata.prf = self.prf
+        rdata.nchan = 1
+        rdata.set_dat(np.hstack([self.get_block(t0, t1) for t0, t1 in self.blocks()]))
+        rdata.set_proc(np.abs(rdata.get_dat()))
+        rdata.set_sim(np.hstack([self.get_sim_block(t0, t1) for t0, t1 in self.blocks()]))
+        rdata.set_twtt()
+        rdata.info["Signal Type"] = "Impulse"
+        rdata.geocrs = navcrs[self.body]
+        rdata.xyzcrs = navparse.xyzsys[self.body]
+        rdata.navdf = self.get_navdf(0, self.tnum)
+        t = np.arange(self.tnum)
+        rdata.pick.set_horizon("srf", np.round(self.get_srf(t)))
+        rdata.pick.set_srf("srf")
+        rdata.pick.set_horizon("bed", np.round(self.get_bed(t)))
+        rdata.set_srfElev()
+        rdata.check_attrs()
+        return rdata
+
+
+    # get_navdf returns the ragu nav dataframe for traces t0 through t1 - 1
+    def get_navdf(self, t0, t1):
+        lon, lat, elev = self.get_nav(t0, t1)
+        df = pd.DataFrame({"lon": lon, "lat": lat, "elev": elev})
+        xformer = navparse.get_xformer(navcrs[self.body], navparse.xyzsys[self.body])
+        df["x"], df["y"], df["z"] = xformer.transform(lon, lat, elev)
+        df["twtt_wind"] = self.twtt_wind
+        df["dist"] = navparse.euclid_dist(df["x"].to_numpy(), df["y"].to_numpy(), df["z"].to_numpy())
+        return df
+
+
+# add_pulse is a function to add a reflection of amplitude amp at fractional sample s of each trace, split between the neighbouring samples
+def add_pulse(out, s, amp, cols=None):
+    s = np.asarray(s, dtype=float)
+    cols = np.arange(out.shape[1]) if cols is None else cols
+    i = np.floor(s).astype(int)
+    f = s - i
+    amp = np.broadcast_to(amp, s.shape)
+    valid = (i >= 0) & (i < out.shape[0] - 1)
+    i, f, amp, cols = i[valid], f[valid], amp[valid], cols[valid]
+    np.add.at(out, (i, cols), amp*(1 - f))
+    np.add.at(out, (i + 1, cols), amp*f)
+
+
+### file writers - each writes the scene to root and returns the data file path ###
+
+# write_pulseekko writes a sensors & software .DT1 data file, .HD header file and .GPS nav file
+def write_pulseekko(scn, root):
+    fpath = os.path.join(root, scn.name + ".DT1")
+    rec = np.dtype([("head", "<f4", 32), ("dat", "<i2", scn.snum)])
+    with open(fpath, "wb") as f, open(fpath[:-4] + ".GPS", "w") as g:
+        for t0, t1 in scn.blocks():
+            blk = np.zeros(t1 - t0, dtype=rec)
+            blk["head"][:,0] = np.arange(t0, t1) + 1
+            blk["head"][:,1] = np.arange(t0, t1)*scn.spacing
+            blk["head"][:,2] = scn.snum
+            blk["head"][:,8] = scn.snum*scn.dt*1e9
+            blk["dat"] = np.clip(scn.get_block(t0, t1)*100, -32768, 32767).T
+            blk.tofile(f)
+            lon, lat, elev = scn.get_nav(t0, t1)
+            for j in range(-t0 % 10, t1 - t0, 10):
+                g.write("Trace #{} at position {:.6f}\n".format(t0 + j + 1, (t0 + j)*scn.spacing))
+                g.write(gga(t0 + j, lon[j], lat[j], elev[j]))
+    with open(fpath[:-4] + ".HD", "w") as f:
+        f.write("1234\n")
+        f.write("Data Collected with pulseEKKO PRO\n")
+        f.write("2020-01-01\n")
+        f.write("NUMBER OF TRACES   = {}\n".format(scn.tnum))
+        f.write("NUMBER OF PTS/TRC  = {}\n".format(scn.snum))
+        f.write("TIMEZERO AT POINT  = 0\n")
+        f.write("TOTAL TIME WINDOW  = {}\n".format(scn.snum*scn.dt*1e9))
+        f.write("STARTING POSITION  = 0\n")
+        f.write("FINAL POSITION     = {}\n".format((scn.tnum - 1)*scn.spacing))
+        f.write("STEP SIZE USED     = {}\n".format(scn.spacing))
+        f.write("POSITION UNITS     = m\n")
+        f.write("NOMINAL FREQUENCY  = 100\n")
+        f.write("ANTENNA SEPARATION = 1\n")
+    return fpath
+
+
+# write_gssi writes a gssi .DZT data file and .DZG nav file
+def write_gssi(scn, root):
+    fpath = os.path.join(root, scn.name + ".DZT")
+    header = bytearray(1024)
+    struct.pack_into("<h", header, 2, 1)                            # data offset [kb]
+    struct.pack_into("<h", header, 4, scn.snum)                     # samples per trace
+    struct.pack_into("<h", header, 6, 16)                           # bits per sample
+    struct.pack_into("<f", header, 10, scn.prf)                     # scans per second
+    struct.pack_into("<f", header, 26, scn.snum*scn.dt*1e9)         # range [ns]
+    struct.pack_into("<h", header, 52, 1)                           # number of channels
+    with open(fpath, "wb") as f, open(fpath[:-4] + ".DZG", "w") as g:
+        f.write(header)
+        for t0, t1 in scn.blocks():
+            np.clip(scn.get_block(t0, t1)*100 + 32768, 0, 65535).astype("<u2").T.tofile(f)
+            lon, lat, elev = scn.get_nav(t0, t1)
+            for j in range(-t0 % 10, t1 - t0, 10):
+                g.write("$GSSIS,{},0.0\n".format(t0 + j))
+                g.write(gga(t0 + j, lon[j], lat[j], elev[j]))
+    return fpath
+
+
+# write_sharad writes an MRO-SHARAD _rgram.img data file, _sim.img clutter simulation and _geom.tab nav file
+def write_sharad(scn, root):
+    check_snum(scn, "sharad")
+    fn = os.path.join(root, scn.name)
+    dat = np.memmap(fn + "_rgram.img", dtype="<f4", mode="w+", shape=(scn.snum, scn.tnum))
+    sim = np.memmap(fn + "_sim.img", dtype="<f4", mode="w+", shape=(3, scn.snum, scn.tnum))
+    with open(fn + "_geom.tab", "w") as g:
+        for t0, t1 in scn.blocks():
+            dat[:, t0:t1] = np.abs(scn.get_block(t0, t1))
+            sim[2, :, t0:t1] = scn.get_sim_block(t0, t1)
+            lon, lat, elev = scn.get_nav(t0, t1)
+            pd.DataFrame({"trace": np.arange(t0, t1) + 1,
+                          "time": "2010-01-01T00:00:00.000",
+                          "lat": lat,
+                          "lon": lon,
+                          "marsRad": radii["mars"]*1e-3,
+                          "scRad": (radii["mars"] + elev)*1e-3,
+                          "radiVel": 0.0,
+                          "tangVel": 3.4,
+                          "SZA": 100.0,
+                          "phaseD": 0.0}).to_csv(g, header=False, index=False)
+    dat.flush()
+    sim.flush()
+    return fn + "_rgram.img"
+
+
+# write_marsis writes a JPL MARSIS .dat data file, _clutter.img clutter simulation and _geom.tab nav file
+# each trace holds eight stacked power radargrams, the last two of which are the reprocessed channels
+def write_marsis(scn, root):
+    check_snum(scn, "marsis")
+    orbit = "e_" + scn.name.replace("_", "")
+    fpath = os.path.join(root, orbit + "_ss3_trk_cmp.dat")
+    sim = np.memmap(os.path.join(root, orbit + "_clutter.img"), dtype=np.uint8, mode="w+", shape=(scn.snum, scn.tnum))
+    xformer = navparse.get_xformer(navcrs[scn.body], navparse.xyzsys[scn.body])
+    with open(fpath, "wb") as f, open(os.path.join(root, orbit + "_geom.tab"), "w") as g:
+        for t0, t1 in scn.blocks():
+            blk = np.zeros((8*scn.snum, t1 - t0), dtype="<f4")
+            amp = scn.get_block(t0, t1)
+            blk[6*scn.snum:7*scn.snum] = amp**2
+            blk[7*scn.snum:] = amp**2
+            blk.T.tofile(f)
+            s = scn.get_sim_block(t0, t1)
+            sim[:, t0:t1] = np.clip(255*s/max(scn.srf_amp, 1), 0, 255)
+            lon, lat, elev = scn.get_nav(t0, t1)
+            x, y, z = xformer.transform(lon, lat, elev)
+            pd.DataFrame({"trace": np.arange(t0, t1) + 1,
+                          "ephemerisTime": np.arange(t0, t1)/scn.prf,
+                          "time": "2010-01-01T00:00:00.000",
+                          "lat": lat,
+                          "lon": lon,
+                          "elev": elev,
+                          "sza": 100.0,
+                          "ch0": 3.0,
+                          "ch1": 4.0,
+                          "x": x*1e-3,
+                          "y": y*1e-3,
+                          "z": z*1e-3,
+                          "radiVel": 0.0,
+                          "tangVel": 3.4}).to_csv(g, header=False, index=False)
+    sim.flush()
+    return fpath
+
+
+# write_lrs writes a KAGUYA LRS .img data file, with a 55 byte nav header per trace ahead of the 8-bit radargram, and .lbl label file
+def write_lrs(scn, root):
+    check_snum(scn, "lrs")
+    fpath = os.path.join(root, scn.name + ".img")
+    head = np.dtype([("pad0", "u1", 23), ("delay", "<f4"), ("pad1", "u1", 2), ("lat", "<f4"), ("lon", "<f4"), ("elev", "<f4"), ("pad2", "u1", 14)])
+    hdr = np.memmap(fpath, dtype=head, mode="w+", shape=(scn.tnum,))
+    dat = np.memmap(fpath, dtype=np.uint8, mode="r+", offset=scn.tnum*head.itemsize, shape=(scn.snum, scn.tnum))
+    for t0, t1 in scn.blocks():
+        lon, lat, elev = scn.get_nav(t0, t1)
+        hdr["delay"][t0:t1] = scn.twtt_wind*1e6
+        hdr["lat"][t0:t1] = lat
+        hdr["lon"][t0:t1] = lon
+        hdr["elev"][t0:t1] = elev
+        dat[:, t0:t1] = np.clip(np.abs(scn.get_block(t0, t1))*4, 0, 255)
+    hdr.flush()
+    dat.flush()
+    # label file record count is read from line 20
+    with open(fpath[:-4] + ".lbl", "w") as f:
+        f.write("PDS_VERSION_ID = PDS3\n"*19)
+        f.write("FILE_RECORDS = {}\n".format(scn.tnum))
+    return fpath
+
+
+# write_oibak writes an OIB-AK hdf5 data file with pulse compressed data, clutter simulation, nav, lidar surface and surface pick
+def write_oibak(scn, root):
+    fpath = os.path.join(root, scn.name + ".h5")
+    nav = np.dtype([("lat", "<f8"), ("lon", "<f8"), ("hgt", "<f8")])
+    chunks = (scn.snum, min(chunk_size, scn.tnum))
+    with h5py.File(fpath, "w") as f:
+        rx0 = f.create_group("raw/rx0")
+        rx0.attrs["samplesPerTrace"] = scn.snum
+        rx0.attrs["numTrace"] = scn.tnum
+        rx0.attrs["samplingFrequency"] = [1/scn.dt]
+        tx0 = f.create_group("raw/tx0")
+        tx0.attrs["pulseRepetitionFrequency"] = [scn.prf]
+        tx0.attrs["signal"] = "chirp"
+        tx0.attrs["centerFrequency"] = [2.5e6]
+        tx0.attrs["bandwidth"] = [0.1]
+        tx0.attrs["length"] = [1e-6]
+        proc0 = f.create_dataset("drv/proc0", (scn.snum, scn.tnum), dtype=np.complex64, chunks=chunks)
+        clutter0 = f.create_dataset("drv/clutter0", (scn.snum, scn.tnum), dtype=np.float32, chunks=chunks)
+        twtt_surf = f.create_dataset("drv/pick/twtt_surf", (scn.tnum,), dtype=np.float64)
+        nav0 = f.create_dataset("ext/nav0", (scn.tnum,), dtype=nav)
+        srf0 = f.create_dataset("ext/srf0", (scn.tnum,), dtype=np.float64)
+        for t0, t1 in scn.blocks():
+            proc0[:, t0:t1] = scn.get_block(t0, t1).astype(np.complex64)
+            clutter0[:, t0:t1] = scn.get_sim_block(t0, t1)
+            twtt_surf[t0:t1] = np.round(scn.get_srf(np.arange(t0, t1)))*scn.dt
+            lon, lat, elev = scn.get_nav(t0, t1)
+            blk = np.zeros(t1 - t0, dtype=nav)
+            blk["lat"], blk["lon"], blk["hgt"] = lat, lon, elev
+            nav0[t0:t1] = blk
+            srf0[t0:t1] = scn.get_srfElev(t0, t1)
+    return fpath
+
+
+# write_groundhog writes a groundhog hdf5 data file
+def write_groundhog(scn, root):
+    fpath = os.path.join(root, scn.name + ".h5")
+    nav = np.dtype([("lat", "<f8"), ("lon", "<f8"), ("hgt", "<f8")])
+    with h5py.File(fpath, "w") as f:
+        rx0 = f.create_dataset("raw/rx0", (scn.snum, scn.tnum), dtype=np.float32, chunks=(scn.snum, min(chunk_size, scn.tnum)))
+        rx0.attrs["fs"] = 1/scn.dt
+        rx0.attrs["prf"] = scn.prf
+        rx0.attrs["pre_trigger"] = 0
+        rx0.attrs["stack"] = 1
+        gps0 = f.create_dataset("raw/gps0", (scn.tnum,), dtype=nav)
+        for t0, t1 in scn.blocks():
+            rx0[:, t0:t1] = scn.get_block(t0, t1)
+            lon, lat, elev = scn.get_nav(t0, t1)
+            blk = np.zeros(t1 - t0, dtype=nav)
+            blk["lat"], blk["lon"], blk["hgt"] = lat, lon, elev
+            gps0[t0:t1] = blk
+    return fpath
+
+
+# write_cresis writes a CReSIS v7.3 .mat (hdf5) data file - radar is "mcords" for the radar depth sounder or "snow" for the snow radar
+def write_cresis(scn, root, radar="mcords"):
+    fpath = os.path.join(root, scn.name + ".mat")
+    with h5py.File(fpath, "w") as f:
+        f["param_records/radar_name"] = np.frombuffer(radar.encode("utf-16"), dtype=np.uint16)
+        f["param_records/radar/prf"] = [[scn.prf]]
+        f["Time"] = (scn.twtt_wind + np.arange(scn.snum)*scn.dt)[:,None]
+        f["Truncate_Bins"] = [[0]]
+        data = f.create_dataset("Data", (scn.tnum, scn.snum), dtype=np.float32, chunks=(min(chunk_size, scn.tnum), scn.snum))
+        lon = f.create_dataset("Longitude", (1, scn.tnum), dtype=np.float64)
+        lat = f.create_dataset("Latitude", (1, scn.tnum), dtype=np.float64)
+        elev = f.create_dataset("Elevation", (1, scn.tnum), dtype=np.float64)
+        srf = f.create_dataset("Surface", (1, scn.tnum), dtype=np.float64)
+        for t0, t1 in scn.blocks():
+            data[t0:t1] = np.abs(scn.get_block(t0, t1)).T
+            lon[0, t0:t1], lat[0, t0:t1], elev[0, t0:t1] = scn.get_nav(t0, t1)
+            srf[0, t0:t1] = np.round(scn.get_srf(np.arange(t0, t1)))*scn.dt
+    return fpath
+
+
+# write_cresis_snow writes a CReSIS snow radar v7.3 .mat (hdf5) data file
+def write_cresis_snow(scn, root):
+    return write_cresis(scn, root, radar="snow")
+
+
+# write_rimfax writes a Perseverance RIMFAX pds .csv data file
+def write_rimfax(scn, root):
+    fpath = os.path.join(root, scn.name + ".csv")
+    cols = ["s{:04d}".format(_i + 1) for _i in range(scn.snum)]
+    with open(fpath, "w") as f:
+        for t0, t1 in scn.blocks():
+            lon, lat, elev = scn.get_nav(t0, t1)
+            df = pd.DataFrame({"record_type": 0,
+                               "config_id": 26,
+                               "sample_time_increment": scn.dt*1e9,
+                               "ant_lat": lat,
+                               "ant_lon": lon,
+                               "ant_elev": elev})
+            df = pd.concat((df, pd.DataFrame(scn.get_block(t0, t1).T, columns=cols)), axis=1)
+            df.to_csv(f, header=(t0 == 0), index=False)
+    return fpath
+
+
+# dict of file writers for each supported format
+writers = {"pulseekko": write_pulseekko,
+           "gssi": write_gssi,
+           "sharad": write_sharad,
+           "marsis": write_marsis,
+           "lrs": write_lrs,
+           "oibak": write_oibak,
+           "groundhog": write_groundhog,
+           "cresis": write_cresis,
+           "cresis_snow": write_cresis_snow,
+           "rimfax": write_rimfax}
+
+# scene defaults for each format - fixed sample counts and sampling intervals are those assumed by the ingesters
+defaults = {"pulseekko": {"dt": 2e-10, "srf": 0.05, "elev": 100.0, "spacing": 0.1},
+            "gssi": {"dt": 2e-10, "srf": 0.05, "elev": 100.0, "spacing": 0.1},
+            "sharad": {"snum": 3600, "dt": 0.0375e-6, "body": "mars", "lon": 120.0, "lat": -10.0, "elev": 0.0, "alt": 300e3, "spacing": 450.0, "prf": 700.28},
+            "marsis": {"snum": 2048, "dt": 1/2.8e6, "body": "mars", "lon": 120.0, "lat": -10.0, "elev": 0.0, "alt": 300e3, "spacing": 1e3, "prf": 127},
+            "lrs": {"snum": 1000, "dt": 305.17578125e-09, "body": "moon", "lon": 30.0, "lat": 20.0, "elev": 0.0, "alt": 100e3, "spacing": 75.0, "prf": 20},
+            "oibak": {"dt": 2e-8, "alt": 600.0, "prf": 1e4},
+            "groundhog": {"dt": 4e-9, "srf": 0.05, "spacing": 1.0},
+            "cresis": {"dt": 2e-8, "lon": -45.0, "lat": 70.0, "alt": 500.0, "prf": 1e4},
+            "cresis_snow": {"dt": 1e-10, "lon": -45.0, "lat": 70.0, "alt": 500.0, "prf": 1e4},
+            "rimfax": {"dt": 0.5e-9, "srf": 0.05, "body": "mars", "lon": 77.4, "lat": 18.4, "elev": -2570.0, "spacing": 0.1}}
+
+# fixed number of samples per trace assumed by ingesters
+fixed_snum = {"sharad": 3600, "marsis": 2048, "lrs": 1000}
+
+
+# check_snum is a function to raise an error if a scene does not have the fixed number of samples of a format
+def check_snum(scn, fmt):
+    if scn.snum != fixed_snum[fmt]:
+        raise ValueError("synth error: {} files hold {} samples per trace, scene has {}".format(fmt, fixed_snum[fmt], scn.snum))
+
+
+# get_scene is a function to return a scene with the defaults of a format, overridden by kwargs
+def get_scene(fmt, tnum, **kwargs):
+    params = dict(defaults[fmt])
+    params.update(kwargs)
+    return scene(tnum=tnum, name=params.pop("name", fmt), **params)
+
+
+# write is a function to write a scene to root in the given format, returning the data file path
+def write(scn, fmt, root):
+    if fmt not in writers:
+        raise ValueError("synth error: unknown format " + str(fmt) + ", options are " + ", ".join(writers))
+    os.makedirs(root, exist_ok=True)
+    return writers[fmt](scn, root)
+
+
+# gga is a function to return an nmea gga sentence for a trace
+def gga(trace, lon, lat, elev):
+    return "$GPGGA,{:09.2f},{},{},{},{},1,08,1.0,{:.1f},M,0.0,M,,*47\n".format(120000 + trace*0.01, nmea_dm(lat), "N" if lat >= 0 else "S", nmea_dm(lon), "E" if lon >= 0 else "W", elev)
+
+
+# nmea_dm is a function to format decimal degrees as nmea degrees decimal minutes
+def nmea_dm(deg):
+    deg = abs(deg)
+    return "{:.4f}".format(int(deg)*100 + (deg - int(deg))*60)
@@ -7,20 +7,22 @@
 pick export functions for RAGU
 """
 ### imports ###
-from ragu.tools import utils
+from ragu.tools import utils, perf, lazy
 from ragu.raguError import raguError
 from ragu.tools.constants import *
 import numpy as np
 import pandas as pd
-import geopandas as gpd
-from shapely.geometry import Point
-import tkinter as tk
-import os, sys, h5py, fnmatch
-import matplotlib.pyplot as plt
+import os, sys, fnmatch
+
+gpd = lazy.load("geopandas")
+h5py = lazy.load("h5py")
 
 # pick_math is a function to perform all the necessary mathematics on a set of picks and save data as a pandas dataframe
 # if overlapping pick segments exist, save as separate layers
-def pick_math(rdata, i_eps_r=3.15, amp_out=True, horizon=None, srf=None):
+# eps_r is the relative dielectric permittivity policy for each unit between merged horizons - a float, or a callable (upper, lower, i_eps_r) returning a float, or None to cancel
+# defaults to i_eps_r for all units
+@perf.timed()
+def pick_math(rdata, i_eps_r=3.15, amp_out=True, horizon=None, srf=None, eps_r=None):
     trace = np.arange(rdata.tnum)                       # array to hold trace number
     sample = rdata.pick.horizons.copy()
     # get list of horizon names
@@ -91,16 +93,14 @@ def pick_math(rdata, i_eps_r=3.15, amp_out=True, horizon=None, srf=None):
 
             if i > 0:
                 # get thickness between current layer and preceding layer
-                # first confirm users preferred dielectric permittivity for layer
-                eps_r = None
-                while (eps_r is None) or (eps_r < 1):
-                    eps_r = tk.simpledialog.askfloat("Dielectric Permittivity","Select a relative dielectric permittivity\nfor the unit between horizon <{}> and horizon <{}>".format(horizons[i - 1], horizons[i]), initialvalue=i_eps_r) 
-                    if eps_r is None:
-                        return None
-                    elif eps_r < 1:
-                        print("raguWarning: A relative dielectric permittivity >=1 must be specified in order to export picks")
-
-                h = utils.twtt2depth(out[horizon + "_twtt"] - out[horizons[i - 1] + "_twtt"], rdata.asep, eps_r)
+                # first get the dielectric permittivity for layer
+                unit_eps_r = utils.decide(i_eps_r if eps_r is None else eps_r, horizons[i - 1], horizons[i], i_eps_r)
+                if unit_eps_r is None:
+                    return None
+                elif unit_eps_r < 1:
+                    raise raguError("A relative dielectric permittivity >=1 must be specified for the unit between horizon <{}> and horizon <{}>".format(horizons[i - 1], horizons[i]))
+
+                h = utils.twtt2depth(out[horizon + "_twtt"] - out[horizons[i - 1] + "_twtt"], rdata.asep, unit_eps_r)
                 # calculate layer bed elevation as elevation of preceding layer minus layer thickness - this only works if a surface with reference elevation is defined
                 if srf:
                     out[horizon + "_elev"] = out[horizons[i - 1] + "_elev"] - h
@@ -110,6 +110,7 @@ def pick_math(rdata, i_eps_r=3.15, amp_out=True, horizon=None, srf=None):
 
 
 # csv is a function to export the output pick dataframe as a csv
+@perf.timed()
 def csv(fpath, df):
     # fpath is the path for where the exported csv pick file should be saved [str]
     # df pick output dataframe
@@ -121,6 +122,7 @@ def csv(fpath, df):
 
 
 # gpkg is a funciton for saving picks to a geopackage/shapefile
+@perf.timed()
 def gpkg(fpath, df, crs):
     # fpath is the path for where the exported csv pick file should be saved [str]
     # df pick output dataframe
@@ -131,7 +133,7 @@ def gpkg(fpath, df, crs):
             print("no geopackage was exported due to missing gps data")
             return
         # convert lon, lat to shapely points
-        geometry = [Point(xy) for xy in zip(df_copy["lon"], df_copy["lat"])]
+        geometry = gpd.points_from_xy(df_copy["lon"], df_copy["lat"])
         df_copy.drop(["lon", "lat"], axis=1)
 
         # create geopandas df and export
@@ -142,54 +144,60 @@ def gpkg(fpath, df, crs):
 
 
 # h5 is a function for saving twtt_bed pick to h5 data file
-def h5(fpath, df=None, dtype=None, srf=None):
+@perf.timed()
+def h5(fpath, df=None, dtype=None, srf=None, confirm=False):
     # fpath is the data file path [str]
     # df pick output dataframe
+    # confirm is the overwrite policy for pick layers in the data file - a bool, or a callable (title, message) returning a bool
     if (dtype=="oibak"):
-        f = h5py.File(fpath, "a")
-        flag = False
-        # update twtt_surf
-        if srf:
-            dat = df[srf + "_twtt"].to_numpy()
-            # if twtt_surf exists in file, see it current picks have been modified
-            if "twtt_surf" in f["drv"]["pick"].keys():
-                twtt_srf_dfile = f["drv"]["pick"]["twtt_surf"][:]
-                twtt_srf_dfile[twtt_srf_dfile == -1] = np.nan
-                twtt_srf_dfile[twtt_srf_dfile == -9] = np.nan
-                if not utils.nan_array_equal(twtt_srf_dfile, dat) or (np.isnan(twtt_srf_dfile).all()):
-                    if (tk.messagebox.askyesno("twtt_surf","Export twtt_surf pick layer to data file?")):
-                        del f["drv"]["pick"]["twtt_surf"]
-                        flag = True
-            elif (tk.messagebox.askyesno("twtt_surf","Export twtt_surf pick layer to data file?")):
-                flag = True
-            if flag:
-                dat[np.isnan(dat)] = -9
-                twtt_surf = f["drv"]["pick"].require_dataset("twtt_surf", data=dat, shape=dat.shape, dtype=np.float32)
-                # twtt_surf.attrs.create("Unit", np.string_("Seconds"))
-                # twtt_surf.attrs.create("Source", np.string_("Manual pick layer"))
-                print("twtt_surf exported successfully:\t" + fpath + "/drv/pick/twtt_surf")
-
-        # update twtt_bed
-        if "bed_twtt" in df.keys():
-            dat = df["bed_twtt"].to_numpy()
-            dat[np.isnan(dat)] = -9
-            if "twtt_bed" in f["drv"]["pick"].keys():
-                if (f["drv"]["pick"]["twtt_bed"][:] == dat).all():
-                    return
-                elif tk.messagebox.askyesno("twtt_bed","Export twtt_bed pick layer to data file?"):
-                    del f["drv"]["pick"]["twtt_bed"]
-            elif not tk.messagebox.askyesno("twtt_bed","Export twtt_bed pick layer to data file?"):
-                return
-            twtt_bed = f["drv"]["pick"].require_dataset("twtt_bed", data=dat, shape=dat.shape, dtype=np.float32)
-            # twtt_bed.attrs.create("Unit", np.string_("Seconds"))
-            # twtt_bed.attrs.create("Source", np.string_("Manual pick layer"))
-            print("twtt_bed exported successfully:\t\t" + fpath + "/drv/pick/twtt_bed")
-        f.close()
+        with h5py.File(fpath, "a") as f:
+            h5_picks(f, fpath, df, srf, confirm)
 
     else:
         return
 
 
+# h5_picks is a function for writing surface and bed twtt pick layers to an open OIB-AK hdf5 data file
+def h5_picks(f, fpath, df, srf, confirm):
+    flag = False
+    # update twtt_surf
+    if srf:
+        dat = df[srf + "_twtt"].to_numpy(copy=True)
+        # if twtt_surf exists in file, see it current picks have been modified
+        if "twtt_surf" in f["drv"]["pick"].keys():
+            twtt_srf_dfile = f["drv"]["pick"]["twtt_surf"][:]
+            twtt_srf_dfile[twtt_srf_dfile == -1] = np.nan
+            twtt_srf_dfile[twtt_srf_dfile == -9] = np.nan
+            if not utils.nan_array_equal(twtt_srf_dfile, dat) or (np.isnan(twtt_srf_dfile).all()):
+                if utils.decide(confirm, "twtt_surf", "Export twtt_surf pick layer to data file?"):
+                    del f["drv"]["pick"]["twtt_surf"]
+                    flag = True
+        elif utils.decide(confirm, "twtt_surf", "Export twtt_surf pick layer to data file?"):
+            flag = True
+        if flag:
+            dat[np.isnan(dat)] = -9
+            twtt_surf = f["drv"]["pick"].require_dataset("twtt_surf", data=dat, shape=dat.shape, dtype=np.float32)
+            # twtt_surf.attrs.create("Unit", np.string_("Seconds"))
+            # twtt_surf.attrs.create("Source", np.string_("Manual pick layer"))
+            print("twtt_surf exported successfully:\t" + fpath + "/drv/pick/twtt_surf")
+
+    # update twtt_bed
+    if "bed_twtt" in df.keys():
+        dat = df["bed_twtt"].to_numpy(copy=True)
+        dat[np.isnan(dat)] = -9
+        if "twtt_bed" in f["drv"]["pick"].keys():
+            if (f["drv"]["pick"]["twtt_bed"][:] == dat).all():
+                return
+            elif utils.decide(confirm, "twtt_bed", "Export twtt_bed pick layer to data file?"):
+                del f["drv"]["pick"]["twtt_bed"]
+        elif not utils.decide(confirm, "twtt_bed", "Export twtt_bed pick layer to data file?"):
+            return
+        twtt_bed = f["drv"]["pick"].require_dataset("twtt_bed", data=dat, shape=dat.shape, dtype=np.float32)
+        # twtt_bed.attrs.create("Unit", np.string_("Seconds"))
+        # twtt_bed.attrs.create("Source", np.string_("Manual pick layer"))
+        print("twtt_bed exported successfully:\t\t" + fpath + "/drv/pick/twtt_bed")
+
+
 # fig is a function for exporting the pick image
 def fig(fpath, fig):
     fig.savefig(fpath, dpi=500, bbox_inches='tight', pad_inches=0.05, transparent=True)# facecolor = "#d9d9d9")
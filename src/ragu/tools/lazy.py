@@ -0,0 +1,35 @@
+# RAGU - Radar Analysis Graphical Utility
+#
+# copyright © 2020 btobers <tobers.brandon@gmail.com>
+#
+# distributed under terms of the GNU GPL3.0 license
+"""
+lazy module defers imports of heavy dependencies - geopandas, rasterio, scipy submodules, h5py - until first use,
+so that importing ragu for batch processing, or starting the app, does not pay for modules a session never touches
+"""
+### imports ###
+import importlib, importlib.util, sys
+
+
+# load is a function to return a module which is imported on first attribute access
+def load(name):
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError("No module named '{}'".format(name), name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+# attrs is a function to return a PEP 562 module __getattr__ which imports the named submodules of a package on first access
+def attrs(package, submodules):
+    def __getattr__(name):
+        if name in submodules:
+            return importlib.import_module(package + "." + name)
+        raise AttributeError("module '{}' has no attribute '{}'".format(package, name))
+    return __getattr__
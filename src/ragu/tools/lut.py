@@ -0,0 +1,393 @@
+# RAGU - Radar Analysis Graphical Utility
+#
+# copyright © 2020 btobers <tobers.brandon@gmail.com>
+#
+# distributed under terms of the GNU GPL3.0 license
+"""
+lut module holds quantized display images of radargram pyramids, colour-mapped through a lookup table,
+so that colour limit and colormap changes cost one table rebuild and a gather over the visible pixels rather than a full image re-normalization.
+views are composited from RGBA tiles held in a bounded least recently used cache, shared between the data and sim images.
+profile renders the profile view images of a matplotlib axes through lutimages without any tk state, for impick and for headless benchmarks
+"""
+### imports ###
+from ragu.tools import utils
+from collections import OrderedDict
+import itertools
+import numpy as np
+
+# number of quantization levels - level zero is reserved for nodata
+levels = 4096
+# number of traces quantized at once, bounding float temporaries
+chunk_size = 4096
+# display tile size [screen px] and number of tiles to cache
+tile_size = 256
+tile_cache = 128
+# unique lutimage ids, for tile cache keys
+_uids = itertools.count()
+
+
+class tilecache(object):
+    """
+    tilecache is a least recently used cache of display tiles, keyed by (lutimage uid, pyramid level, decimation factors, tile row, tile col)
+    """
+    def __init__(self, size=tile_cache):
+        self.tiles = OrderedDict()
+        self.size = size
+
+
+    # get returns a cached tile, marking it as recently used, or None
+    def get(self, key):
+        if key in self.tiles:
+            self.tiles.move_to_end(key)
+            return self.tiles[key]
+        return None
+
+
+    # put caches a tile, dropping least recently used tiles
+    def put(self, key, tile):
+        self.tiles[key] = tile
+        while len(self.tiles) > self.size:
+            self.tiles.popitem(last=False)
+
+
+    # drop removes all tiles of a lutimage
+    def drop(self, uid):
+        for key in [k for k in self.tiles if k[0] == uid]:
+            del self.tiles[key]
+
+
+class lutimage(object):
+    """
+    lutimage holds uint16 quantized levels of a dB pyramid, and the RGBA lookup table of the current colormap and colour limits.
+    pyramid levels are quantized on first display, on a common scale spanning the range of the full resolution level.
+    """
+    def __init__(self, pyramid, tiles=None, levels=levels, y0=0., dy=1.):
+        #: list of np.ndarray(snum x tnum) dB pyramid arrays - pyramid[0] is full resolution
+        self.pyramid = pyramid
+        #: float y0, y axis value of the top edge of the first row, and dy, y axis spacing of full resolution rows - samples by default
+        self.y0 = y0
+        self.dy = dy
+        #: tilecache display tiles, may be shared between lutimages
+        self.tiles = tilecache() if tiles is None else tiles
+        self.uid = next(_uids)
+        #: int levels, number of quantization levels
+        self.levels = levels
+        #: dict of np.ndarray(uint16) quantized pyramid levels
+        self.q = {}
+        # quantization scale
+        self.lo = np.nanmin(pyramid[0])
+        self.hi = np.nanmax(pyramid[0])
+        if not np.isfinite(self.lo):
+            self.lo, self.hi = 0.0, 1.0
+        if self.hi <= self.lo:
+            self.hi = self.lo + 1
+        self.scale = (levels - 2) / (self.hi - self.lo)
+        #: np.ndarray(levels x 4) uint8 RGBA lookup table
+        self.lut = None
+        self.cmap = None
+        self.clim = None
+        # lookup table version, incremented on each rebuild so cached tiles are recoloured
+        self.lut_id = 0
+        #: tuple (key, np.ndarray, extent), last composited view
+        self.view = None
+
+
+    # get_level returns the quantized array of a pyramid level, quantizing on first access
+    def get_level(self, p):
+        p = p % len(self.pyramid)
+        if p not in self.q:
+            self.q[p] = quantize(self.pyramid[p], self.lo, self.scale, self.levels)
+        return self.q[p]
+
+
+    # get_values returns the dB value of each quantization level - level zero is nodata
+    def get_values(self):
+        vals = self.lo + (np.arange(self.levels) - 1) / self.scale
+        vals[0] = np.nan
+        return vals
+
+
+    # set_lut rebuilds the lookup table if the colormap or colour limits changed
+    def set_lut(self, cmap, clim):
+        clim = tuple(float(c) for c in clim)
+        if self.lut is not None and cmap is self.cmap and clim == self.clim:
+            return
+        self.cmap, self.clim = cmap, clim
+        vals = self.get_values()[1:]
+        # normalize as mpl.colors.Normalize - values outside clim take the colormap under and over colors
+        with np.errstate(invalid="ignore", divide="ignore"):
+            norm = (vals - clim[0]) / (clim[1] - clim[0]) if clim[1] != clim[0] else np.zeros_like(vals)
+        self.lut = np.empty((self.levels, 4), dtype=np.uint8)
+        self.lut[1:] = cmap(norm, bytes=True)
+        self.lut[0] = cmap(np.ma.masked_invalid([np.nan]), bytes=True)[0]
+        self.lut_id += 1
+
+
+    # render returns the RGBA image of a pyramid level within the x (trace) and y (sample) limits, along with the image extent [left, right, bottom, top]
+    # in trace and sample coordinates. the view is composited from tiles block-averaged by power of two factors to between one and two times shape (rows, cols)
+    # pixels, so tiles are reused as the view is panned and zoomed - shape None renders at the level's resolution, bypassing the tile cache
+    def render(self, p, xlim, ylim, shape=None):
+        q = self.get_level(p)
+        p = p % len(self.pyramid)
+        r0, r1, c0, c1 = self.window(p, xlim, ylim)
+        if c1 <= c0 or r1 <= r0:
+            return np.zeros((1, 1, 4), dtype=np.uint8), [xlim[0], xlim[1], ylim[0], ylim[1]]
+        # pyramid levels are decimated in fast time
+        dy = self.dy*self.pyramid[0].shape[0] / q.shape[0]
+        if shape is None:
+            return self.lut[q[r0:r1, c0:c1]], [c0, c1, self.y0 + r1*dy, self.y0 + r0*dy]
+
+        # decimation factors and tile indices covering the view
+        fr = 2**int(np.floor(np.log2(max((r1 - r0) / max(shape[0], 1), 1))))
+        fc = 2**int(np.floor(np.log2(max((c1 - c0) / max(shape[1], 1), 1))))
+        rspan, cspan = tile_size*fr, tile_size*fc
+        i0, i1 = r0 // rspan, -(-r1 // rspan)
+        j0, j1 = c0 // cspan, -(-c1 // cspan)
+        key = (p, fr, fc, i0, i1, j0, j1, self.lut_id)
+        if self.view is None or self.view[0] != key:
+            im = np.concatenate([np.concatenate([self.get_tile(p, fr, fc, i, j) for j in range(j0, j1)], axis=1) for i in range(i0, i1)], axis=0)
+            extent = [j0*cspan, min(j1*cspan, q.shape[1]), self.y0 + min(i1*rspan, q.shape[0])*dy, self.y0 + i0*rspan*dy]
+            self.view = (key, im, extent)
+        return self.view[1], self.view[2]
+
+
+    # window returns the rows r0:r1 and columns c0:c1 of a pyramid level within the x (trace) and y axis limits
+    def window(self, p, xlim, ylim):
+        shape = self.pyramid[p].shape
+        dy = self.dy*self.pyramid[0].shape[0] / shape[0]
+        x0, x1 = sorted(xlim)
+        y0, y1 = sorted(((ylim[0] - self.y0) / dy, (ylim[1] - self.y0) / dy))
+        c0, c1 = max(int(np.floor(x0)), 0), min(int(np.ceil(x1)), shape[1])
+        r0, r1 = max(int(np.floor(y0)), 0), min(int(np.ceil(y1)), shape[0])
+        return r0, r1, c0, c1
+
+
+    # get_tile returns the RGBA tile of a pyramid level at the given decimation factors, decimating if not cached and recolouring if the lookup table changed
+    def get_tile(self, p, fr, fc, i, j):
+        key = (self.uid, p, fr, fc, i, j)
+        tile = self.tiles.get(key)
+        if tile is None:
+            q = self.get_level(p)
+            rspan, cspan = tile_size*fr, tile_size*fc
+            tq = decimate(q[i*rspan:(i + 1)*rspan, j*cspan:(j + 1)*cspan], fr, fc)
+            tile = [tq, None, None]
+            self.tiles.put(key, tile)
+        if tile[2] != self.lut_id:
+            tile[1], tile[2] = self.lut[tile[0]], self.lut_id
+        return tile[1]
+
+
+class profile(object):
+    """
+    profile holds the data and clutter simulation images of a radargram on a matplotlib axes, rendering the viewport of each through its lutimage.
+    images are displayed in the twtt domain, or in the depth or elev domain through the depth conversion index of the garlic object
+    """
+    def __init__(self, ax, rdata):
+        self.ax = ax
+        #: garlic rdata, radar data object
+        self.rdata = rdata
+        # initialize data and clutter images with np.ones - image data is set for the viewport in render_im
+        self.im_dat = ax.imshow(np.ones((100,100)), aspect="auto", extent=[0, rdata.tnum, rdata.snum, 0])
+        self.im_sim = ax.imshow(np.ones((100,100)), aspect="auto", extent=[0, rdata.tnum, rdata.snum, 0])
+        self.im_sim.set_visible(False)
+        # images are rendered for the viewport, so image extents must not rescale the axes
+        ax.set_autoscale_on(False)
+        # colormap and colour limit changes re-render the image through its lookup table
+        self.im_dat.callbacks.connect("changed", self.render_im)
+        self.im_sim.callbacks.connect("changed", self.render_im)
+        #: int pyramid, displayed pyramid level
+        self.pyramid = None
+        #: list of (pyramid, lutimage), one quantized display image per displayed pyramid, kept while rdata holds the pyramid
+        #: so switching channels reuses the quantized levels of cached channels - lutimages share one display tile cache
+        self.lutims = []
+        self.tiles = tilecache()
+        #: bool lut_full, render images at full resolution rather than canvas resolution, for figure export
+        self.lut_full = False
+        #: str domain, display domain - twtt, depth or elev - with the depth conversion permittivity and subsurface horizons
+        self.domain = "twtt"
+        self.domain_args = (3.15, None)
+        #: list of (pyramid, index, converted pyramid), pyramids converted to the display domain
+        self.dom_pyramids = []
+
+
+    # get_visible returns the visible image artist
+    def get_visible(self):
+        return self.im_sim if self.im_sim.get_visible() else self.im_dat
+
+
+    # get_hidden returns the hidden image artist
+    def get_hidden(self):
+        return self.im_dat if self.im_sim.get_visible() else self.im_sim
+
+
+    # set_crange sets the data and sim colour limits from the histograms built with the pyramids
+    # returns the data and sim colour limits - sim limits are None without a clutter simulation
+    def set_crange(self):
+        dlim = utils.hist_percentile(self.rdata.proc.get_curr_hist(), [10, 99])
+        slim = None
+        if self.rdata.flags.sim:
+            slim = utils.hist_percentile(self.rdata.sim_hist, [10, 100])
+            slim[0] = np.floor(slim[0])
+            self.im_sim.set_clim(slim)
+        self.im_dat.set_clim(dlim)
+        return dlim, slim
+
+
+    # set_level chooses the pyramid level for a canvas height of h pixels - the coarsest level with more samples than pixels
+    # returns True if the pyramid level changed
+    def set_level(self, h):
+        p = -1
+        for i in range(len(self.rdata.dPyramid)-1, -1, -1):
+            if(self.rdata.dPyramid[i].shape[0] > h):
+                p = i
+                break
+        changed = self.pyramid != p
+        self.pyramid = p
+        return changed
+
+
+    # show sets the data or sim image visible and renders it, stretching colour limits to the viewport first if stretch
+    def show(self, sim=False, stretch=False):
+        self.im_dat.set_visible(not sim)
+        self.im_sim.set_visible(sim)
+        self.render(stretch)
+
+
+    # stretch_view sets colour limits of the visible image from a subsample of the current pyramid level within the axis limits
+    def stretch_view(self):
+        im = self.get_visible()
+        limg = self.get_lutimage(im)
+        if limg is None:
+            return
+        p = (self.pyramid if self.pyramid is not None else 0) % len(limg.pyramid)
+        r0, r1, c0, c1 = limg.window(p, self.ax.get_xlim(), self.ax.get_ylim())
+        clim = utils.get_clim(limg.pyramid[p][r0:r1, c0:c1])
+        if clim is None or clim[0] == clim[1]:
+            return
+        im.set_clim(clim)
+
+
+    # render renders the visible image for the viewport, stretching colour limits to the viewport first if stretch
+    def render(self, stretch=False):
+        if stretch:
+            self.stretch_view()
+        self.render_im(self.get_visible())
+
+
+    # render_hidden renders the hidden image for the viewport, so its tiles are cached for toggling between data and sim
+    def render_hidden(self):
+        self.render_im(self.get_hidden())
+
+
+    # render_im sets an image's data to its quantized pyramid level within the axis limits, composited from cached RGBA tiles
+    # only visible tiles are gathered, decimated to the canvas resolution, so colormap and colour limit changes do not re-normalize the full image
+    def render_im(self, im):
+        limg = self.get_lutimage(im)
+        if limg is None:
+            return
+        limg.set_lut(im.get_cmap(), im.get_clim())
+        shape = None if self.lut_full else (self.ax.bbox.height, self.ax.bbox.width)
+        rgba, extent = limg.render(self.pyramid if self.pyramid is not None else 0, self.ax.get_xlim(), self.ax.get_ylim(), shape)
+        im.set_data(rgba)
+        im.set_extent(extent)
+
+
+    # get_lutimage returns the quantized display image of an image artist's displayed pyramid, quantizing pyramids on first display
+    # lutimages of pyramids replaced by processing or a change of display domain are dropped
+    def get_lutimage(self, im):
+        pyramid = self.get_pyramid(im)
+        if pyramid is None:
+            return None
+        for p, limg in self.lutims:
+            if p is pyramid:
+                return limg
+        live = self.get_pyramids() + [conv for _, _, conv in self.dom_pyramids]
+        for p, limg in self.lutims:
+            if not any(p is q for q in live):
+                self.tiles.drop(limg.uid)
+        self.lutims = [(p, limg) for p, limg in self.lutims if any(p is q for q in live)]
+        if self.domain == "twtt":
+            limg = lutimage(pyramid, self.tiles)
+        else:
+            idx = self.get_dindex()
+            limg = lutimage(pyramid, self.tiles, y0=idx.z0 - idx.dz/2, dy=idx.dz)
+        self.lutims.append((pyramid, limg))
+        return limg
+
+
+    # get_pyramid returns the displayed pyramid of an image artist - in the depth and elev domains, the full resolution level
+    # converted through the cached depth conversion index, so switching domains costs one gather
+    def get_pyramid(self, im):
+        pyramid = self.rdata.sPyramid if im is self.im_sim else self.rdata.dPyramid
+        if self.domain == "twtt" or pyramid is None:
+            return pyramid
+        idx = self.get_dindex()
+        for src, sidx, conv in self.dom_pyramids:
+            if src is pyramid and sidx is idx:
+                return conv
+        live = self.get_pyramids()
+        self.dom_pyramids = [e for e in self.dom_pyramids if e[1] is idx and any(e[0] is q for q in live)]
+        conv = [idx.apply(pyramid[0])]
+        self.dom_pyramids.append((pyramid, idx, conv))
+        return conv
+
+
+    # get_pyramids returns the pyramids held by rdata - the data and sim pyramids, and the data pyramids of cached inactive channels
+    def get_pyramids(self):
+        pyramids = [self.rdata.dPyramid, self.rdata.sPyramid] + [cached[2] for cached in self.rdata.chan_cache.values()]
+        return [p for p in pyramids if p is not None]
+
+
+    # get_dindex returns the depth conversion index of the display domain, recomputed by rdata if picks or data changed
+    def get_dindex(self):
+        return self.rdata.get_depth_index(self.domain, *self.domain_args)
+
+
+    # set_domain sets the display domain - twtt, depth or elev
+    # eps_r is the relative dielectric permittivity of all units beneath the surface, or a list with one value per unit bounded by the subsurface horizons
+    def set_domain(self, domain, eps_r=3.15, horizons=None):
+        if domain != "twtt":
+            # compute the index first, so an invalid conversion leaves the display unchanged
+            self.rdata.get_depth_index(domain, eps_r, horizons)
+        self.domain = domain
+        self.domain_args = (eps_r, horizons)
+        self.dom_pyramids = []
+
+
+    # get_ybounds returns the [bottom, top] y axis limits of the full profile in the display domain
+    def get_ybounds(self):
+        if self.domain == "twtt":
+            return [self.rdata.snum, 0]
+        return self.get_dindex().get_extent()
+
+
+    # get_horizon_y returns the y axis values of a horizon in the display domain
+    def get_horizon_y(self, horizon):
+        if self.domain == "twtt":
+            return self.rdata.pick.horizons[horizon]
+        return self.get_dindex().from_samples(self.rdata.pick.horizons[horizon])
+
+
+# quantize is a function to quantize a dB array to uint16 levels 1 through levels - 1, with nodata as level zero
+def quantize(arr, lo, scale, levels=levels):
+    out = np.empty(arr.shape, dtype=np.uint16)
+    for t0 in range(0, arr.shape[1], chunk_size):
+        blk = np.asarray(arr[:, t0:t0 + chunk_size], dtype=np.float32)
+        tmp = (blk - np.float32(lo)) * np.float32(scale)
+        np.clip(tmp, 0, levels - 2, out=tmp)
+        np.rint(tmp, out=tmp)
+        tmp += 1
+        tmp[np.isnan(blk)] = 0
+        out[:, t0:t0 + chunk_size] = tmp
+    return out
+
+
+# decimate is a function to block-average quantized levels by factors fr (rows) and fc (cols), ignoring nodata - blocks of only nodata remain nodata
+def decimate(q, fr, fc):
+    if fr == fc == 1:
+        return q
+    redges = np.arange(0, q.shape[0], fr)
+    cedges = np.arange(0, q.shape[1], fc)
+    total = np.add.reduceat(np.add.reduceat(q, cedges, axis=1, dtype=np.uint32), redges, axis=0)
+    count = np.add.reduceat(np.add.reduceat(q > 0, cedges, axis=1, dtype=np.uint32), redges, axis=0)
+    return ((total + count // 2) // np.maximum(count, 1)).astype(np.uint16)
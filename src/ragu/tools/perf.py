@@ -0,0 +1,127 @@
+# RAGU - Radar Analysis Graphical Utility
+#
+# copyright © 2020 btobers <tobers.brandon@gmail.com>
+#
+# distributed under terms of the GNU GPL3.0 license
+"""
+perf module records wall time, cpu time, peak memory and array shapes for ingest, processing and export steps.
+recording is off by default - when enabled, each step decorated with timed is appended to a structured trace,
+and optionally written as json lines to a trace file
+"""
+### imports ###
+import os, time, json, datetime, functools, tracemalloc
+import numpy as np
+import pandas as pd
+
+# recording state
+enabled = False
+# json lines trace file path
+fpath = None
+# list of dict, recorded steps this session
+records = []
+# stack of running peak memory for nested timed steps
+_stack = []
+
+
+# enable is a function to start recording timed steps, optionally appending each record to a json lines file
+def enable(trace_path=None):
+    global enabled, fpath
+    enabled = True
+    fpath = trace_path
+    if fpath:
+        os.makedirs(os.path.dirname(os.path.abspath(fpath)), exist_ok=True)
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+# disable is a function to stop recording timed steps
+def disable():
+    global enabled
+    enabled = False
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+# reset_peak is a function to reset the traced memory peak to the current traced memory
+# tracemalloc.reset_peak requires python 3.9 - on earlier versions the peak is not reset, so step peaks are upper bounds since tracing started
+def reset_peak():
+    if hasattr(tracemalloc, "reset_peak"):
+        tracemalloc.reset_peak()
+
+
+# get_shape is a function to return the shape of an array, or of the processed data array of a garlic object
+def get_shape(obj):
+    if isinstance(obj, np.ndarray):
+        return list(obj.shape)
+    proc = getattr(obj, "proc", None)
+    if proc is not None and getattr(proc, "curr_amp", None) is not None:
+        return list(proc.curr_amp.shape)
+    if getattr(obj, "dat", None) is not None and hasattr(obj.dat, "shape"):
+        return list(obj.dat.shape)
+    return None
+
+
+# timed is a decorator to record a step each time the function is called while recording is enabled
+# stage defaults to the module and qualified name of the function
+def timed(stage=None):
+    def decorator(func):
+        name = stage or "{}.{}".format(func.__module__.split(".")[-1], func.__qualname__)
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return func(*args, **kwargs)
+            shapes = [s for s in (get_shape(a) for a in args) if s is not None]
+            # fold the enclosing step's peak so far before resetting the peak for this step
+            cur, peak = tracemalloc.get_traced_memory()
+            if _stack:
+                _stack[-1] = max(_stack[-1], peak)
+            reset_peak()
+            _stack.append(cur)
+            t0, c0 = time.perf_counter(), time.process_time()
+            try:
+                out = func(*args, **kwargs)
+            finally:
+                wall, cpu = time.perf_counter() - t0, time.process_time() - c0
+                peak = max(_stack.pop(), tracemalloc.get_traced_memory()[1])
+                if _stack:
+                    _stack[-1] = max(_stack[-1], peak)
+                reset_peak()
+            record({"stage": name,
+                    "time": datetime.datetime.now().isoformat(timespec="seconds"),
+                    "wall": wall,
+                    "cpu": cpu,
+                    "mem": int(peak - cur),
+                    "in": shapes,
+                    "out": get_shape(out) or (get_shape(args[0]) if args else None)})
+            return out
+        return wrapper
+    return decorator
+
+
+# record is a function to append a step record to the trace
+def record(rec):
+    records.append(rec)
+    if fpath:
+        with open(fpath, "a") as f:
+            f.write(json.dumps(rec) + "\n")
+
+
+# read is a function to read a json lines trace file
+def read(trace_path):
+    with open(trace_path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+# summary is a function to return a table of calls, total and mean wall time, total cpu time and maximum peak memory per stage
+def summary(recs=None):
+    recs = records if recs is None else recs
+    if not recs:
+        return pd.DataFrame(columns=["calls", "wall [s]", "mean [s]", "cpu [s]", "mem [MB]"])
+    df = pd.DataFrame(recs)
+    out = df.groupby("stage", sort=False).agg(**{"calls": ("wall", "size"),
+                                                "wall [s]": ("wall", "sum"),
+                                                "mean [s]": ("wall", "mean"),
+                                                "cpu [s]": ("cpu", "sum"),
+                                                "mem [MB]": ("mem", "max")})
+    out["mem [MB]"] /= 1e6
+    return out.sort_values("wall [s]", ascending=False)
@@ -0,0 +1,239 @@
+# RAGU - Radar Analysis Graphical Utility
+#
+# copyright © 2020 btobers <tobers.brandon@gmail.com>
+#
+# distributed under terms of the GNU GPL3.0 license
+"""
+surface module contains vectorized surface and first-break detection functions.
+detection is run over chunks of traces so that memory use is bounded by the chunk size rather than the full radargram
+"""
+### imports ###
+from ragu.tools import lazy
+import numpy as np
+
+ndimage = lazy.load("scipy.ndimage")
+
+# default number of traces to process at once
+chunk_size = 2048
+
+
+# chunks is a generator function to return slices over the trace axis of an array
+def chunks(tnum, chunk=chunk_size):
+    for _i in range(0, tnum, chunk):
+        yield slice(_i, min(_i + chunk, tnum))
+
+
+# window_gather is a function to gather the samples within a window centered on idx for each trace
+# returns (winsize x tnum) array of samples, nan outside the data or where idx is nan, and the first sample of each window
+def window_gather(dat, idx, winsize):
+    idx = np.asarray(idx, dtype=float)
+    valid = ~np.isnan(idx)
+    start = np.zeros(idx.shape[0], dtype=int)
+    start[valid] = idx[valid].astype(int) - int(winsize/2)
+    rows = start[None,:] + np.arange(int(winsize))[:,None]
+    inside = (rows >= 0) & (rows < dat.shape[0]) & valid[None,:]
+    cols = np.broadcast_to(np.arange(dat.shape[1]), rows.shape)
+    out = np.full(rows.shape, np.nan)
+    out[inside] = dat[rows[inside], cols[inside]]
+    return out, start
+
+
+# window_argmax is a function to find the sample of maximum absolute value within a window centered on idx for each trace
+def window_argmax(dat, idx, winsize, chunk=chunk_size):
+    out = np.repeat(np.nan, dat.shape[1])
+    for s in chunks(dat.shape[1], chunk):
+        win, start = window_gather(dat[:,s], idx[s], winsize)
+        win = np.abs(win)
+        valid = ~np.isnan(win).all(axis=0)
+        out[s][valid] = start[valid] + np.nanargmax(win[:,valid], axis=0)
+    return out
+
+
+# window_threshold is a function to find the first sample within a window centered on idx for each trace
+# where the absolute derivative of the trace exceeds the trace standard deviation
+def window_threshold(dat, idx, winsize, chunk=chunk_size):
+    out = np.repeat(np.nan, dat.shape[1])
+    for s in chunks(dat.shape[1], chunk):
+        std = np.nanstd(dat[:,s], axis=0)
+        win, start = window_gather(dat[:,s], idx[s], winsize)
+        exceed = np.abs(np.gradient(win, axis=0)) > std[None,:]
+        valid = ~np.isnan(win).all(axis=0)
+        out[s][valid] = start[valid] + np.argmax(exceed[:,valid], axis=0)
+    return out
+
+
+# get_energy is a function to return a nan-free energy array for a chunk of traces
+def get_energy(dat):
+    return np.nan_to_num(np.abs(dat)**2)
+
+
+# max_power is a detection criterion returning the absolute value of each sample
+def max_power(dat):
+    return np.nan_to_num(np.abs(dat), nan=-np.inf)
+
+
+# pt_dpt is a detection criterion which weights the amplitude of each sample by the derivative preceding it - Pt * dPt-1/dt
+def pt_dpt(dat):
+    dat = np.nan_to_num(dat)
+    C = np.full(dat.shape, -np.inf)
+    C[1:,:] = dat[1:,:]*np.gradient(dat, axis=0)[:-1,:]
+    return C
+
+
+# sta_lta is a detection criterion returning the ratio of short-term to long-term average energy preceding each sample
+def sta_lta(dat, nsta=5, nlta=50):
+    E = get_energy(dat)
+    csum = np.vstack((np.zeros((1, E.shape[1])), np.cumsum(E, axis=0)))
+    idx = np.arange(E.shape[0]) + 1
+    sta = (csum[idx] - csum[np.maximum(idx - nsta, 0)]) / nsta
+    lta = (csum[idx] - csum[np.maximum(idx - nlta, 0)]) / nlta
+    C = np.full(E.shape, -np.inf)
+    # only evaluate once the long-term window is filled
+    C[nlta:] = sta[nlta:] / (lta[nlta:] + np.finfo(float).eps)
+    return C
+
+
+# energy_ratio is a detection criterion returning the ratio of energy in the window following each sample to the energy in the window preceding it
+def energy_ratio(dat, nwin=20):
+    E = get_energy(dat)
+    csum = np.vstack((np.zeros((1, E.shape[1])), np.cumsum(E, axis=0)))
+    idx = np.arange(E.shape[0])
+    post = csum[np.minimum(idx + nwin, E.shape[0])] - csum[idx]
+    pre = csum[idx] - csum[np.maximum(idx - nwin, 0)]
+    C = np.full(E.shape, -np.inf)
+    C[nwin:-nwin] = post[nwin:-nwin] / (pre[nwin:-nwin] + np.finfo(float).eps)
+    return C
+
+
+# dict of available detection criteria
+criteria = {"max": max_power,
+            "pt_dpt": pt_dpt,
+            "sta_lta": sta_lta,
+            "energy_ratio": energy_ratio}
+
+# dict of functions returning the number of samples about each sample that a detection criterion depends on, given the criterion kwargs
+halos = {"max": lambda: 0,
+         "pt_dpt": lambda: 2,
+         "sta_lta": lambda nsta=5, nlta=50: nlta,
+         "energy_ratio": lambda nwin=20: nwin}
+
+
+# get_criterion is a function to return the detection criterion array for a chunk of traces, setting samples above skip to -inf
+def get_criterion(dat, method="pt_dpt", skip=0, **kwargs):
+    if method not in criteria:
+        raise ValueError("surface.get_criterion error: unknown method " + str(method) + ", options are " + ", ".join(criteria))
+    C = criteria[method](dat, **kwargs)
+    C[:skip,:] = -np.inf
+    return C
+
+
+# band_criterion is a function to return the detection criterion within a band of winsize samples from start for each trace of a chunk, setting samples above skip to -inf
+# the criterion is computed over the band widened by the criterion halo, kept within the data so values match those of the full trace, rather than over the full trace
+def band_criterion(dat, start, winsize, method="pt_dpt", skip=0, **kwargs):
+    if method not in criteria:
+        raise ValueError("surface.band_criterion error: unknown method " + str(method) + ", options are " + ", ".join(criteria))
+    snum, tnum = dat.shape
+    wsize = min(winsize + 2*halos[method](**kwargs), snum)
+    wstart = np.clip(start - halos[method](**kwargs), 0, snum - wsize)
+    win = dat[wstart[None,:] + np.arange(wsize)[:,None], np.arange(tnum)[None,:]]
+    C = criteria[method](win, **kwargs)
+    rows = np.arange(winsize)[:,None]
+    C = np.take_along_axis(C, (start - wstart)[None,:] + rows, axis=0)
+    C[start[None,:] + rows < skip] = -np.inf
+    return C
+
+
+# detect is a function to return the surface sample for each trace as the argmax of the detection criterion, nan where no valid samples exist
+def detect(dat, method="pt_dpt", skip=0, chunk=chunk_size, **kwargs):
+    out = np.repeat(np.nan, dat.shape[1])
+    for s in chunks(dat.shape[1], chunk):
+        C = get_criterion(dat[:,s], method, skip, **kwargs)
+        valid = np.isfinite(C).any(axis=0)
+        out[s][valid] = np.argmax(C[:,valid], axis=0)
+    return out
+
+
+# viterbi is a function to find the path through a (nrow x tnum) criterion array with maximum summed criterion,
+# subject to a maximum jump of maxjump samples between adjacent traces
+# start optionally gives the sample number of the first row for each trace, for banded criterion arrays
+# returns the path sample number for each trace
+def viterbi(C, maxjump=5, start=None):
+    nrow, tnum = C.shape
+    if start is None:
+        start = np.zeros(tnum, dtype=int)
+    start = np.asarray(start, dtype=int)
+    rows = np.arange(nrow)
+    # traces at which the path restarts, where no row is reachable from the previous trace
+    seed = np.zeros(tnum, dtype=bool)
+    # accumulated score for each row and trace - back pointers are recovered from this along the path only
+    score = np.empty((nrow, tnum), dtype=np.float32)
+    score[:,0] = C[:,0]
+    for _t in range(1, tnum):
+        shift = start[_t] - start[_t - 1]
+        # sliding max over previous trace rows within maxjump of each row, padded so windows may extend past the band
+        pad = maxjump + abs(shift)
+        prev = np.concatenate((np.full(pad, -np.inf), score[:,_t - 1], np.full(pad, -np.inf)))
+        best = ndimage.maximum_filter1d(prev, size=2*maxjump + 1, mode="nearest")[pad + rows + shift]
+        # restart the score where the band jumps beyond maxjump or no row of the previous trace is finite
+        if not np.isfinite(best).any():
+            seed[_t] = True
+            best = 0
+        score[:,_t] = best + C[:,_t]
+
+    # backtrack from best final row
+    path = np.zeros(tnum, dtype=int)
+    path[-1] = np.argmax(score[:,-1])
+    for _t in range(tnum - 1, 0, -1):
+        if seed[_t]:
+            path[_t - 1] = np.argmax(score[:,_t - 1])
+            continue
+        # previous trace row within maxjump of current row
+        center = path[_t] + start[_t] - start[_t - 1]
+        lo, hi = max(0, center - maxjump), min(nrow, center + maxjump + 1)
+        path[_t - 1] = lo + np.argmax(score[lo:hi,_t - 1]) if lo < hi else np.clip(center, 0, nrow - 1)
+    return path + start
+
+
+# normalize is a function to scale a criterion array from zero to one for each trace, setting non-finite values to -1
+def normalize(C):
+    valid = np.isfinite(C)
+    C = np.where(valid, C, np.nan)
+    cmin = np.nanmin(np.where(valid, C, np.inf), axis=0)
+    cmax = np.nanmax(np.where(valid, C, -np.inf), axis=0)
+    rng = cmax - cmin
+    rng[~(rng > 0)] = 1
+    C = (C - cmin) / rng
+    C[~valid] = -1
+    return C
+
+
+# track is a function to return the surface sample for each trace which maximizes the detection criterion
+# subject to a maximum sample jump between adjacent traces
+# if center and halfwidth are provided, only samples within halfwidth of center (e.g. a dem or nav predicted surface) are searched
+def track(dat, method="max", maxjump=5, center=None, halfwidth=None, skip=0, chunk=chunk_size, **kwargs):
+    snum, tnum = dat.shape
+    if center is None:
+        start = None
+        C = np.zeros((snum, tnum), dtype=np.float32)
+    else:
+        # fill any gaps in the predicted surface
+        center = np.asarray(center, dtype=float)
+        valid = ~np.isnan(center)
+        if not valid.any():
+            raise ValueError("surface.track error: predicted surface is all nan")
+        x = np.arange(tnum)
+        center = np.interp(x, x[valid], center[valid])
+        winsize = 2*int(halfwidth) + 1
+        center = np.clip(center, int(halfwidth), snum - 1 - int(halfwidth))
+        start = center.astype(int) - int(halfwidth)
+        C = np.zeros((winsize, tnum), dtype=np.float32)
+
+    for s in chunks(tnum, chunk):
+        if center is None:
+            Cs = get_criterion(dat[:,s], method, skip, **kwargs)
+        else:
+            Cs = band_criterion(dat[:,s], start[s], winsize, method, skip, **kwargs)
+        # normalize each trace so that strong traces do not dominate the path
+        C[:,s] = normalize(Cs)
+
+    return viterbi(C, maxjump, start).astype(float)
@@ -8,40 +8,31 @@ utility functions for RAGU
 """
 ### imports ###
 from ragu.tools.constants import *
+from ragu.tools import surface, lazy
 import numpy as np
 import pandas as pd
-import geopandas as gpd
-import tkinter as tk
-import sys, h5py, fnmatch, copy
+import sys, fnmatch
+
+h5py = lazy.load("h5py")
 
 # get_srf is a function for auto-detecting a radargram surface horizon
-def get_srf(dat_array, sig_type=None):
+def get_srf(dat_array, sig_type=None, maxjump=None):
     if sig_type == "Chirp":
-        # take max power to define surface 
-        max_idx = np.nanargmax(dat_array[10:,:], axis = 0) + 10
-        # remove outliers
-        not_outlier = remove_outliers(max_idx)
-        # interpolate, ignoring outliers
-        x = np.arange(dat_array.shape[1])
-        return np.interp(x, x[not_outlier], max_idx[not_outlier])
+        # track max power to define surface, limiting jump between adjacent traces to 1% of the record length by default
+        if maxjump is None:
+            maxjump = max(1, dat_array.shape[0] // 100)
+        return surface.track(dat_array, "max", maxjump=maxjump, skip=10)
     elif sig_type == "Impulse":
-        C = np.zeros_like(dat_array)	# create empty criteria array to localize surface echo for each trace
-        gradient = np.gradient(dat_array, axis = 0) # find gradient of each trace in RGRAM
-
         # criteria for surface echo - indicator is Pt * dPt-1/dt, 
         # where P is the signal energy applied on each grame sample (t)
         # indicator weights energy of a sample by the derivative preceding it
-
-        # vectorized criteria calculation
-        C[1:,:] = dat_array[1:,:]*gradient[:-1,:]
-        C_max = np.argmax(C, axis = 0)	# find indices of max critera seletor for each column
-        return C_max
+        return surface.detect(dat_array, "pt_dpt")
 
 # remove_outliers is a function to remove outliers from an array
 # returns bool array
 def remove_outliers(array):
-    mean = np.mean(array)
-    standard_deviation = np.std(array)
+    mean = np.nanmean(array)
+    standard_deviation = np.nanstd(array)
     distance_from_mean = abs(array - mean)
     max_deviations = 2
     not_outlier = distance_from_mean < max_deviations * standard_deviation
@@ -57,6 +48,11 @@ def delete_savedPicks(fpath):
         f.close()
 
 
+# decide is a function to resolve a user decision from a policy - a callable prompt, called with args, or a fixed value for batch and headless use
+def decide(policy, *args):
+    return policy(*args) if callable(policy) else policy
+
+
 # list_insert is a function to return the element at which to insert a new item to a sorted list
 def list_insert_idx(list, n): 
     # search for the position 
@@ -73,47 +69,6 @@ def find_nearest(a, val):
     return idx
 
 
-# sort dictionary full of numpy arrays using array mean value
-def sort_array_dict(a, srf=None):
-    if len(a) > 1:
-        b = copy.deepcopy(a)
-        out = {}
-        sort_dict = {}
-        # if surface horizon, place first
-        if srf:
-            out[srf] = b[srf]
-            b.pop(srf, None)
-
-        # stack all arrays in dictionary
-        stacked = np.vstack((list(b.values())))
-        # see if an index is occupied with a value for all arrays
-        # if so, just sort all arrays based on value for that index
-        non_nan_cols_array = np.all(~np.isnan(stacked),axis=0)
-        if np.any(non_nan_cols_array):
-            idx = np.where(non_nan_cols_array)[0][0]
-            for key, arr in b.items():
-                sort_dict[key] = arr[idx]
-
-        else:
-            # sort array elements by row
-            row_sorted_arrays = np.argsort(stacked,axis=0).astype(np.float64)
-            # replace nan values
-            row_sorted_arrays[np.isnan(stacked)] = np.nan
-            # add up sorting to get sum and sort all arrays by the sum
-            total = np.nansum(row_sorted_arrays,axis=1)
-            for i, (key, arr) in enumerate(b.items()):
-                sort_dict[key] = total[i]
-
-        keys = [k for k, v in sorted(sort_dict.items(), key=lambda item: item[1])]
-        for key in keys:
-            out[key] = a[key]
-
-        return out
-
-    else:
-        return a
-
-
 # clump_array removing nan chunks
 def clump_array(a):
     return [a[s] for s in np.ma.clump_unmasked(np.ma.masked_invalid(a))]
@@ -150,29 +105,16 @@ def nan_array_sum(a, axis=0):
     return out
 
 
-def merge_paths(a):
-    """
-    merge picks from all segment paths in horizon dicitonary
-    INPUT:
-    a           dictionary containing impick path objects for each key 
-
-    OUTPUT:
-    (x,y)       tuple of x,y merged path data
-    """
-    l = list(a.values())
-    x = nan_array_sum(np.stack([path.x for path in l]))
-    y = nan_array_sum(np.stack([path.y for path in l]))
-    return (x,y)
-
-
-# compare_horizon_paths between two dictionaries
+# compare_horizon_paths between two dictionaries of compact horizon segments
 def compare_horizon_paths(dicta=None, dictb=None):
     out = True
     if len(dicta) == 0 & len(dictb) == 0:
         return True
     for horizon in dicta.keys():
         for seg in dicta[horizon].keys():
-            if nan_array_equal(dicta[horizon][seg].y, dictb[horizon][seg].y):
+            a = dicta[horizon][seg]
+            b = dictb[horizon][seg]
+            if (a.start, a.end) == (b.start, b.end) and nan_array_equal(a.samples, b.samples):
                 continue
             else:
                 out = False
@@ -245,18 +187,49 @@ def powdB2amp(array):
     return np.power(10, (array / 20))
 
 
+# dB_hist is a function to return the histogram (counts, bin edges) of finite values of a strided subsample of at most nmax elements of a 2D array
+# colour limits are read from the histogram with hist_percentile, rather than sorting the whole array for each percentile
+def dB_hist(array, nmax=2**20, bins=2048):
+    if array is None:
+        return None
+    array = np.asarray(array)
+    step = max(1, int(np.ceil(np.sqrt(array.size / nmax))))
+    sub = array[::step, ::step] if array.ndim == 2 else array.ravel()[::step**2]
+    sub = sub[np.isfinite(sub)]
+    if sub.size == 0:
+        return None
+    lo, hi = sub.min(), sub.max()
+    if lo == hi:
+        hi = lo + 1
+    return np.histogram(sub, bins=bins, range=(lo, hi))
+
+
+# hist_percentile is a function to return the qth percentile(s) of a histogram from dB_hist, interpolated within bins
+def hist_percentile(hist, q):
+    if hist is None:
+        return np.full(np.shape(q), np.nan) if np.ndim(q) else np.nan
+    counts, edges = hist
+    cdf = np.r_[0, np.cumsum(counts)] / counts.sum()
+    return np.interp(np.asarray(q) / 100, cdf, edges)
+
+
+# get_clim is a function to return percentile colour limits of a strided subsample of at most nmax elements of an array, for stretching a viewport
+def get_clim(array, q=(10, 99), nmax=2**16):
+    array = np.asarray(array)
+    if array.size == 0:
+        return None
+    step = max(1, int(np.ceil(np.sqrt(array.size / nmax))))
+    sub = array[::step, ::step] if array.ndim == 2 else array.ravel()
+    sub = sub[np.isfinite(sub)]
+    if sub.size == 0:
+        return None
+    return np.percentile(sub, q)
+
+
 # pkampwind
 def pkampwind(array, idx, windsize):
-    # loop through array columns and find peak greater than 1  row idx within window of given idx
-    # use gradient to find maximum index where absolute value of derivative is greater than 1 sigma
-    out = np.repeat(np.nan, array.shape[1])
-    grad = np.gradient(array, axis = 1)
-    std = np.std(array, axis = 0)
-    for _i in range(array.shape[1]):
-        if np.isnan(idx[_i]):
-            continue
-        out[_i] = int(idx[_i] - (windsize/2)) + np.argmax(np.abs(grad[int(idx[_i] - (windsize/2)):int(idx[_i] + (windsize/2)), _i]) > std[_i])
-    return out
+    # find first sample within window of given idx where absolute value of derivative along each trace is greater than 1 sigma
+    return surface.window_threshold(array, idx, windsize)
 
 
 def print_pickInfo(data, trace, sample, eps_r=3.15):
@@ -7,17 +7,21 @@
 basemap class is a tkinter frame which handles the RAGU basemap
 """
 ### imports ###
-from ragu.nav import navparse
-from ragu.tools import utils
+from ragu.nav import navindex
+from ragu.tools import lazy
 import numpy as np
 import tkinter as tk
-import rasterio as rio
 import os, glob
-from pyproj import Transformer
+from collections import OrderedDict
 import matplotlib as mpl
 mpl.use("TkAgg")
 import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+
+rio = lazy.load("rasterio")
+pyproj = lazy.load("pyproj")
+spatial = lazy.load("scipy.spatial")
 # try:
 #     plt.rcParams["font.family"] = "Times New Roman"
 # except:
@@ -45,6 +49,18 @@ class basemap(tk.Frame):
         # bind x-out to basemap_close()
         self.basemap_window.protocol("WM_DELETE_WINDOW", self.basemap_close)
         self.cmap = tk.StringVar(value="Greys_r")
+        # basemap raster dataset, kept open for windowed reads
+        self.bm_ds = None
+        self.bm_tiles = OrderedDict()
+        self.bm_view = None
+        self.lim_after = None
+        # basemap tile size [screen px] and number of tiles to cache
+        self.tile_size = 256
+        self.tile_cache = 128
+        # parallel track nav reader, and pending reads {future: file}
+        self.navindex = navindex.navindex(self.navcrs, self.body)
+        self.nav_futures = {}
+        self.nav_after = None
         self.setup()
 
 
@@ -93,7 +109,8 @@ class basemap(tk.Frame):
         self.map_fig_ax.set_visible(False)
         self.map_fig_ax.set(xlabel = "x [km]", ylabel = "y [km]")
         # initialize artists
-        self.track_ln, = self.map_fig_ax.plot([], [], "k.", ms=.1, picker=True)
+        self.track_ln = LineCollection([], colors="k", linewidths=.5, picker=5)
+        self.map_fig_ax.add_collection(self.track_ln)
         self.track_start_ln, = self.map_fig_ax.plot([], [], "go", ms=3, label="start")
         self.track_end_ln, = self.map_fig_ax.plot([], [], "ro", ms=3, label="end")
         # pack mpl figure in canvas window
@@ -104,6 +121,9 @@ class basemap(tk.Frame):
         self.basemap_state = 1
         self.draw_cid = self.map_fig.canvas.mpl_connect("draw_event", self.update_bg)
         self.pick_cid = self.map_fig.canvas.mpl_connect("pick_event", self.on_pick)
+        # read basemap window whenever view changes
+        self.map_fig_ax.callbacks.connect("xlim_changed", self.on_lim_change)
+        self.map_fig_ax.callbacks.connect("ylim_changed", self.on_lim_change)
 
 
     def ontop(self):
@@ -112,15 +132,8 @@ class basemap(tk.Frame):
 
 
     def set_vars(self):
-        # initialize arrays to hold track nav info
-        self.x = np.array(())
-        self.y = np.array(())
-        self.track_name = np.array(()).astype(str)
-        self.loaded_tracks = np.array(()).astype(str)
-        self.start_x = np.array(())
-        self.start_y = np.array(())
-        self.end_x = np.array(())
-        self.end_y = np.array(())
+        # initialize track index to hold track nav info
+        self.tracks = tracks()
         self.legend = None
         self.pick_loc = None
         self.profile_track = None
@@ -132,29 +145,24 @@ class basemap(tk.Frame):
         if map_path:
             print("Loading Basemap: ", map_path.split("/")[-1])
             try:
-                # read in basemap
-                with rio.open(map_path, mode="r") as dataset:
-                    # downsample if raster is too large
-                    fac = 1
-                    h = dataset.height
-                    w = dataset.width
-                    dx = dataset.transform[0]
-                    if h >= 1e3 or w >= 1e3:
-                        if dx < 10:
-                            fac = np.amin([h*1e-3,w*1e-3])
-                        else:
-                            fac = 2
-
-                    data = dataset.read(
-                        out_shape=(dataset.count, int(h // fac), int(w// fac)),
-                        resampling=rio.enums.Resampling.nearest
-                    )
-                    self.bmcrs = dataset.crs
-
-                # stack bands into numpy array
-                im = np.dstack((data))
-                if im.shape[-1] == 1:
-                    im = im.reshape(im.shape[0], -1)
+                # close any previously opened basemap raster
+                self.close_map()
+                # make sure raster has overviews so decimated reads are cheap
+                self.build_overviews(map_path)
+                # keep raster open - windows are read on demand as the view changes
+                self.bm_ds = rio.open(map_path, mode="r")
+                self.bmcrs = self.bm_ds.crs
+                self.bm_tiles = OrderedDict()
+                self.bm_view = None
+
+                # read coarsest overview of full raster to set color limits
+                dataset = self.bm_ds
+                fac = max(dataset.height, dataset.width) / self.tile_size
+                data = dataset.read(
+                    out_shape=(dataset.count, max(int(dataset.height // fac), 1), max(int(dataset.width // fac), 1)),
+                    resampling=rio.enums.Resampling.nearest
+                )
+                im = self.stack_bands(data)
                 cmin = np.nanmin(im)
                 cmax = np.nanmax(im)
                 self.bm_im.set_clim([cmin, cmax])
@@ -162,76 +170,195 @@ class basemap(tk.Frame):
                 # set bm image extent based on raster bounds - convert from m to km
                 self.bm_im.set_extent([_i*1e-3 for _i in[dataset.bounds.left, dataset.bounds.right,
                 dataset.bounds.bottom, dataset.bounds.top]])
+                self.map_fig_ax.set_xlim(dataset.bounds.left*1e-3, dataset.bounds.right*1e-3)
+                self.map_fig_ax.set_ylim(dataset.bounds.bottom*1e-3, dataset.bounds.top*1e-3)
                 # save un-zoomed view to toolbar
                 self.map_toolbar.push_current()
                 self.map_fig_ax.set_visible(True)
-                self.map_dataCanvas.draw()
+                # read current view at screen resolution
+                self.update_map()
 
             except Exception as err:
                 print("basemap load error: " + str(err))
                 pass
 
 
+    # build_overviews is a method to build raster overviews if the basemap does not already have them
+    # the raster is only ever opened read-only - overviews are written to an external .ovr file beside it, averaged to avoid aliasing
+    def build_overviews(self, map_path):
+        with rio.open(map_path, mode="r") as dataset:
+            if dataset.overviews(1) or max(dataset.height, dataset.width) <= self.tile_size:
+                return
+            # overview factors down to a single tile
+            facs = []
+            fac = 2
+            while max(dataset.height, dataset.width) / fac > self.tile_size / 2:
+                facs.append(fac)
+                fac *= 2
+            print("Building basemap overviews: ", facs)
+            ovr_path = map_path + ".ovr"
+            try:
+                # first level of the .ovr is the 2x reduction, read in row strips from the source
+                width = -(-dataset.width // 2)
+                height = -(-dataset.height // 2)
+                with rio.open(ovr_path, mode="w", driver="GTiff", width=width, height=height, count=dataset.count,
+                              dtype=dataset.dtypes[0], nodata=dataset.nodata, tiled=True, blockxsize=256, blockysize=256) as ovr:
+                    for row in range(0, height, 256):
+                        nrow = min(256, height - row)
+                        window = rio.windows.Window(0, 2*row, dataset.width, min(2*nrow, dataset.height - 2*row))
+                        data = dataset.read(window=window, out_shape=(dataset.count, nrow, width),
+                                            resampling=rio.enums.Resampling.average)
+                        ovr.write(data, window=rio.windows.Window(0, row, width, nrow))
+                    # remaining levels are overviews of the .ovr file itself
+                    if len(facs) > 1:
+                        ovr.build_overviews([_i // 2 for _i in facs[1:]], rio.enums.Resampling.average)
+            except Exception as err:
+                # read-only location or unsupported format - drop any partial .ovr and read without overviews
+                if os.path.isfile(ovr_path):
+                    try:
+                        os.remove(ovr_path)
+                    except OSError:
+                        pass
+                print("basemap overview error: " + str(err) + ". Continuing without overviews.")
+
+
+    # stack_bands is a method to stack raster bands read by rasterio into an image array
+    def stack_bands(self, data):
+        im = np.dstack((data))
+        if im.shape[-1] == 1:
+            im = im.reshape(im.shape[0], -1)
+        return im
+
+
+    # on_lim_change is a callback to schedule a basemap window read after the axis limits change
+    def on_lim_change(self, ax):
+        if self.bm_ds is None or self.lim_after is not None:
+            return
+        # wait until pan/zoom settles, then read once
+        self.lim_after = self.basemap_window.after_idle(self.update_map)
+
+
+    # update_map is a method to read the basemap window covering the current axis limits at screen resolution
+    def update_map(self):
+        self.lim_after = None
+        dataset = self.bm_ds
+        if dataset is None:
+            return
+        # axis limits in raster units [m]
+        xlim = np.sort(self.map_fig_ax.get_xlim())*1e3
+        ylim = np.sort(self.map_fig_ax.get_ylim())*1e3
+        # axis size in screen pixels
+        bbox = self.map_fig_ax.get_window_extent()
+        px = max(bbox.width, 1)
+        # requested window in raster pixels, clipped to raster
+        win = rio.windows.from_bounds(xlim[0], ylim[0], xlim[1], ylim[1], transform=dataset.transform)
+        try:
+            win = win.intersection(rio.windows.Window(0, 0, dataset.width, dataset.height))
+        except rio.errors.WindowError:
+            return
+        # decimation factor (power of two to line up with overviews) giving at least screen resolution
+        fac = 2**int(np.floor(np.log2(max(win.width / px, 1))))
+        # tile indices covering the window at this decimation factor
+        span = self.tile_size * fac
+        c0 = int(win.col_off // span)
+        c1 = int(np.ceil((win.col_off + win.width) / span))
+        r0 = int(win.row_off // span)
+        r1 = int(np.ceil((win.row_off + win.height) / span))
+        view = (fac, r0, r1, c0, c1)
+        if view == self.bm_view:
+            return
+        self.bm_view = view
+
+        # stitch cached/read tiles into a single image
+        rows = []
+        for r in range(r0, r1):
+            rows.append(np.concatenate([self.get_tile(fac, r, c) for c in range(c0, c1)], axis=1))
+        im = np.concatenate(rows, axis=0)
+        # extent of stitched tiles in raster units
+        bounds = rio.windows.bounds(rio.windows.Window(c0*span, r0*span,
+                                                       min((c1*span), dataset.width) - c0*span,
+                                                       min((r1*span), dataset.height) - r0*span), dataset.transform)
+        self.bm_im.set_data(im)
+        self.bm_im.set_extent([bounds[0]*1e-3, bounds[2]*1e-3, bounds[1]*1e-3, bounds[3]*1e-3])
+        self.map_dataCanvas.draw_idle()
+
+
+    # get_tile is a method to return a basemap tile at a given decimation factor, reading from disk if not cached
+    def get_tile(self, fac, row, col):
+        key = (fac, row, col)
+        if key in self.bm_tiles:
+            # mark as recently used
+            self.bm_tiles.move_to_end(key)
+            return self.bm_tiles[key]
+        dataset = self.bm_ds
+        span = self.tile_size * fac
+        win = rio.windows.Window(col*span, row*span,
+                                 min(span, dataset.width - col*span), 
+                                 min(span, dataset.height - row*span))
+        data = dataset.read(
+            window=win,
+            out_shape=(dataset.count, max(int(np.ceil(win.height / fac)), 1), max(int(np.ceil(win.width / fac)), 1)),
+            resampling=rio.enums.Resampling.nearest
+        )
+        tile = self.stack_bands(data)
+        self.bm_tiles[key] = tile
+        # drop least recently used tiles
+        while len(self.bm_tiles) > self.tile_cache:
+            self.bm_tiles.popitem(last=False)
+        return tile
+
+
+    # close_map is a method to close the basemap raster
+    def close_map(self):
+        if self.bm_ds is not None:
+            self.bm_ds.close()
+            self.bm_ds = None
+        self.bm_tiles = OrderedDict()
+        self.bm_view = None
+
+
     # set_track is a method to pass the track name loaded in profile view to the basemap class
     def set_track(self, fn):
         self.profile_track = fn
 
 
     # set_nav is a method to update the navigation data plotted on the basemap
-    def set_nav(self, fn, navdf):
+    def set_nav(self, fn, navdf, fpath=None):
         # skip if track already loaded to basemap
-        if fn in self.track_name:
+        if fn in self.tracks:
             return
 
         # transform navcrs to basemap crs
-        xformer = Transformer.from_crs(crs_from=self.navcrs, crs_to=self.bmcrs.to_wkt())
+        xformer = pyproj.Transformer.from_crs(crs_from=self.navcrs, crs_to=self.bmcrs.to_wkt())
         x, y = xformer.transform(
-            navdf["lon"].to_numpy(),
-            navdf["lat"].to_numpy(),
+            np.asarray(navdf["lon"]),
+            np.asarray(navdf["lat"]),
         )
     
-        # convert from m to km
-        x = x*1e-3
-        y = y*1e-3
-        # add x and y coords to x and y coord arrays
-        self.x = np.append(self.x, x)
-        self.y = np.append(self.y, y)
-        # add name to array to match with x,y
-        self.track_name = np.append(self.track_name, np.repeat(fn, len(x)))
-        self.start_x = np.append(self.start_x, x[0])
-        self.start_y = np.append(self.start_y, y[0])
-        self.end_x = np.append(self.end_x, x[-1])
-        self.end_y = np.append(self.end_y, y[-1])
-        # add name to list to match with endpoints
-        self.loaded_tracks = np.append(self.loaded_tracks, fn)
+        # convert from m to km and add to track index
+        self.tracks.add(fn, x*1e-3, y*1e-3, fpath)
 
 
     # plot_tracks is a method to plot track geom
     def plot_tracks(self):
         buff = 1
-        # if track_viz variable is true, add all track points to appropriate lines
-        if self.track_viz.get():
-            # set track line data
-            self.track_ln.set_data(self.x, self.y)
-            # set track ending line data
-            self.track_start_ln.set_data(self.start_x, self.start_y)
-            self.track_end_ln.set_data(self.end_x, self.end_y)
-
-            x_range = [np.amin(self.x)- buff,np.amax(self.x)+ buff]
-            y_range = [np.amin(self.y)- buff,np.amax(self.y)+ buff]
-
-        # otherwise just set track points from last line to appropriate lines
+        if len(self.tracks) == 0:
+            return
+        # if track_viz variable is true, plot all tracks, otherwise just the track from last line
+        if self.track_viz.get() or self.profile_track not in self.tracks:
+            fns = None
         else:
-            # set track ending line data
-            idx = np.where(self.loaded_tracks == self.profile_track)[0]
-            self.track_start_ln.set_data(self.start_x[idx], self.start_y[idx])
-            self.track_end_ln.set_data(self.end_x[idx], self.end_y[idx])
-            # set track line data
-            idx = np.where(self.track_name == self.profile_track)[0]
-            self.track_ln.set_data(self.x[idx], self.y[idx])
-    
-            x_range = [np.amin(self.x[idx])- buff,np.amax(self.x[idx])+ buff]
-            y_range = [np.amin(self.y[idx])- buff,np.amax(self.y[idx])+ buff]
+            fns = [self.profile_track]
+        # set decimated track line data
+        self.track_ln.set_segments(self.tracks.get_segments(fns))
+        # set track ending line data
+        start, end = self.tracks.get_ends(fns)
+        self.track_start_ln.set_data(start[:,0], start[:,1])
+        self.track_end_ln.set_data(end[:,0], end[:,1])
+
+        xmin, xmax, ymin, ymax = self.tracks.get_bounds(fns)
+        x_range = [xmin - buff, xmax + buff]
+        y_range = [ymin - buff, ymax + buff]
         r = max(x_range[1]-x_range[0],y_range[1]-y_range[0])
         xl = np.median(x_range) - r
         xr = np.median(x_range) + r
@@ -252,18 +379,25 @@ class basemap(tk.Frame):
     # plot_idx is a method to plot the location of a click event on the datacanvas to the basemap
     def plot_idx(self, fn, idx):
         # basemap open, plot picked location regardless of picking state
-        if self.basemap_state == 1 and len(self.x) > 0:
+        if self.basemap_state == 1 and fn in self.tracks:
             # plot pick location on basemap
             if self.pick_loc:
                 self.pick_loc.remove()
-            self.pick_loc = self.map_fig_ax.scatter(self.x[self.track_name == fn][idx], 
-                                                    self.y[self.track_name == fn][idx], 
+            x, y = self.tracks.get(fn)
+            self.pick_loc = self.map_fig_ax.scatter(x[idx], y[idx], 
                                                     c="b", marker="X", zorder=3)
             self.blit()
 
         
     # basemap_close is a method to close the basemap window
     def basemap_close(self, event=None):
+        # stop any pending nav reads
+        if self.nav_after is not None:
+            self.basemap_window.after_cancel(self.nav_after)
+            self.nav_after = None
+        self.nav_futures = {}
+        self.navindex.shutdown()
+        self.close_map()
         self.basemap_window.destroy()
         self.basemap_state = 0
 
@@ -275,19 +409,12 @@ class basemap(tk.Frame):
     
     # clear_basemap is a method to clear the basemap 
     def clear_nav(self):
-        # clear arrays
-        self.track_name = np.array(()).astype(str)
-        self.loaded_tracks = np.array(()).astype(str)
-        self.x = np.array(())
-        self.y = np.array(())
-        self.start_x = np.array(())
-        self.start_y = np.array(())
-        self.end_x = np.array(())
-        self.end_y = np.array(())
+        # clear track index
+        self.tracks.clear()
         # set lines
-        self.track_ln.set_data(self.x, self.y)
-        self.track_start_ln.set_data(self.start_x, self.start_y)
-        self.track_end_ln.set_data(self.end_x, self.end_y)
+        self.track_ln.set_segments([])
+        self.track_start_ln.set_data([], [])
+        self.track_end_ln.set_data([], [])
 
         if self.legend:
             self.legend.remove()
@@ -338,6 +465,7 @@ class basemap(tk.Frame):
 
     # load all tracks within a directory to basemap
     def load_tracks(self, dir = False):
+        flist = []
         if dir:
             tmp_datPath = ""
             # select input file
@@ -347,45 +475,59 @@ class basemap(tk.Frame):
             # if input selected, clear impick canvas, ingest data and pass to impick
             if tmp_datPath:
                 # get list of data files in dir
-                flist = glob.glob(tmp_datPath + "/*")
+                flist = sorted(glob.glob(tmp_datPath + "/*"))
                 print(tmp_datPath)
 
         else: 
-            flist = ""
             # select input files
             flist = tk.filedialog.askopenfilenames(title="select files",
                                         initialdir=self.datPath, 
                                         multiple=True) 
-            if flist:
-                flist = list(flist)
-
-            # iterate through file list and retrieve navdat from proper getnav function
-        for f in flist:
-
-            if f.endswith("h5"):
-                navdf = navparse.getnav_oibAK_h5(f, self.navcrs, self.body)
-                fn = f.split("/")[-1].rstrip(".h5")
-            elif f.endswith("mat"):
-                try:
-                    navdf = navparse.getnav_cresis_mat(f, self.navcrs, self.body)
-                    fn = f.split("/")[-1].rstrip(".mat")
-                except:
-                    navdf = navparse.getnav_oibAK_h5(f, self.navcrs, self.body)
-                    fn = f.split("/")[-1].rstrip(".mat")
-            elif f.lower().endswith("dzg"):
-                navdf = navparse.getnav_gssi(f, self.navcrs, self.body)
-                fn = f.split("/")[-1].rstrip(".DZG")
-            elif f.endswith("tab"):
-                navdf = navparse.getnav_sharad(f, self.navcrs, self.body)
-                fn = f.split("/")[-1].rstrip("_geom.tab")
-            else:
-                continue
-            self.set_nav(fn, navdf)
+            flist = list(flist)
+
+        if not flist:
+            return
 
         # update datPath
-        self.datPath = os.path.dirname(os.path.abspath(f)) + "/"
-        # update extent
-        self.plot_tracks()
+        self.datPath = os.path.dirname(os.path.abspath(flist[-1])) + "/"
+
+        # tracks already in the nav index are added right away
+        cached, uncached = self.navindex.get_cached(flist)
+        for nav in cached:
+            self.set_nav(nav["fn"], nav, nav["fpath"])
+        if cached:
+            self.plot_tracks()
+
+        # remaining tracks are read in the process pool and streamed onto the map as they finish
+        if uncached:
+            print("Reading nav for {} tracks".format(len(uncached)))
+            self.nav_futures.update(self.navindex.submit(uncached))
+            if self.nav_after is None:
+                self.nav_after = self.basemap_window.after(100, self.poll_nav)
+
+
+    # poll_nav is a method to add tracks from finished nav reads to the basemap
+    def poll_nav(self):
+        self.nav_after = None
+        done = [fut for fut in self.nav_futures if fut.done()]
+        navs = []
+        for fut in done:
+            f = self.nav_futures.pop(fut)
+            try:
+                nav = fut.result()
+            except Exception as err:
+                print("basemap nav read error: " + f + " " + str(err))
+                continue
+            if nav:
+                navs.append((f, nav))
+                self.set_nav(nav["fn"], nav, nav["fpath"])
+        if navs:
+            self.navindex.put(navs)
+            self.plot_tracks()
+        if self.nav_futures:
+            self.nav_after = self.basemap_window.after(200, self.poll_nav)
+        else:
+            print("Basemap tracks loaded")
 
 
     # settings menu
@@ -419,10 +561,108 @@ class basemap(tk.Frame):
 
     # on_pick gets the picked track from user click
     def on_pick(self, event):
-        # determine which track was selected
-        xdata = event.mouseevent.xdata
-        idx = utils.find_nearest(self.x, xdata)
-        track = self.track_name[idx]
-        # pass track to impick
-        if (track != self.profile_track) and (tk.messagebox.askyesno("Load","Load track: " + str(track) + "?") == True):
-            self.to_gui(self.datPath, track)
\ No newline at end of file
+        # determine which track and trace were selected
+        track, idx = self.tracks.nearest(event.mouseevent.xdata, event.mouseevent.ydata)
+        if track is None:
+            return
+        # pass track and trace to gui - open track if not already loaded, then center profile on trace
+        if (track == self.profile_track) or (tk.messagebox.askyesno("Load","Load track: " + str(track) + "?") == True):
+            self.to_gui(self.tracks.fpath.get(track) or self.datPath, track, idx)
+
+
+# tracks class holds the nav of each loaded track as contiguous per-track arrays, 
+# with a kd-tree for nearest track/trace lookup
+class tracks():
+    def __init__(self, maxpts=200000):
+        # maximum number of vertices to draw across all tracks
+        self.maxpts = maxpts
+        self.clear()
+
+
+    def __contains__(self, fn):
+        return fn in self.xy
+
+
+    def __len__(self):
+        return len(self.xy)
+
+
+    # clear is a method to remove all tracks from the index
+    def clear(self):
+        # {track: (n,2) array of x,y}
+        self.xy = {}
+        # {track: offset of first point in concatenated point array}
+        self.offset = {}
+        # {track: radar data file path}
+        self.fpath = {}
+        self.npts = 0
+        self.tree = None
+
+
+    # add is a method to add a track to the index
+    def add(self, fn, x, y, fpath=None):
+        self.xy[fn] = np.column_stack((x, y)).astype(float)
+        self.fpath[fn] = fpath
+        self.offset[fn] = self.npts
+        self.npts += len(x)
+        # kd-tree is rebuilt lazily on next query
+        self.tree = None
+
+
+    # get is a method to return x and y arrays for a track
+    def get(self, fn):
+        xy = self.xy[fn]
+        return xy[:,0], xy[:,1]
+
+
+    # get_ends is a method to return track start and end points
+    def get_ends(self, fns=None):
+        fns = list(self.xy) if fns is None else fns
+        start = np.array([self.xy[fn][0] for fn in fns]).reshape(-1,2)
+        end = np.array([self.xy[fn][-1] for fn in fns]).reshape(-1,2)
+        return start, end
+
+
+    # get_bounds is a method to return the bounds of a set of tracks
+    def get_bounds(self, fns=None):
+        fns = list(self.xy) if fns is None else fns
+        mins = np.nanmin([np.nanmin(self.xy[fn], axis=0) for fn in fns], axis=0)
+        maxs = np.nanmax([np.nanmax(self.xy[fn], axis=0) for fn in fns], axis=0)
+        return mins[0], maxs[0], mins[1], maxs[1]
+
+
+    # get_segments is a method to return decimated track lines for a LineCollection
+    def get_segments(self, fns=None):
+        fns = list(self.xy) if fns is None else fns
+        npts = sum(len(self.xy[fn]) for fn in fns)
+        step = max(int(np.ceil(npts / self.maxpts)), 1)
+        segs = []
+        for fn in fns:
+            xy = self.xy[fn]
+            if step > 1 and len(xy) > 2:
+                # always keep the last point so track ends are drawn
+                idx = np.append(np.arange(0, len(xy) - 1, step), len(xy) - 1)
+                xy = xy[idx]
+            segs.append(xy)
+        return segs
+
+
+    # nearest is a method to return the track and trace nearest to a point
+    def nearest(self, x, y):
+        if self.npts == 0 or x is None or y is None:
+            return None, None
+        if self.tree is None:
+            xy = np.concatenate(list(self.xy.values()))
+            # leave nan nav points out of tree, keeping their global index
+            self.valid = np.flatnonzero(np.isfinite(xy).all(axis=1))
+            self.tree = spatial.cKDTree(xy[self.valid])
+            self.names = list(self.xy)
+            self.offsets = np.array([self.offset[fn] for fn in self.names])
+        if self.valid.size == 0:
+            return None, None
+        _, i = self.tree.query([x, y])
+        i = self.valid[i]
+        # map global point index back to track and trace
+        t = np.searchsorted(self.offsets, i, side="right") - 1
+        fn = self.names[t]
+        return fn, int(i - self.offsets[t])
@@ -15,9 +15,10 @@ mainGUI class is a tkinter frame which runs the RAGU master GUI
 ### imports ###
 from ragu.raguError import raguError
 from ragu.ui import impick, wvpick, basemap, notepad
-from ragu.tools import utils, export
+from ragu.tools import utils, export, perf
 from ragu.ingest import ingest
-import os, sys, scipy, glob, configparser, datetime, copy
+from ragu.radar import garlic, mosaic
+import os, sys, glob, configparser, datetime
 import numpy as np
 import pandas as pd
 import matplotlib as mpl
@@ -42,6 +43,14 @@ class mainGUI(tk.Frame):
             self.datPath = kwargs['datPath']
         else:
             self.datPath = self.conf["path"]["datPath"]
+        # set data precision policy
+        try:
+            garlic.set_precision(self.conf["param"].get("precision", "single") or "single")
+        except raguError as err:
+            print(err)
+        # record step timing and memory if set in config
+        if self.conf["param"].getboolean("perf", fallback=False):
+            perf.enable(os.path.join(os.path.dirname(os.path.abspath(kwargs['configPath'])), "perf.jsonl"))
         # initialize variables
         self.rdata = None
         self.f_loadName = ""
@@ -54,6 +63,11 @@ class mainGUI(tk.Frame):
         self.pick_vis.set(True)
         self.ann_vis = tk.BooleanVar()
         self.ann_vis.set(True)
+        self.vp_stretch = tk.BooleanVar()
+        self.vp_stretch.set(False)
+        # profile display domain, and relative dielectric permittivity of units between horizons for depth conversion
+        self.domain = tk.StringVar(value="twtt")
+        self.unit_eps_r = {}
         # dictionary to hold figure settings
         self.figsettings = {"cmap": tk.StringVar(value=self.conf["param"]["cmap"]),
                             "figsize": tk.StringVar(value="6.5,1.5"), 
@@ -131,6 +145,7 @@ class mainGUI(tk.Frame):
         openMenu = tk.Menu(fileMenu,tearoff=0)
         openMenu.add_command(label="Project", command=self.open_proj)
         openMenu.add_command(label="Data File    [Ctrl+O]", command=self.choose_dfile)
+        openMenu.add_command(label="Data Files (Mosaic)", command=self.choose_mosaic)
         openMenu.add_command(label="Basemap  [Ctrl+M]", command=self.init_bm)
         openMenu.add_command(label="Notepad", command=self.init_notepad)
 
@@ -149,6 +164,7 @@ class mainGUI(tk.Frame):
         pickExportMenu.add_command(label="Horizon", command=self.export_pick)
         pickExportMenu.add_command(label="All Horizons", command=lambda:self.export_pick(flag="all"))
         pickExportMenu.add_command(label="Merged Horizons  [Ctrl+S]", command=lambda:self.export_pick(flag="merged"))
+        pickExportMenu.add_command(label="Merged Horizons to Source Files", command=lambda:self.export_pick(flag="sources"))
         exportMenu.add_cascade(label="Picks", menu=pickExportMenu)
         exportMenu.add_command(label="Figure", command=self.export_fig)
         exportMenu.add_command(label="Processing Script", command=self.export_log)
@@ -188,6 +204,7 @@ class mainGUI(tk.Frame):
         srfMenu = tk.Menu(interpretMenu,tearoff=0)
         srfMenu.add_command(label="Define Horizon", command=self.srf_define)
         srfMenu.add_command(label="Auto-pick", command=self.srf_autopick)
+        srfMenu.add_command(label="Auto-pick from DEM", command=lambda:self.srf_autopick(dem=True))
         interpretMenu.add_cascade(label="Surface", menu=srfMenu)        
         exportMenu = tk.Menu(interpretMenu,tearoff=0)
         exportMenu.add_command(label="Horizon", command=self.export_pick)
@@ -222,6 +239,11 @@ class mainGUI(tk.Frame):
         ### view menu items ###
         viewMenu.add_checkbutton(label="Interpretations", onvalue=True, offvalue=False, variable=self.pick_vis, command=self.set_pick_vis)
         viewMenu.add_checkbutton(label="Labels", onvalue=True, offvalue=False, variable=self.ann_vis, command=self.set_ann_vis)
+        viewMenu.add_checkbutton(label="Viewport Contrast", onvalue=True, offvalue=False, variable=self.vp_stretch, command=self.set_vp_stretch)
+        viewMenu.add_separator()
+        viewMenu.add_radiobutton(label="Time", value="twtt", variable=self.domain, command=self.set_domain)
+        viewMenu.add_radiobutton(label="Depth", value="depth", variable=self.domain, command=self.set_domain)
+        viewMenu.add_radiobutton(label="Elevation", value="elev", variable=self.domain, command=self.set_domain)
 
         ### help menu items ###
         helpMenu.add_command(label="Instructions", command=self.help)
@@ -384,22 +406,12 @@ class mainGUI(tk.Frame):
                 self.wvpick.stepBackward()
 
 
-    # save_check is a method to check if picks have been saved - a bit messy (need to account for potential "srf" ingested upon data load)
+    # save_check is a method to check if picks have been saved - horizons ingested upon data load or imported from the saved pick file are marked as saved
     def save_check(self):
         if self.rdata:
-            # if horizons exist, but no output pick df
-            if (self.rdata.pick.get_pick_flag()) and (self.rdata.out is None):
-                horizons = list(self.rdata.pick.horizons.keys())
-                # if srf is only horizon
-                if "srf" in horizons and len(horizons) == 1:
-                    # if srf was not ingested upon data load rdata.srfElev will be all nan
-                    if np.isnan(self.rdata.srfElev).all():
-                        return False
-                    else:
-                        return True
-                # if non-srf horizons exist
-                else:
-                    return False
+            # if horizons have changed since load or last export
+            if (self.rdata.pick.get_dirty()) and (self.rdata.pick.get_pick_flag()):
+                return False
             # if no horizons exist or horizons already exported
             else:
                 return True
@@ -489,8 +501,21 @@ class mainGUI(tk.Frame):
             self.open_dfile(temp_loadName)
 
 
+    # choose_mosaic is a method to select consecutive data files to open as a single mosaicked profile
+    def choose_mosaic(self):
+        # save_check
+        if (self.save_check() == False) and (tk.messagebox.askyesno("Warning", "Discard unsaved picks?", icon = "warning") == False):
+            return
+
+        flist = tk.filedialog.askopenfilenames(initialdir = self.datPath, title = "select consecutive data files")
+        if flist:
+            flist = sorted(flist)
+            self.open_dfile(flist[0], flist=flist)
+
+
     # open_dat loads the data file and passes to other modules
-    def open_dfile(self, f_loadName=None, switch=False, direction="Right"):
+    # if flist is passed, the listed files are mosaicked into a single profile
+    def open_dfile(self, f_loadName=None, switch=False, direction="Right", flist=None):
             # if input selected, clear impick canvas, ingest data and pass to impick
             try:
             # for fuck in ['bananas']:
@@ -504,7 +529,10 @@ class mainGUI(tk.Frame):
                     self.proj.save()
                     # ingest the data
                     self.igst = ingest(self.f_loadName)
-                    self.rdata = self.igst.read(self.conf["path"]["simPath"], self.conf["nav"]["crs"], self.conf["nav"]["body"])
+                    if flist and len(flist) > 1:
+                        self.rdata = mosaic.read(flist, self.conf["path"]["simPath"], self.conf["nav"]["crs"], self.conf["nav"]["body"])
+                    else:
+                        self.rdata = self.igst.read(self.conf["path"]["simPath"], self.conf["nav"]["crs"], self.conf["nav"]["body"])
                     try:
                         self.rdata.asep =  float(self.conf["output"]["asep"])
                         self.rdata.info["Antenna Separation [m]"] = self.rdata.asep
@@ -512,6 +540,7 @@ class mainGUI(tk.Frame):
                         pass
                     self.impick.clear_canvas()  
                     self.impick.set_vars()
+                    self.domain.set("twtt")
                     self.impick.load(self.rdata)
                     # set existing horizons
                     for horizon in self.rdata.pick.horizons.keys():
@@ -523,6 +552,12 @@ class mainGUI(tk.Frame):
                     self.impick.drawData()
                     self.impick.update_pickLabels()
                     self.impick.update_bg()
+                    # horizons ingested with the data are not unsaved picks
+                    self.rdata.pick.mark_saved()
+                    if self.debugState.get():
+                        print("resident data bytes:\t{}".format(self.rdata.get_nbytes()))
+                        if perf.enabled:
+                            print(perf.summary().to_string())
                     self.wvpick.set_vars()
                     self.wvpick.clear()
                     self.wvpick.set_data(self.rdata)
@@ -531,7 +566,7 @@ class mainGUI(tk.Frame):
                 # pass basemap to impick for plotting pick location
                 if self.map_loadName and self.basemap.get_state() == 1:
                     self.basemap.set_track(self.rdata.fn)
-                    self.basemap.set_nav(self.rdata.fn, self.rdata.navdf)
+                    self.basemap.set_nav(self.rdata.fn, self.rdata.navdf, self.f_loadName)
                     self.basemap.plot_tracks()
                     self.impick.get_basemap(self.basemap)
         
@@ -544,6 +579,7 @@ class mainGUI(tk.Frame):
                 tmpf = self.conf["path"]["outPath"] + self.rdata.fn + "_pk_" + self.conf["param"]["uid"] + ".csv"
                 if (os.path.isfile(tmpf)) and (tk.messagebox.askyesno("Load Picks", "Load pick file: {}?".format(tmpf), icon = "question") == True):
                     self.import_pick(tmpf)
+                    self.rdata.pick.mark_saved()
 
 
             # recall choose_dfile if wrong file type is selected 
@@ -647,10 +683,10 @@ class mainGUI(tk.Frame):
                 pk_file = ""
                 pk_file = tk.filedialog.askopenfilename(initialdir = self.conf["path"]["outPath"], title = "load picks", filetypes = (("comma separated value", "*.csv"),))
             if pk_file:
-                horizons = self.igst.import_pick(pk_file, self.conf["param"]["uid"])
+                horizons = self.igst.import_pick(pk_file, self.conf["param"]["uid"], confirm=tk.messagebox.askyesno)
                 for horizon in horizons:
                     self.impick.set_picks(horizon=horizon)
-                self.impick.blit()
+                self.impick.update_bg()
 
 
     # srf_define
@@ -692,18 +728,40 @@ class mainGUI(tk.Frame):
         self.rdata.set_srfElev()
 
 
-    # srf_autopick
-    def srf_autopick(self):
+    # srf_autopick - if dem, search only a band around the surface predicted from a dem sampled along track
+    def srf_autopick(self, dem=False):
+        if not self.f_loadName:
+            return
         srf = self.rdata.pick.get_srf()
         if srf is None:
             srf = "srf" 
         elif not tk.messagebox.askyesno("Warning","Surface horizon already exists. Overwrite with auto-pick surface?"):
             return
 
-        self.rdata.pick.horizons[srf] = utils.get_srf(np.abs(self.rdata.dat), self.rdata.info["Signal Type"])
-        self.srf_define(srf=srf)
+        kwargs = {}
+        if dem:
+            dem = tk.filedialog.askopenfilename(initialdir = self.conf["path"]["mapPath"], title = "select dem", filetypes = [("geotiff", ".tif"),
+                                                                                                                            ("all files",".*")])
+            if not dem:
+                return
+            halfwidth = tk.simpledialog.askinteger("input","search window half-width around dem-predicted surface (samples)", initialvalue=4*max(1, self.rdata.snum // 100))
+            if not halfwidth:
+                return
+            kwargs = {"dem": dem, "halfwidth": halfwidth}
+
+        try:
+            self.rdata.srf_autopick(horizon=srf, **kwargs)
+        except Exception as err:
+            print("srf_autopick error: " + str(err))
+            return
+        # clear existing surface horizon from canvas, keeping the auto-picked surface
+        if srf in self.impick.horizon_lns:
+            samples = self.rdata.pick.horizons[srf]
+            self.impick.rm_horizon(horizon=srf, verify=False)
+            self.rdata.pick.set_horizon(srf, samples)
+            self.rdata.pick.set_srf(srf)
         self.impick.set_picks(horizon=srf)
-        self.impick.blit()
+        self.impick.update_bg()
 
 
     # export_proj
@@ -746,8 +804,8 @@ class mainGUI(tk.Frame):
 
                 # end any active picking
                 self.end_pick()
-                # sort horizons by mean twtt in array
-                self.rdata.pick.horizons = utils.sort_array_dict(self.rdata.pick.horizons, self.rdata.pick.get_srf())
+                # sort horizons from shallowest to deepest
+                self.rdata.pick.sort_horizons()
                 # get horizon to export
                 horizon = None
                 horizons = list(self.rdata.pick.horizons)
@@ -798,7 +856,7 @@ class mainGUI(tk.Frame):
                     # ensure surface horizon is defined
                     self.srf_define()
                     # set output dataframe
-                    self.rdata.set_out(export.pick_math(self.rdata, self.eps_r.get(), self.conf["output"]["amp"], horizon=horizon, srf=self.rdata.pick.get_srf()))
+                    self.rdata.set_out(export.pick_math(self.rdata, self.eps_r.get(), self.conf["output"]["amp"], horizon=horizon, srf=self.rdata.pick.get_srf(), eps_r=self.ask_eps_r))
                     if self.conf["output"].getboolean("csv"):
                         export.csv(fn_out + ".csv", self.rdata.out)
                     if self.conf["output"].getboolean("gpkg"):
@@ -810,13 +868,35 @@ class mainGUI(tk.Frame):
                     for h in horizons:
                         fn_out = dir_out + "/" + self.rdata.fn + "_" + h + "_pk_" + self.conf["param"]["uid"]
                         # export picks for each horizon
-                        self.rdata.set_out(export.pick_math(self.rdata, self.eps_r.get(), self.conf["output"]["amp"], horizon=h, srf=self.rdata.pick.get_srf()))
+                        self.rdata.set_out(export.pick_math(self.rdata, self.eps_r.get(), self.conf["output"]["amp"], horizon=h, srf=self.rdata.pick.get_srf(), eps_r=self.ask_eps_r))
                         if self.conf["output"].getboolean("csv"):
                             export.csv(fn_out + ".csv", self.rdata.out)
                         if self.conf["output"].getboolean("gpkg"):
                             export.gpkg(fn_out + ".gpkg", self.rdata.out, self.conf["nav"]["crs"])
                         fn_out = dir_out + "/" + self.rdata.fn + "_pk_" + self.conf["param"]["uid"]
-                        
+
+
+                # if flag is sources, export merged horizons of a mosaic to each source file
+                elif flag == "sources":
+                    if not self.rdata.sources:
+                        print("Export error: {} is not a mosaic. Use merged horizon export.".format(self.rdata.fn))
+                        return
+                    self.srf_define()
+                    try:
+                        sources = mosaic.split_picks(self.rdata)
+                    except raguError as err:
+                        print("Export error: {}".format(err))
+                        return
+                    for src in sources:
+                        src_out = dir_out + "/" + src.fn + "_pk_" + self.conf["param"]["uid"]
+                        src.set_out(export.pick_math(src, self.eps_r.get(), self.conf["output"]["amp"], srf=src.pick.get_srf(), eps_r=self.ask_eps_r))
+                        if self.conf["output"].getboolean("csv"):
+                            export.csv(src_out + ".csv", src.out)
+                        if self.conf["output"].getboolean("gpkg"):
+                            export.gpkg(src_out + ".gpkg", src.out, self.conf["nav"]["crs"])
+                    self.rdata.pick.mark_saved()
+                    fn_out = dir_out + "/" + self.rdata.fn + "_pk_" + self.conf["param"]["uid"]
+
 
                 if self.conf["output"].getboolean("fig"):
                     self.impick.export_fig(fn_out + ".png")
@@ -825,6 +905,19 @@ class mainGUI(tk.Frame):
                     self.export_proj()
 
 
+    # ask_eps_r is a method to prompt for the relative dielectric permittivity of the unit between two horizons on pick export
+    # returns None if cancelled
+    def ask_eps_r(self, upper, lower, initial=3.15):
+        eps_r = None
+        while (eps_r is None) or (eps_r < 1):
+            eps_r = tk.simpledialog.askfloat("Dielectric Permittivity","Select a relative dielectric permittivity\nfor the unit between horizon <{}> and horizon <{}>".format(upper, lower), initialvalue=initial)
+            if eps_r is None:
+                return None
+            elif eps_r < 1:
+                print("raguWarning: A relative dielectric permittivity >=1 must be specified in order to export picks")
+        return eps_r
+
+
     # export_dat is a method to save processed radar data
     def export_dat(self, type="raw"):
         if self.f_loadName:
@@ -905,24 +998,34 @@ class mainGUI(tk.Frame):
                 # pass basemap to impick for plotting pick location
                 self.basemap.clear_nav()
                 self.basemap.set_track(self.rdata.fn)
-                self.basemap.set_nav(self.rdata.fn, self.rdata.navdf)
+                self.basemap.set_nav(self.rdata.fn, self.rdata.navdf, self.f_loadName)
                 self.basemap.plot_tracks()
                 self.impick.get_basemap(self.basemap)
 
 
-    # return selected track from basemap frame
-    def from_basemap(self, path, track):
-        # find matching file to pass to open_loc - ensure valid ftype
-        f = [_i for _i in os.listdir(path) if track in _i]
-        for _i in f:
-            try:
-                ingest(_i.split(".")[-1])
-                break
-            except Exception:
-                continue
+    # return selected track and trace from basemap frame
+    def from_basemap(self, path, track, trace=None):
+        # open track if not already loaded
+        if not (self.rdata and self.rdata.fn == track):
+            if (self.save_check() == False) and (tk.messagebox.askyesno("Warning", "Discard unsaved picks?", icon = "warning") == False):
+                return
+            if not os.path.isfile(path):
+                # find matching file to pass to open_loc - ensure valid ftype
+                f = [_i for _i in os.listdir(path) if track in _i]
+                for _i in f:
+                    try:
+                        ingest(_i.split(".")[-1])
+                        break
+                    except Exception:
+                        continue
+                path = os.path.join(path, _i)
+
+            # pass file to open_data
+            self.open_dfile(path)
 
-        # pass file to open_data
-        self.open_dfile(path + _i)
+        # center profile view on selected trace
+        if trace is not None and self.rdata and self.rdata.fn == track:
+            self.impick.center_trace(trace)
 
 
     # reset_wvpick passes picks from impick to wvpick
@@ -973,10 +1076,12 @@ class mainGUI(tk.Frame):
                 self.reset_wvpick()
             elif (self.tab == "Profile"):
                 # get updated picks from wvpick and pass back to impick if they differ
-                if not (utils.compare_horizon_paths(self.wvpick.get_horizon_paths(), self.impick.get_horizon_paths())) and \
+                if (self.wvpick.get_edit() > 0) and \
                         (tk.messagebox.askyesno("Import","Import optimized horizon interpretations?")):
                     self.impick.set_horizon_paths(self.wvpick.get_horizon_paths())
-                    self.impick.blit()
+                    self.impick.update_bg()
+                    # imported picks become the new baseline for waveform repicking
+                    self.wvpick.set_horizon_paths(self.impick.get_horizon_paths())
 
 
     # delete_datafilePicks is a method to clear subsurface picks saved to the data file
@@ -1003,23 +1108,18 @@ class mainGUI(tk.Frame):
                     if srf is None:
                         srf = "srf"
 
-                    # define surface horizon name to set index to zeros
-                    self.rdata.pick.horizons[srf] = np.zeros(self.rdata.tnum)
-                    self.srf_define(srf=srf)
+                    # apply sample shift to existing horizons, and define surface horizon name to set index to zeros
+                    tmp = {srf: np.zeros(self.rdata.tnum)}
+                    tmp.update({h: (arr - self.rdata.flags.sampzero) for h, arr in self.rdata.pick.horizons.items() if h != srf})
 
-                    # apply sample shift to existing horizons and update picks
-                    for h in self.rdata.pick.horizons:
-                        if h != srf:
-                            self.rdata.pick.horizons[h] -= self.rdata.flags.sampzero
-                    
                     # clear horizons from canvas and redraw shifted horizons
-                    tmp = copy.deepcopy(self.rdata.pick.horizons)
                     self.impick.rm_horizon(rm_all=True, verify=False)
                     for h in tmp.keys():
-                        self.rdata.pick.horizons[h] = tmp[h]
+                        self.rdata.pick.set_horizon(h, tmp[h])
                         self.impick.set_picks(h)
+                    self.srf_define(srf=srf)
 
-                    self.impick.blit()
+                    self.impick.update_bg()
                     procFlag = True
 
             elif arg == "flatten":
@@ -1030,13 +1130,13 @@ class mainGUI(tk.Frame):
 
                     # apply sample shift to existing horizons and update picks
                     # first copy horizons and remove them from impick cancas
-                    tmp = copy.deepcopy(self.rdata.pick.horizons)
+                    tmp = dict(self.rdata.pick.horizons)
                     self.impick.rm_horizon(rm_all=True, verify=False)
                     for h in tmp:
-                        self.rdata.pick.horizons[h] = tmp[h] - self.rdata.flags.sampzero
+                        self.rdata.pick.set_horizon(h, tmp[h] - self.rdata.flags.sampzero)
                         self.impick.set_picks(horizon=h)
 
-                    self.impick.blit()
+                    self.impick.update_bg()
                     procFlag = True
 
             elif arg == "vroll":
@@ -1180,10 +1280,14 @@ class mainGUI(tk.Frame):
 
             elif arg == "undo":
                 self.rdata.undo()
+                # undo and redo may switch channels
+                self.impick.update_chan()
                 procFlag = True
 
             elif arg == "redo":
                 self.rdata.redo()
+                # undo and redo may switch channels
+                self.impick.update_chan()
                 procFlag = True
 
             elif arg == "reset":
@@ -1196,6 +1300,8 @@ class mainGUI(tk.Frame):
                 exit(1)
 
             if procFlag:
+                if self.debugState.get() and perf.enabled:
+                    print(perf.summary().to_string())
                 self.impick.set_crange()
                 self.impick.drawData(force=True)
                 self.wvpick.clear()
@@ -1386,6 +1492,44 @@ class mainGUI(tk.Frame):
         self.impick.show_labels(vis=self.ann_vis.get())
 
 
+    def set_vp_stretch(self):
+        self.impick.set_vp_stretch(self.vp_stretch.get())
+
+
+    # set_domain is a method to display the profile in the twtt, depth or elev domain
+    # units beneath the surface are bounded by subsurface horizons - permittivity is asked once for each unit, the unit beneath the deepest horizon continuing the one above
+    def set_domain(self):
+        domain = self.domain.get()
+        if not self.f_loadName:
+            self.domain.set("twtt")
+            return
+        eps_r, horizons = self.eps_r.get(), None
+        if domain != "twtt":
+            self.srf_define()
+            if self.rdata.pick.get_srf() is None:
+                print("Display domain error: A surface horizon must be defined to display {} in {}.".format(self.rdata.fn, domain))
+                self.domain.set(self.impick.prof.domain)
+                return
+            order = self.rdata.pick.get_order()
+            horizons = order[1:]
+            if horizons:
+                eps_r = []
+                for upper, lower in zip(order, horizons):
+                    if (upper, lower) not in self.unit_eps_r:
+                        unit_eps_r = self.ask_eps_r(upper, lower, self.eps_r.get())
+                        if unit_eps_r is None:
+                            self.domain.set(self.impick.prof.domain)
+                            return
+                        self.unit_eps_r[(upper, lower)] = unit_eps_r
+                    eps_r.append(self.unit_eps_r[(upper, lower)])
+                eps_r.append(eps_r[-1])
+        try:
+            self.impick.set_domain(domain, eps_r, horizons)
+        except raguError as err:
+            print("Display domain error: {}".format(err))
+            self.domain.set(self.impick.prof.domain)
+
+
     def help(self):
         # help message box
         helpWindow = tk.Toplevel(self.parent)
@@ -7,7 +7,7 @@
 impick class is a tkinter frame which handles the RAGU profile view and radar data picking
 """
 ### imports ###
-from ragu.tools import utils, export
+from ragu.tools import utils, export, perf, lazy, lut
 from ragu.ui import basemap
 import numpy as np
 import tkinter as tk
@@ -18,7 +18,8 @@ import matplotlib.pyplot as plt
 from matplotlib.widgets import Cursor
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
 from cycler import cycler
-from scipy.interpolate import CubicSpline
+
+interpolate = lazy.load("scipy.interpolate")
 # try:
 #     plt.rcParams["font.family"] = "Times New Roman"
 # except:
@@ -38,6 +39,8 @@ class impick(tk.Frame):
         self.horVar = tk.StringVar()
         self.segVar = tk.IntVar()
         self.color = tk.StringVar()
+        # stretch colour limits to the data in view
+        self.vp_stretch = False
         self.setup(fs)
 
 
@@ -74,6 +77,9 @@ class impick(tk.Frame):
         button = tk.Radiobutton(infoFrame,text="1", variable=self.chan, value=1, command=self.switchChan)
         button.pack(side="left")
         self.button_tip(self.parent, button, text="Radar channel 1")
+        button = tk.Radiobutton(infoFrame,text="avg", variable=self.chan, value=-1, command=self.switchChan)
+        button.pack(side="left")
+        self.button_tip(self.parent, button, text="Incoherent average of radar channels")
         tk.ttk.Separator(infoFrame,orient="vertical").pack(side="left", fill="both", padx=10, pady=4)
 
         # add entry box for peak finder window size
@@ -218,7 +224,11 @@ class impick(tk.Frame):
         self.pick_surf = None
 
         self.pick_state = False
-        self.pyramid = None
+        # profile view images, set on load
+        self.prof = None
+        # pending render of the hidden image
+        self.render_after = None
+        self.startbutton.config(state="normal")
 
         # image colormap bounds
         self.data_cmin = None
@@ -230,10 +240,9 @@ class impick(tk.Frame):
         self.data_crange = None
         self.sim_crange = None
 
-        # initialize path objects #
+        # initialize path objects - saved picks are held by rdata.pick #
         self.tmp_horizon_path = path([],[])                                     # temporary path object to hold horizon segment currently being picked
         self.edit_path = None                                                   # temporary path object to hold horizon segment currently being edited
-        self.horizon_paths = {}                                                 # dictionary to hold horizon paths for saved picks
 
         # initialize line objects
         self.tmp_horizon_ln = None
@@ -241,6 +250,10 @@ class impick(tk.Frame):
         self.horizontal_line = None
         self.vertical_line = None
 
+        # pending crosshair redraw and latest cursor location
+        self.motion_after = None
+        self.motion_xy = None
+
         # initialize list of pick annotations
         self.ann_list = []
         self.horizons = []
@@ -270,6 +283,7 @@ class impick(tk.Frame):
     def load(self, rdata):       
         # receive the rdata
         self.rdata = rdata
+        self.update_chan()
 
         # pack the datacanvas in data frame
         self.dataCanvas.get_tk_widget().pack(in_=self.dataFrame, side="bottom", fill="both", expand=1) 
@@ -278,14 +292,10 @@ class impick(tk.Frame):
         self.ax.set_title(self.rdata.fn)
         self.ax.set(xlabel = "Trace", ylabel = "Sample")
 
-        # initialize data and clutter images with np.ones - set data in drawData
-        self.im_dat  = self.ax.imshow(np.ones((100,100)), aspect="auto", 
-                        extent=[0, self.rdata.tnum, self.rdata.snum, 0])
-        self.im_sim  = self.ax.imshow(np.ones((100,100)), aspect="auto", 
-                        extent=[0, self.rdata.tnum, self.rdata.snum, 0])
-
-        # set clutter sim visibility to false
-        self.im_sim.set_visible(False)
+        # initialize data and clutter images - profile renders the viewport of each through a colour lookup table, with the clutter sim hidden
+        self.prof = lut.profile(self.ax, self.rdata)
+        self.im_dat = self.prof.im_dat
+        self.im_sim = self.prof.im_sim
         # disable im toggle if no sim
         if not self.rdata.flags.sim:
             self.simRadio.config(state="disabled")
@@ -302,6 +312,8 @@ class impick(tk.Frame):
 
         # connect ylim_change with event to update image pyramiding based on zoom - have to do this on load, since clear_canvas removes axis callbacks
         self.ylim_cid = self.ax.callbacks.connect("ylim_changed", self.drawData)
+        # connect xlim_change to render the image for the viewport
+        self.xlim_cid = self.ax.callbacks.connect("xlim_changed", self.render)
 
         # update toolbar to save axes extents
         self.toolbar.update()
@@ -310,23 +322,17 @@ class impick(tk.Frame):
         self.set_crange()
 
 
-    # set radar and sim array bounds for setting image color limits - just doing this once based off original arrays, not pyramids
+    # set radar and sim array bounds for setting image color limits - read from histograms of subsampled arrays, built alongside the pyramids
     def set_crange(self):
         # get clim bounds - take 10th percentile for min, ignore nd values
-        self.mindB_data = np.nanpercentile(self.rdata.proc.get_curr_dB(),10)
-        self.maxdB_data = np.nanpercentile(self.rdata.proc.get_curr_dB(),99)
-        # self.maxdB_data = np.nanmax(self.rdata.proc.get_curr_dB())
+        (self.mindB_data, self.maxdB_data), sim = self.prof.set_crange()
 
-        if self.rdata.flags.sim:
-            self.mindB_sim = np.floor(np.nanpercentile(self.rdata.sim,10))
-            self.maxdB_sim = np.nanmax(self.rdata.sim)
+        if sim is not None:
+            self.mindB_sim, self.maxdB_sim = sim
             self.sim_crange = self.maxdB_sim - self.mindB_sim
-            self.im_sim.set_clim([self.mindB_sim, self.maxdB_sim])
 
         # get colormap range
         self.data_crange = self.maxdB_data - self.mindB_data
-        # update color limits
-        self.im_dat.set_clim([self.mindB_data, self.maxdB_data])
 
         # set slider bounds - use data clim values upon initial load
         self.s_cmin.valmin = self.mindB_data - (self.data_crange/2)
@@ -389,29 +395,60 @@ class impick(tk.Frame):
         self.cmap_update()
 
 
+    # set_vp_stretch is a method to toggle stretching colour limits to the data in view - off restores the slider colour limits
+    def set_vp_stretch(self, state):
+        self.vp_stretch = state
+        if not hasattr(self, "rdata"):
+            return
+        if state:
+            self.prof.stretch_view()
+        else:
+            self.cmap_update()
+        self.dataCanvas.draw()
+
+
+    # render is a method to render the visible image for the viewport, stretching colour limits to the viewport first when enabled
+    # the hidden image is rendered once idle, so its tiles are cached for toggling between data and sim
+    def render(self, event=None):
+        self.prof.render(self.vp_stretch)
+        if self.rdata.flags.sim and self.render_after is None:
+            self.render_after = self.after_idle(self.render_hidden)
+
+
+    # render_hidden is a method to render the hidden image for the viewport
+    def render_hidden(self):
+        self.render_after = None
+        self.prof.render_hidden()
+
+
+    # set_domain is a method to display the profile in the twtt, depth or elev domain
+    # eps_r is the relative dielectric permittivity of all units beneath the surface, or a list with one value per unit bounded by the subsurface horizons
+    # picking is only available in the twtt domain
+    def set_domain(self, domain, eps_r=3.15, horizons=None):
+        self.prof.set_domain(domain, eps_r, horizons)
+        if domain != "twtt" and self.get_pickState():
+            self.set_pickState(state=False)
+        self.startbutton.config(state="normal" if domain == "twtt" else "disabled")
+        for horizon in self.horizon_lns:
+            self.horizon_lns[horizon].set_ydata(self.prof.get_horizon_y(horizon))
+        self.update_pickLabels()
+        self.set_axes()
+        self.ax.set_xlim(0, self.rdata.tnum)
+        self.ax.set_ylim(*self.prof.get_ybounds())
+        self.drawData(force=True)
+        self.update_bg()
+
+
     # method to draw radar data
     def drawData(self, force=False, event=None):
         # Get data display window size in inches
         w,h = self.fig.get_size_inches()*self.fig.dpi
-        # choose pyramid
-        p = -1
-        for i in range(len(self.rdata.dPyramid)-1, -1, -1):
-            if(self.rdata.dPyramid[i].shape[0] > h):
-                p = i
-                break
 
         # set flag to detect if canvas needs redrawing
         flag = False
 
-        # if ideal pyramid level changed, update image
-        if self.pyramid != p or force:
-            self.pyramid = p
-            if len(self.rdata.dPyramid[self.pyramid].shape) == 3:
-                self.im_dat.set_data(self.rdata.dPyramid[self.pyramid][:,:,self.chan.get()])
-            else:
-                self.im_dat.set_data(self.rdata.dPyramid[self.pyramid][:,:])
-            if self.rdata.flags.sim:
-                self.im_sim.set_data(self.rdata.sPyramid[self.pyramid][:,:])
+        # choose pyramid for the canvas height - if ideal pyramid level changed, update image
+        if self.prof.set_level(h) or force:
             flag = True
 
         # update cmap if necessary
@@ -420,12 +457,25 @@ class impick(tk.Frame):
             self.im_sim.set_cmap(self.cmap)
             flag = True
 
+        # render the viewport of the visible image
+        self.render()
+
         if flag:
             self.dataCanvas.draw()
 
 
     # set axis labels
     def set_axes(self):
+        # secondary twtt and depth axes follow the sample axis - depth and elev domains are labeled on the primary axis
+        if self.prof.domain != "twtt":
+            self.ax.set_ylabel("Depth [m]" if self.prof.domain == "depth" else "Elevation [m]")
+            self.secaxy0.set_visible(False)
+            self.secaxy1.set_visible(False)
+        else:
+            self.ax.set_ylabel("Sample")
+            self.secaxy0.set_visible(True)
+            self.secaxy1.set_visible(True)
+
         # update twtt and depth (subradar dist.)
         if self.rdata.dt < 1e-9:
             self.secaxy0.set_ylabel("TWTT [ns]")
@@ -456,14 +506,40 @@ class impick(tk.Frame):
     # method to zoom to full image extent
     def fullExtent(self):
         self.ax.set_xlim(0, self.rdata.tnum)
-        self.ax.set_ylim(self.rdata.snum, 0)
+        self.ax.set_ylim(*self.prof.get_ybounds())
         self.set_axes()
         self.dataCanvas.draw()
 
 
+    # center_trace is a method to center the profile view on a trace, keeping the current zoom width
+    def center_trace(self, trace):
+        if not self.rdata or trace < 0 or trace >= self.rdata.tnum:
+            return
+        xlim = self.ax.get_xlim()
+        width = abs(xlim[1] - xlim[0])
+        # zoom in if showing full extent
+        if width >= self.rdata.tnum:
+            width = self.rdata.tnum / 4
+        x0 = np.clip(trace - width / 2, 0, self.rdata.tnum - width)
+        self.ax.set_xlim(x0, x0 + width)
+        # update along-track distance axis to match
+        dist = self.rdata.navdf["dist"].to_numpy()
+        if self.secaxx.get_visible() and not np.isnan(dist).all():
+            scale = 1e-3 if dist[-1] >= 1e3 else 1
+            self.secaxx.set_xlim(np.interp([x0, x0 + width], np.arange(self.rdata.tnum), dist*scale))
+        # mark trace with crosshair
+        self.vertical_line.set_xdata([trace])
+        self.vertical_line.set_visible(True)
+        self.dataCanvas.draw()
+        # plot trace location on basemap
+        if self.basemap and self.basemap.get_state() == 1:
+            self.basemap.plot_idx(self.rdata.fn, trace)
+
+
     # method to vertically clip rgam for export
     def verticalClip(self, top=0.0, bottom = 0.5):
-        self.ax.set_ylim(self.rdata.snum*bottom, self.rdata.snum*top)
+        b, t = self.prof.get_ybounds()
+        self.ax.set_ylim(t + (b - t)*bottom, t + (b - t)*top)
         ylim2 = self.secaxy0.get_ylim()
         ylim3 = self.secaxy1.get_ylim()
         self.secaxy0.set_ylim(ylim2[0]*bottom,ylim2[0]*top)
@@ -528,12 +604,15 @@ class impick(tk.Frame):
         if xlimb1[1] > self.rdata.tnum:
             xlimb1[1] = self.rdata.tnum
             xlimb2[1] = self.rdata.navdf["dist"].iloc[-1]*1e-3
-        if ylimb1[0] > self.rdata.snum:
-            ylimb1[0] = self.rdata.snum
+        # y increases down the profile in the twtt and depth domains, and up in the elev domain
+        bottom, top = self.prof.get_ybounds()
+        s = 1 if bottom > top else -1
+        if s*(ylimb1[0] - bottom) > 0:
+            ylimb1[0] = bottom
             ylimb2[0] = self.rdata.snum*self.rdata.dt
             ylimb3[0] = utils.twtt2depth(self.rdata.snum*self.rdata.dt, np.nanmean(self.rdata.asep), self.eps_r)
-        if ylimb1[1] < 0:
-            ylimb1[1] = 0
+        if s*(ylimb1[1] - top) < 0:
+            ylimb1[1] = top
             ylimb2[1] = 0
             ylimb3[1] = 0
         self.ax.set_xlim(xlimb1[0], xlimb1[1])
@@ -579,12 +658,15 @@ class impick(tk.Frame):
         ylim1 = self.ax.get_ylim()
         ylim2 = self.secaxy0.get_ylim()
         ylim3 = self.secaxy1.get_ylim()
-        if ylim1[1] > 0:
+        # y increases down the profile in the twtt and depth domains, and up in the elev domain
+        bottom, top = self.prof.get_ybounds()
+        s = 1 if bottom > top else -1
+        if s*(ylim1[1] - top) > 0:
             step1 = (ylim1[0] - ylim1[1]) / 2
             step2 = (ylim2[0] - ylim2[1]) / 2
             step3 = (ylim3[0] - ylim3[1]) / 2
-            if (ylim1[1] - step1) < 0:
-                step1 = ylim1[1]
+            if s*(ylim1[1] - step1 - top) < 0:
+                step1 = ylim1[1] - top
                 step2 = ylim2[1]
                 step3 = ylim3[1]
             self.ax.set_ylim(ylim1[0] - step1, ylim1[1] - step1)
@@ -598,12 +680,15 @@ class impick(tk.Frame):
         ylim1 = self.ax.get_ylim()
         ylim2 = self.secaxy0.get_ylim()
         ylim3 = self.secaxy1.get_ylim()
-        if ylim1[0] < self.rdata.snum:
+        # y increases down the profile in the twtt and depth domains, and up in the elev domain
+        bottom, top = self.prof.get_ybounds()
+        s = 1 if bottom > top else -1
+        if s*(bottom - ylim1[0]) > 0:
             step1 = (ylim1[0] - ylim1[1]) / 2
             step2 = (ylim2[0] - ylim2[1]) / 2
             step3 = (ylim3[0] - ylim3[1]) / 2
-            if (ylim1[0] + step1) > self.rdata.snum:
-                step1 = self.rdata.snum - ylim1[0]
+            if s*(ylim1[0] + step1 - bottom) > 0:
+                step1 = bottom - ylim1[0]
                 step2 = (self.rdata.snum*self.rdata.dt) - ylim2[0]
                 step3 = utils.twtt2depth(self.rdata.snum*self.rdata.dt, np.nanmean(self.rdata.asep), self.eps_r) - ylim3[0]
             self.ax.set_ylim(ylim1[0] + step1, ylim1[1] + step1)
@@ -612,15 +697,22 @@ class impick(tk.Frame):
             self.dataCanvas.draw()
 
 
+    # switchChan swaps in the precomputed image of the selected channel, or the incoherent channel average
     def switchChan(self):
         # check to make sure channel exists before switching
-        if self.chan.get() == 1 and self.rdata.nchan < 2:
+        chan = "mean" if self.chan.get() == -1 else self.chan.get()
+        if self.rdata.chans is None:
             self.chan.set(0)
             return
-        elif self.chan.get() == 1 and self.rdata.nchan == 2:
-            self.drawData(force=True)
-        elif self.chan.get() == 0:
-            self.drawData(force=True)
+        if chan == self.rdata.chan:
+            return
+        self.rdata.set_chan(chan)
+        self.drawData(force=True)
+
+
+    # update_chan is a method to set the channel buttons to the active rdata channel, after the channel is changed outside of switchChan
+    def update_chan(self):
+        self.chan.set(-1 if self.rdata.chan == "mean" else self.rdata.chan if isinstance(self.rdata.chan, int) else 0)
 
 
    # set_im is a method to set which rdata is being displayed
@@ -651,8 +743,7 @@ class impick(tk.Frame):
             self.s_cmax.valmax = self.maxdB_data + (self.data_crange/2)
             self.update_slider()
             # reverse visilibilty
-            self.im_sim.set_visible(False)
-            self.im_dat.set_visible(True)
+            self.prof.show(sim=False, stretch=self.vp_stretch)
             # redraw canvas
             # self.update_bg()
             self.fig.canvas.draw()
@@ -681,8 +772,7 @@ class impick(tk.Frame):
             self.s_cmax.valmax = self.maxdB_sim + (self.sim_crange/2)
             self.update_slider()
             # reverse visilibilty
-            self.im_dat.set_visible(False)
-            self.im_sim.set_visible(True)
+            self.prof.show(sim=True, stretch=self.vp_stretch)
             # set flag to indicate that sim has been viewed for resetting colorbar limits
             self.sim_imSwitch_flag = True    
             # redraw canvas
@@ -700,26 +790,25 @@ class impick(tk.Frame):
         return self.pick_surf
 
 
-    # return horizon_paths
+    # return horizon_paths - compact segment objects for each horizon built from rdata.pick
     def get_horizon_paths(self):
-        return self.horizon_paths
+        return {horizon: self.rdata.pick.get_segments(horizon) for horizon in self.horizon_lns}
 
     
-    # receive horizon_paths
+    # receive horizon_paths - update rdata.pick segments and horizon lines
     def set_horizon_paths(self, horizon_paths):
-        self.horizon_paths = copy.deepcopy(horizon_paths)
-        for horizon, hdict in self.horizon_paths.items():
-            x,y = utils.merge_paths(hdict)
-            self.horizon_lns[horizon].set_data(x,y)
+        for horizon, hdict in horizon_paths.items():
+            self.rdata.pick.set_segments(horizon, hdict)
+            self.horizon_lns[horizon].set_ydata(self.prof.get_horizon_y(horizon))
 
 
     # reverse horizon path objects
     def reverse(self):
         # horizon arrays have already been flipped within proc.reverse, but we need to reset the canvas by redrawing the horizons
-        tmp = copy.deepcopy(self.rdata.pick.horizons)
+        tmp = dict(self.rdata.pick.horizons)
         self.rm_horizon(rm_all=True, verify=False)
         for h in tmp.keys():
-            self.rdata.pick.horizons[h] = tmp[h]
+            self.rdata.pick.set_horizon(h, tmp[h])
             self.set_picks(h)
 
         self.update_pickLabels()
@@ -790,18 +879,19 @@ class impick(tk.Frame):
 
         if not skip_array:
             # ensure horizon doesn't already exist, otherwise overwrite or return
-            if horizon not in self.horizon_paths:
-                self.rdata.pick.horizons[horizon] = np.repeat(np.nan, self.rdata.tnum)
+            if horizon not in self.rdata.pick.horizons:
+                self.rdata.pick.init_horizon(horizon, self.rdata.tnum)
             elif tk.messagebox.askyesno("Warning","Horizon name (" + horizon + ") already exists. Overwrite?") == True:
-                self.rdata.pick.horizons[horizon] = np.repeat(np.nan, self.rdata.tnum)
+                self.rdata.pick.init_horizon(horizon, self.rdata.tnum)
+                if horizon in self.horizon_lns:
+                    self.horizon_lns[horizon].remove()
             else:
                 return
-        self.horizon_paths[horizon] = {}
-        # initialize 0th segment for new horizon
+        # initialize empty segment for new horizon
         self.init_segment(horizon=horizon)
         # initialize line object for new horizon
-        x,y = utils.merge_paths(self.horizon_paths[horizon])
-        self.horizon_lns[horizon], = self.ax.plot(x,y,lw=2,c=self.ln_colors["hex"][self.ln_colors["str"].index(self.color.get())])            
+        self.horizon_lns[horizon], = self.ax.plot(np.arange(self.rdata.tnum), self.prof.get_horizon_y(horizon),
+                                                  lw=2,c=self.ln_colors["hex"][self.ln_colors["str"].index(self.color.get())])            
         # update horizon and segment options
         self.update_hor_opt_menu()  
         # set horVar to new horizon
@@ -855,8 +945,7 @@ class impick(tk.Frame):
 
             # rename horizon path, line objects, and used line colors maintaining order
             if hname:
-                self.horizon_paths = {hname if k==horizon else k:v for k,v in self.horizon_paths.items()}
-                self.rdata.pick.horizons = {hname if k==horizon else k:v for k,v in self.rdata.pick.horizons.items()}
+                self.rdata.pick.rename_horizon(horizon, hname)
                 self.horizon_lns = {hname if k==horizon else k:v for k,v in self.horizon_lns.items()}
                 self.ln_colors["used"] = {hname if k==horizon else k:v for k,v in self.ln_colors["used"].items()}
                 # set horVar to new horizon
@@ -873,7 +962,7 @@ class impick(tk.Frame):
             return
 
         if rm_all:
-            horizon = list(self.horizon_paths.keys())
+            horizon = list(self.horizon_lns.keys())
             if verify:
                 if tk.messagebox.askyesno("Warning","Remove all interpretation horizons?"):
                     verify = False
@@ -920,23 +1009,16 @@ class impick(tk.Frame):
             if self.get_pickState() and self.horVar.get() in horizon:
                 self.set_pickState(False)
             for h in horizon:
-                # get index of key to remove annotation
-                i = list(self.horizon_paths.keys()).index(h)
-                self.ann_list[i].remove()
-                del self.ann_list[i]
-                # remove path objects, lines, and pick horizons
+                # remove lines and pick horizons - annotations are reset below
                 self.horizon_lns[h].remove()
                 del self.horizon_lns[h]
-                del self.horizon_paths[h]
-                del self.rdata.pick.horizons[h]
+                self.rdata.pick.rm_horizon(h)
                 del self.ln_colors["used"][h]
-                if h == self.rdata.pick.srf:
-                    self.rdata.pick.set_srf(None)
             # reset horizon and segment variables
-            if len(self.horizon_paths) > 0:
-                h = list(self.horizon_paths.keys())[-1]
+            if len(self.horizon_lns) > 0:
+                h = list(self.horizon_lns.keys())[-1]
                 self.horVar.set(h)
-                self.segVar.set(len(self.horizon_paths[h]))
+                self.segVar.set(len(self.rdata.pick.segs[h]))
             else:
                 self.horVar.set("")
                 self.segVar.set(0)
@@ -949,8 +1031,7 @@ class impick(tk.Frame):
     # init_segment is a method to initialize new pick segment
     def init_segment(self, horizon=None):
         if horizon:
-            l = len(self.horizon_paths[horizon])
-            self.horizon_paths[horizon][l] = path(np.repeat(np.nan, self.rdata.tnum), np.repeat(np.nan, self.rdata.tnum))
+            l = self.rdata.pick.add_segment(horizon)
             self.segVar.set(l)
             # update segment options
             self.update_seg_opt_menu()
@@ -1005,29 +1086,26 @@ class impick(tk.Frame):
                 return
 
         # ensure segment belongs to horizon and that interpretations have been made
-        if (seg in self.horizon_paths[horizon]):
-            if np.isnan(self.horizon_paths[horizon][seg].x).all():
+        if (seg in self.rdata.pick.segs[horizon]):
+            # find indices of picked traces
+            picks_idx, samples = self.rdata.pick.get_segment(horizon, seg)
+            if picks_idx.size == 0:
                 return
             if verify and not (tk.messagebox.askokcancel("Warning", "Edit interpretation segment " + horizon + "_" + str(seg) + "?", icon="warning")):
                 return
             self.edit_flag = True
             self.set_pickState(True)
-            # find indices of picked traces
-            picks_idx = np.where(~np.isnan(self.horizon_paths[horizon][seg].x))[0]
             # update self.edit_path
-            self.edit_path = path(picks_idx, self.horizon_paths[horizon][seg].y[picks_idx])
+            self.edit_path = path(picks_idx, samples)
             # return picked traces to xln list
             self.tmp_horizon_path.x = picks_idx[::20].tolist()
             # return picked samples to yln list
-            self.tmp_horizon_path.y = self.horizon_paths[horizon][seg].y[self.tmp_horizon_path.x].tolist()
+            self.tmp_horizon_path.y = samples[::20].tolist()
             # clear saved picks for horizon segment
-            self.horizon_paths[horizon][seg].x[picks_idx] = np.nan
-            self.horizon_paths[horizon][seg].y[picks_idx] = np.nan
-            self.rdata.pick.horizons[horizon][picks_idx] = np.nan
+            self.rdata.pick.clear_segment(horizon, seg)
             # reset plotted lines
             self.tmp_horizon_ln.set_data(self.tmp_horizon_path.x, self.tmp_horizon_path.y)
-            x,y = utils.merge_paths(self.horizon_paths[horizon])
-            self.horizon_lns[horizon].set_data(x,y)
+            self.horizon_lns[horizon].set_ydata(self.prof.get_horizon_y(horizon))
             self.update_bg()
 
 
@@ -1080,8 +1158,8 @@ class impick(tk.Frame):
         
 
         # ensure segment belongs to horizon and that interpretations have been made
-        if (seg in self.horizon_paths[horizon]):
-            if (np.isnan(self.horizon_paths[horizon][seg].x).all()) and not (self.edit_flag):
+        if (seg in self.rdata.pick.segs[horizon]):
+            if (self.rdata.pick.segs[horizon][seg] is None) and not (self.edit_flag):
                 return
 
             if not (tk.messagebox.askokcancel("Warning", "Remove interpretation segment " + horizon + "_" + str(seg) + "?", icon="warning")):
@@ -1094,21 +1172,13 @@ class impick(tk.Frame):
                 self.tmp_horizon_ln.set_data(self.tmp_horizon_path.x, self.tmp_horizon_path.y)
                 self.set_pickState(False)
 
-            # remove horizon interpretation path object for segment
-            del self.horizon_paths[horizon][seg]
-
-            # reorder pick segments and path objects if necessary
-            l = len(self.horizon_paths[horizon])
-            if seg != l:
-                for _i in range(seg, l):
-                    self.horizon_paths[horizon][_i] = path(self.horizon_paths[horizon][_i + 1].x, self.horizon_paths[horizon][_i + 1].y)
-                del self.horizon_paths[horizon][_i + 1]
+            # remove horizon segment picks and reorder subsequent segments
+            self.rdata.pick.rm_segment(horizon, seg)
 
             self.update_pickLabels() 
             self.update_seg_opt_menu(last=True)
             # reset line object for horizon
-            x,y = utils.merge_paths(self.horizon_paths[horizon])
-            self.horizon_lns[horizon].set_data(x,y)
+            self.horizon_lns[horizon].set_ydata(self.prof.get_horizon_y(horizon))
             self.update_bg()
     
 
@@ -1120,6 +1190,9 @@ class impick(tk.Frame):
         l = len(self.tmp_horizon_path.x)                
         # handle pick state set to true
         if state:
+            if self.prof is not None and self.prof.domain != "twtt":
+                print("Picking is only available in the twtt domain")
+                return
             if not horizon:
                 self.init_horizon()
                 return
@@ -1129,7 +1202,7 @@ class impick(tk.Frame):
                     self.pick_interp(horizon=horizon,seg=seg)
                     self.plot_picks(horizon=horizon)
                     # if subsequent segment doesn't already exist, initialize
-                    if (seg + 1) not in self.horizon_paths[horizon]:
+                    if (seg + 1) not in self.rdata.pick.segs[horizon]:
                         self.init_segment(horizon)
                     else:
                         self.segVar.set(seg + 1)
@@ -1164,14 +1237,15 @@ class impick(tk.Frame):
                     # interpolate and plot picks
                     self.pick_interp(horizon=horizon,seg=seg)
                     self.plot_picks(horizon=horizon)
-                    if (seg + 1) not in self.horizon_paths[horizon]:
+                    if (seg + 1) not in self.rdata.pick.segs[horizon]:
                         self.init_segment(horizon)
                     else:
                         self.segVar.set(seg + 1)
                 # if less than 2 picks, clear
                 else:
                     self.clear_last()
-                    del self.horizon_paths[horizon][list(self.horizon_paths[horizon].keys())[-1]]
+                    if self.rdata.pick.segs[horizon]:
+                        self.rdata.pick.rm_segment(horizon, list(self.rdata.pick.segs[horizon].keys())[-1])
             # reset edit_flag
             self.edit_flag = state
         # update pick_state to current state
@@ -1210,9 +1284,8 @@ class impick(tk.Frame):
             # check if picking state is a go
             if self.get_pickState():
                 # if pick_trace falls within other segment for horizon, return
-                for path in self.horizon_paths[self.horVar.get()].values():
-                    if pick_trace in path.x:
-                        return
+                if self.rdata.pick.segids[self.horVar.get()][pick_trace] != -1:
+                    return
 
                 # determine if trace already contains pick - if so, replace with current sample
                 if pick_trace in self.tmp_horizon_path.x:
@@ -1239,6 +1312,7 @@ class impick(tk.Frame):
                         self.tmp_horizon_path.y.append(pick_sample)
                         if len(self.tmp_horizon_path.x) == 1:
                             self.update_pickLabels()
+                            self.update_bg()
 
                 # set picks and draw
                 self.tmp_horizon_ln.set_data(self.tmp_horizon_path.x, self.tmp_horizon_path.y)
@@ -1256,18 +1330,17 @@ class impick(tk.Frame):
         # if there are at least two picked points, interpolate
         if len(self.tmp_horizon_path.x) >= 2:
             # cubic spline between picks
-            cs = CubicSpline(self.tmp_horizon_path.x, self.tmp_horizon_path.y)
+            cs = interpolate.CubicSpline(self.tmp_horizon_path.x, self.tmp_horizon_path.y)
             # generate array between first and last pick indices on current layer
             picked_traces = np.arange(self.tmp_horizon_path.x[0], self.tmp_horizon_path.x[-1] + 1)
             sample = cs(picked_traces).astype(int)
             # if windize >=2, loop over segment and take maximum sample within window of cubic spline interp
             if winSize >= 2:
                 for _i in range(len(picked_traces)):
-                    sample[_i] = int(sample[_i] - (winSize/2)) + np.argmax(np.abs(self.rdata.dat)[int(sample[_i] - (winSize/2)):int(sample[_i] + (winSize/2)), picked_traces[_i]])
-            # add pick interpolation to horizon objects for current segment
-            self.horizon_paths[horizon][seg].x[picked_traces] = picked_traces
-            self.horizon_paths[horizon][seg].y[picked_traces] = sample
-            self.rdata.pick.horizons[horizon][picked_traces] = sample
+                    s0 = max(int(sample[_i] - (winSize/2)), 0)
+                    sample[_i] = s0 + np.argmax(np.abs(self.rdata.dat[s0:int(sample[_i] + (winSize/2)), picked_traces[_i]]))
+            # add pick interpolation to current horizon segment
+            self.rdata.pick.set_segment(horizon, seg, picked_traces, sample)
 
 
     # plot_picks is a method to remove current pick list and add saved picks to plot
@@ -1276,8 +1349,7 @@ class impick(tk.Frame):
         del self.tmp_horizon_path.x[:]
         del self.tmp_horizon_path.y[:]
         self.tmp_horizon_ln.set_data(self.tmp_horizon_path.x, self.tmp_horizon_path.y)
-        x,y = utils.merge_paths(self.horizon_paths[horizon])
-        self.horizon_lns[horizon].set_data(x,y)
+        self.horizon_lns[horizon].set_ydata(self.prof.get_horizon_y(horizon))
 
 
     # clear last pick
@@ -1297,22 +1369,15 @@ class impick(tk.Frame):
             # set horizon color to first unused color
             color = [c for c in self.ln_colors["hex"] if c not in list(self.ln_colors["used"].values())][0]
             self.color.set(self.ln_colors["str"][self.ln_colors["hex"].index(color)])
+            # split horizon array into segments if not already set through rdata.pick.set_horizon
+            if horizon not in self.rdata.pick.segids:
+                self.rdata.pick.set_horizon(horizon, self.rdata.pick.horizons[horizon])
             self.init_horizon(horizon=horizon,skip_array=True)
-            # split horizon array into segments
-            idx = utils.nonan_idx_array(self.rdata.pick.horizons[horizon])
-            clumps = utils.clump_array(idx)
-            for _i, clump in enumerate(clumps):
-                clump_arr = np.asarray(clump).astype(int)
-                self.horizon_paths[horizon][_i].x[clump_arr] = clump_arr
-                self.horizon_paths[horizon][_i].y[clump_arr] = self.rdata.pick.horizons[horizon][clump_arr]
-                self.init_segment(horizon=horizon)
-            x,y = utils.merge_paths(self.horizon_paths[horizon])
-            self.horizon_lns[horizon].set_data(x,y)
 
 
     # update the horizon menu
     def update_hor_opt_menu(self):
-        self.horizons = list(self.horizon_paths.keys())
+        self.horizons = list(self.horizon_lns.keys())
         self.horMenu["menu"].delete(0, "end")
         for i, horizon in enumerate(self.horizons):
             c = self.horizon_lns[horizon].get_color()
@@ -1332,7 +1397,7 @@ class impick(tk.Frame):
         horizon = hvar.get()
         menu["menu"].delete(0, "end")
         if horizon:
-            for seg in sorted(self.horizon_paths[horizon].keys()):
+            for seg in sorted(self.rdata.pick.segs[horizon].keys()):
                 menu["menu"].add_command(label=seg, command=tk._setit(svar, seg))
             # set segment selection to last
             if last:
@@ -1353,13 +1418,12 @@ class impick(tk.Frame):
             self.ann_list.append(ann)
             if not self.ann_vis:
                 ann.set_visible(False)
-        for horizon, item in self.horizon_paths.items():
-            for seg, path in item.items():
-                x = np.where(~np.isnan(path.x))[0]
-                if x.size == 0:
+        for horizon in self.horizon_lns:
+            for seg, bounds in self.rdata.pick.segs[horizon].items():
+                if bounds is None:
                     continue
-                x = x[0]
-                y = path.y[x]
+                x = bounds[0]
+                y = self.prof.get_horizon_y(horizon)[x]
                 ann = self.ax.text(x-25,y+75, horizon + "_" + str(seg), bbox=dict(facecolor='white', alpha=0.5), horizontalalignment='right', verticalalignment='top')
                 self.ann_list.append(ann)
                 if not self.ann_vis:
@@ -1383,8 +1447,7 @@ class impick(tk.Frame):
         if vis is not None:
             self.pick_vis = vis
         self.show_artists(self.pick_vis)
-        self.safe_draw()
-        self.fig.canvas.blit(self.ax.bbox)
+        self.update_bg()
 
 
     # show plotted lines - don't override cursor crosshair visibility
@@ -1409,23 +1472,31 @@ class impick(tk.Frame):
         self.draw_cid = canvas.mpl_connect("draw_event", self.update_bg)
 
 
-    # when the figure is resized, hide picks, draw everything, and update the background image
+    # get_overlay is a method to return the artists drawn on top of the background - crosshairs and in-progress picks
+    def get_overlay(self):
+        return [_i for _i in [self.tmp_horizon_ln, self.horizontal_line, self.vertical_line] if _i is not None]
+
+
+    # when the figure is resized or saved horizons change, draw the image, horizons, and annotations once,
+    # and update the background image. only the overlay artists are left out of the background
     def update_bg(self, event=None):
-        # temporarily hide artists
-        self.show_artists(False, force=True)
+        # temporarily hide overlay artists
+        overlay = self.get_overlay()
+        vis = [_i.get_visible() for _i in overlay]
+        for _i in overlay:
+            _i.set_visible(False)
         self.safe_draw()
         self.axbg = self.dataCanvas.copy_from_bbox(self.ax.bbox)
-        # return artists visiblity to former state
-        self.show_artists(self.pick_vis,self.get_pickState())
+        # return overlay visiblity to former state
+        for _i, v in zip(overlay, vis):
+            _i.set_visible(v)
         self.blit()
 
 
-    # update the figure, without needing to redraw the "axbg" artists
+    # update the figure, without needing to redraw the "axbg" artists - only overlay artists are drawn
     def blit(self):
         self.fig.canvas.restore_region(self.axbg)
-        for _i in self.ax.lines:
-            self.ax.draw_artist(_i)
-        for _i in self.ann_list:
+        for _i in self.get_overlay():
             self.ax.draw_artist(_i)
         self.fig.canvas.blit(self.ax.bbox)
 
@@ -1466,16 +1537,25 @@ class impick(tk.Frame):
         self.vertical_line.set_visible(visible)
 
 
-    # on_mouse_move blit crosshairs
+    # on_mouse_move schedules a crosshair redraw - motion events are throttled to the display refresh rate
     def on_mouse_move(self, event):
-        if self.rdata:
-            x, y = event.xdata, event.ydata
-            self.horizontal_line.set_ydata(y)
-            self.vertical_line.set_xdata(x)
-            self.ax.figure.canvas.restore_region(self.axbg)
-            self.ax.draw_artist(self.horizontal_line)
-            self.ax.draw_artist(self.vertical_line)
-            self.blit()
+        if self.rdata and self.horizontal_line and self.horizontal_line.get_visible():
+            if event.xdata is None or event.ydata is None:
+                return
+            self.motion_xy = (event.xdata, event.ydata)
+            if self.motion_after is None:
+                self.motion_after = self.after(16, self.draw_cross_hair)
+
+
+    # draw_cross_hair blits crosshairs at latest cursor location
+    def draw_cross_hair(self):
+        self.motion_after = None
+        if self.motion_xy is None:
+            return
+        x, y = self.motion_xy
+        self.horizontal_line.set_ydata([y])
+        self.vertical_line.set_xdata([x])
+        self.blit()
 
 
     # update_figsettings
@@ -1512,6 +1592,9 @@ class impick(tk.Frame):
     # get debug state from gui settings
     def set_debugState(self, debugState):
         self.debugState = debugState
+        # print step timing summary
+        if self.debugState and perf.enabled:
+            print(perf.summary().to_string())
 
 
     # get eps_r setting from gui settings
@@ -1521,6 +1604,8 @@ class impick(tk.Frame):
 
     # export_fig is a method to receive the pick save location from gui export the radar figure
     def export_fig(self, f_saveName):
+        # render images at full resolution for export
+        self.prof.lut_full = True
         # zoom out to full rgram extent to save pick image
         self.fullExtent()
         self.verticalClip(self.figsettings["figclip"][0].get(), self.figsettings["figclip"][1].get())
@@ -1558,6 +1643,7 @@ class impick(tk.Frame):
 
         # return figsize to intial values and make sliders visible again
         self.fig.set_size_inches((w0, h0))
+        self.prof.lut_full = False
         self.fullExtent()
         self.ax_cmax.set_visible(True)
         self.ax_cmin.set_visible(True)
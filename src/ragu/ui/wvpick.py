@@ -12,7 +12,7 @@ import numpy as np
 from scipy.interpolate import CubicSpline
 from scipy.signal import find_peaks
 import tkinter as tk
-import sys,os,time,copy
+import sys,os,time
 import matplotlib as mpl
 mpl.use("TkAgg")
 import matplotlib.pyplot as plt
@@ -167,6 +167,7 @@ class wvpick(tk.Frame):
     def set_vars(self):
         self.rdata = None
         self.horizon_paths_opt = None
+        self.edit = 0               # count of repick edits since horizon paths were received
         self.ln_colors = {}
         self.horizons = []
         self.repick_idx = {}        # dictionary of indeces of repicked traces for each seg
@@ -179,10 +180,11 @@ class wvpick(tk.Frame):
         self.rdata = rdata
 
 
-    # receive horizon paths from impick
+    # receive horizon paths from impick - compact segments, copied for optimization
     def set_horizon_paths(self, horizon_paths):
-        self.horizon_paths = copy.deepcopy(horizon_paths)
-        self.horizon_paths_opt = copy.deepcopy(horizon_paths)
+        self.horizon_paths = horizon_paths
+        self.horizon_paths_opt = {h: {seg: sgmt.copy() for seg, sgmt in hdict.items()} for h, hdict in horizon_paths.items()}
+        self.edit = 0
         self.horizons = list(self.horizon_paths_opt)
         self.nhorizons = len(self.horizons)
         self.update_hor_opt_menu()
@@ -194,6 +196,11 @@ class wvpick(tk.Frame):
         return self.horizon_paths_opt
 
 
+    # return count of repick edits to horizon paths
+    def get_edit(self):
+        return self.edit
+
+
     # receive horizon line colors
     def set_horizon_colors(self, ln_colors):
         self.ln_colors = ln_colors
@@ -219,13 +226,12 @@ class wvpick(tk.Frame):
                 self.repick_idx[horizon] = []
                 self.trace[horizon] = None
                 # iterate through segments for each horizon
-                for seg, path in hdict.items():
-                    picked_traces = np.where(~np.isnan(path.x))[0]
-                    if picked_traces.shape[0] > 0:
-                        self.segment_traces[horizon].first.append(picked_traces[0])
-                        self.segment_traces[horizon].last.append(picked_traces[-1])
+                for seg, sgmt in hdict.items():
+                    if len(sgmt) > 0:
+                        self.segment_traces[horizon].first.append(sgmt.start)
+                        self.segment_traces[horizon].last.append(sgmt.end - 1)
                         if seg == 0:
-                            self.trace[horizon] = picked_traces[0]
+                            self.trace[horizon] = sgmt.start
             # set horVar
             self.horVar.set(self.horizons[-1])
         else:
@@ -253,8 +259,8 @@ class wvpick(tk.Frame):
         for horizon in self.horizons:
             # get sample index of pick for given trace
             for seg in self.horizon_paths_opt[horizon].keys():
-                pick_idx0 = self.horizon_paths[horizon][seg].y[self.t]
-                pick_idx1 = self.horizon_paths_opt[horizon][seg].y[self.t]
+                pick_idx0 = self.horizon_paths[horizon][seg].get(self.t)
+                pick_idx1 = self.horizon_paths_opt[horizon][seg].get(self.t)
                 val = np.append(val, (pick_idx0+pick_idx1)//2)
                 if not np.isnan(pick_idx0):
                     self.ax.axvline(x = pick_idx0, c=self.ln_colors[horizon], label=horizon + "_" + str(seg))
@@ -391,13 +397,14 @@ class wvpick(tk.Frame):
             seg = self.segVar.get()
             winSize = self.winSize.get()
             x = np.arange(self.segment_traces[horizon].first[seg], self.segment_traces[horizon].last[seg] + 1)
-            y = self.horizon_paths[horizon][seg].y[x]
+            y = self.horizon_paths[horizon][seg].get(x)
             for _i in range(len(x)):
                 if not np.isnan(y[_i]):
                     # find argmax for window for given data trace in pick
                     max_idx = np.nanargmax(self.rdata.proc.curr_dB[int(y[_i] - (winSize/2)):int(y[_i] + (winSize/2)), x[_i]])
                     # add argmax index to pick_dict1 - account for window index shift
-                    self.horizon_paths_opt[horizon][seg].y[x[_i]] = max_idx + int(y[_i] - (winSize/2))
+                    self.horizon_paths_opt[horizon][seg].set(x[_i], max_idx + int(y[_i] - (winSize/2)))
+            self.edit += 1
             self.plot_wv()
 
 
@@ -411,7 +418,8 @@ class wvpick(tk.Frame):
         if (len(self.repick_idx[horizon]) == 0) or (self.repick_idx[horizon][-1] != self.trace[horizon]):
             self.repick_idx[horizon].append(self.trace[horizon])
         
-        self.horizon_paths_opt[horizon][seg].y[self.trace[horizon]] = int(event.xdata)        
+        self.horizon_paths_opt[horizon][seg].set(self.trace[horizon], int(event.xdata))
+        self.edit += 1
         self.plot_wv()
 
 
@@ -429,15 +437,17 @@ class wvpick(tk.Frame):
 
         if interp == "linear":
             # get twtt values at repicked indicesself.pick_dict1
-            fp = self.horizon_paths_opt[horizon][seg].y[xp]
+            fp = self.horizon_paths_opt[horizon][seg].get(xp)
             # interpolate repicked values for seg
-            self.horizon_paths_opt[horizon][seg].y[interp_idx] = np.interp(interp_idx, xp, fp)            
+            self.horizon_paths_opt[horizon][seg].set(interp_idx, np.interp(interp_idx, xp, fp))
 
         elif interp == "cubic":
             # cubic spline between picks
-            cs = CubicSpline(xp, self.horizon_paths_opt[horizon][seg].y[xp])
+            cs = CubicSpline(xp, self.horizon_paths_opt[horizon][seg].get(xp))
             # add cubic spline output interpolation to pick dictionary
-            self.horizon_paths_opt[horizon][seg].y[interp_idx] = cs([interp_idx]).astype(int)
+            self.horizon_paths_opt[horizon][seg].set(interp_idx, cs(interp_idx).astype(int))
+
+        self.edit += 1
 
 
     # set tkinter menu font colors to match color name
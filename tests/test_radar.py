@@ -0,0 +1,75 @@
+"""
+garlic data object tests
+"""
+### imports ###
+from ragu import synth
+from ragu.radar import garlic
+from ragu.tools import lut
+import numpy as np
+import matplotlib as mpl
+import pytest
+
+
+# complex raw data is processed and displayed as real amplitude, including after steps which reset processed data to the raw data
+def test_complex_proc():
+    rdata = synth.scene(snum=200, tnum=500).to_garlic()
+    rdata.set_dat(rdata.get_dat()*np.exp(1j*np.linspace(0, np.pi, rdata.snum))[:,None])
+    rdata.reverse()
+    for arr in [rdata.proc.get_curr_amp(), rdata.proc.get_curr_dB()] + rdata.dPyramid:
+        assert arr.dtype == rdata.fdtype
+    assert np.allclose(rdata.proc.get_curr_amp(), np.abs(rdata.get_dat()))
+    limg = lut.lutimage(rdata.dPyramid)
+    limg.set_lut(mpl.colormaps["Greys_r"], (-10, 30))
+    assert limg.render(0, (0, rdata.tnum), (rdata.snum, 0))[0].dtype == np.uint8
+
+
+# processing steps agree between single and double precision to float32 tolerance, and hold data at the policy dtype
+@pytest.mark.parametrize("step", [lambda r: r.tpowGain(1.2),
+                                  lambda r: r.filter(btype="bandpass", lowcut=1e6, highcut=1e7),
+                                  lambda r: r.hilbertxform(),
+                                  lambda r: r.removeSlidingMeanFFT(50)],
+                         ids=["tpowGain", "filter", "hilbertxform", "removeSlidingMeanFFT"])
+def test_precision(step):
+    out = {}
+    try:
+        for precision in ["single", "double"]:
+            garlic.set_precision(precision)
+            rdata = synth.scene(snum=200, tnum=500).to_garlic()
+            rdata.set_dat(rdata.get_dat()*np.exp(1j*np.linspace(0, np.pi, rdata.snum))[:,None])
+            assert rdata.get_dat().dtype == rdata.cdtype
+            step(rdata)
+            assert rdata.proc.get_curr_amp().dtype == rdata.fdtype
+            out[precision] = rdata.proc.get_curr_amp()
+    finally:
+        garlic.set_precision("single")
+    scale = np.nanmax(np.abs(out["double"]))
+    assert np.allclose(out["single"], out["double"], rtol=1e-4, atol=1e-5*scale, equal_nan=True)
+
+
+# a channel switch is undone by switching back to the previous channel with its processed data, and redone by switching again
+def test_chan_undo():
+    rdata = synth.scene(snum=200, tnum=500).to_garlic()
+    rdata.log('igst = ingest.ingest("synth")')
+    rdata.log('rdata = igst.read("None","{}","earth")'.format(synth.navcrs["earth"]))
+    rdata.set_chans(np.stack([rdata.get_dat(), 2*rdata.get_dat()]))
+    raw = rdata.proc.get_curr_amp().copy()
+    rdata.tpowGain(1.2)
+    gained = rdata.proc.get_curr_amp()
+    rdata.set_chan(1)
+    rdata.undo()
+    assert rdata.chan == 0
+    assert np.array_equal(rdata.proc.get_curr_amp(), gained)
+    rdata.undo()
+    assert np.array_equal(rdata.proc.get_curr_amp(), raw)
+    assert len(rdata.hist) == 2
+    # no previous step is held for a channel which has not been processed
+    rdata.set_chan(1)
+    rdata.hist.append("rdata.tpowGain(power=1.2)")
+    rdata.undo()
+    assert rdata.chan == 1
+    # redo after undoing a channel switch switches channel again
+    rdata.hist.pop()
+    rdata.undo()
+    assert rdata.chan == 0
+    rdata.redo()
+    assert rdata.chan == 1 and rdata.hist[-1] == "rdata.set_chan(1)"
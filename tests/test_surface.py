@@ -0,0 +1,37 @@
+"""
+surface detection and tracking tests
+"""
+### imports ###
+from ragu.tools import surface
+import numpy as np
+
+
+# a band jump larger than maxjump restarts the path rather than collapsing it to the top of the band
+def test_viterbi_band_jump():
+    tnum = 300
+    start = np.r_[np.full(150, 30), np.full(150, 190)]
+    path = np.r_[np.full(150, 40), np.full(150, 200)]
+    C = np.zeros((21, tnum))
+    C[path - start, np.arange(tnum)] = 1
+    assert np.array_equal(surface.viterbi(C, maxjump=5, start=start), path)
+
+
+# the path follows a surface moving by at most maxjump between traces
+def test_viterbi_maxjump():
+    tnum = 200
+    path = (50 + 20*np.sin(np.arange(tnum) / 20)).astype(int)
+    C = np.random.default_rng(0).random((100, tnum))
+    C[path, np.arange(tnum)] += 2
+    assert np.array_equal(surface.viterbi(C, maxjump=5), path)
+
+
+# the criterion of a band computed over the band and its halo matches the criterion of the full trace
+def test_band_criterion():
+    rng = np.random.default_rng(0)
+    dat = np.abs(rng.normal(size=(500, 400)))
+    start = rng.integers(0, 500 - 81, 400)
+    center = (start + 40).astype(float)
+    for method in surface.criteria:
+        full, _ = surface.window_gather(surface.get_criterion(dat, method, skip=10), center, 81)
+        band = surface.band_criterion(dat, start, 81, method, skip=10)
+        assert np.allclose(full, band, equal_nan=True)